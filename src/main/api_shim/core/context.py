@@ -0,0 +1,161 @@
+# Copyright 2011 the original author or authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import java.lang.System
+import java.lang.Throwable
+import java.util.concurrent.ConcurrentLinkedQueue
+import java.util.concurrent.atomic.AtomicBoolean
+import org.vertx.java.platform.impl.JythonVerticleFactory
+
+from core.future import Future
+from core.handlers import NullDoneHandler
+
+# The most microtasks a queue runs in one event loop task before letting other events in
+microtask_budget = 1000
+
+class MicrotaskQueue(object):
+    """The Python callables deferred with run_on_context on a context.
+
+    Rather than posting a Java task per callable the queue posts a single task, which runs the callables
+    queued up to then, and any queued while they run, in order. After microtask_budget of them the task
+    is posted again for the rest so other events on the context still get a turn.
+    """
+
+    def __init__(self, context):
+        self.context = context
+        # Callables may be queued from other threads
+        self._queue = java.util.concurrent.ConcurrentLinkedQueue()
+        self._scheduled = java.util.concurrent.atomic.AtomicBoolean()
+        self._drain_handler = NullDoneHandler(self._drain)
+
+    def __len__(self):
+        return self._queue.size()
+
+    def post(self, handler):
+        """Queue a callable to run on the context"""
+        self._queue.add(handler)
+        if self._scheduled.compareAndSet(False, True):
+            self.context.runOnContext(self._drain_handler)
+
+    def _drain(self):
+        poll = self._queue.poll
+        try:
+            for i in xrange(microtask_budget):
+                handler = poll()
+                if handler is None:
+                    break
+                handler()
+        finally:
+            # Errors, Python or Java, go on to Vert.x to be reported as they were when each callable had a task
+            # of its own. The rest of the queue runs in the next task.
+            self._scheduled.set(False)
+            # Anything queued after the last poll, or left over by the budget or an error, needs another task
+            if not self._queue.isEmpty() and self._scheduled.compareAndSet(False, True):
+                self.context.runOnContext(self._drain_handler)
+
+_queues = {}
+
+def microtask_queue(context):
+    """Get the microtask queue of a Java context"""
+    queue = _queues.get(context)
+    if queue is None:
+        queue = _queues.setdefault(context, MicrotaskQueue(context))
+    return queue
+
+def release_context(context):
+    """Forget the queue of a context whose verticle has stopped"""
+    _queues.pop(context, None)
+
+def iterate(iterable, func, budget_ms=10):
+    """Call a function with each item of an iterable in slices of at most budget_ms, going back to the event
+    loop between slices so other events aren't held up
+
+    Keyword arguments:
+    @param iterable: the items
+    @param func: the function to call with each item
+    @param budget_ms: how long a slice may run for, in milliseconds. A slice always processes at least one item
+    @return: a Future of an IterationStats, which fails with the error raised by func if there is one
+    """
+    if budget_ms <= 0:
+        raise RuntimeError("budget_ms must be positive")
+    future = Future()
+    _Iteration(iter(iterable), func, budget_ms, future).schedule()
+    return future
+
+class IterationStats(object):
+    """How an iteration was split up"""
+
+    def __init__(self):
+        # The number of items processed
+        self.count = 0
+        # The duration of each slice, in milliseconds
+        self.slices = []
+
+    @property
+    def max_slice(self):
+        """The duration of the longest slice, in milliseconds"""
+        return max(self.slices or [0])
+
+    @property
+    def total(self):
+        """The time spent processing the items, in milliseconds"""
+        return sum(self.slices)
+
+class _Iteration(object):
+
+    def __init__(self, iterator, func, budget_ms, future):
+        self.iterator = iterator
+        self.func = func
+        self.budget = budget_ms * 1000000
+        self.future = future
+        self.stats = IterationStats()
+        self._slice_handler = NullDoneHandler(self._slice)
+
+    def schedule(self):
+        # Straight to the event loop rather than the microtask queue, which could run the next slice in the same task
+        _java_vertx().runOnContext(self._slice_handler)
+
+    def _slice(self):
+        next_item = self.iterator.next
+        func = self.func
+        nano_time = java.lang.System.nanoTime
+        start = nano_time()
+        deadline = start + self.budget
+        count = 0
+        finished = False
+        try:
+            try:
+                while True:
+                    try:
+                        item = next_item()
+                    except StopIteration:
+                        finished = True
+                        break
+                    func(item)
+                    count += 1
+                    if nano_time() >= deadline:
+                        break
+            finally:
+                self.stats.count += count
+                self.stats.slices.append((nano_time() - start) / 1000000.0)
+        except (Exception, java.lang.Throwable), e:
+            self.future.fail(e)
+            return
+        if finished:
+            self.future.complete(self.stats)
+        else:
+            self.schedule()
+
+def _java_vertx():
+    return org.vertx.java.platform.impl.JythonVerticleFactory.vertx
@@ -0,0 +1,172 @@
+# Copyright 2011 the original author or authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Sequential style asynchronous code.
+
+A coroutine is a generator function which yields a Future each time it needs to wait for an
+asynchronous operation. The coroutine is resumed on its own context when the future completes,
+with the yield evaluating to the result or raising the error:
+
+    @vertx.coroutine
+    def handle(req):
+        buf = yield fs.read_file_as_buffer("data.txt")
+        reply = yield call_value(EventBus.send, "lookup", buf.to_string())
+        yield sleep(100)
+        req.response.end(reply.body)
+
+Asynchronous methods of the API return a Future when their handler is left out, call and call_value
+do the same for any other function taking a handler.
+
+Calling a coroutine starts it straight away and returns a Future of its result, so coroutines can
+yield each other. Yielding a list of futures waits for all of them and evaluates to a list of their
+results. Generators can't return values, raise Return(value) instead.
+"""
+
+import traceback
+import types
+import java.lang.Throwable
+import org.vertx.java.platform.impl.JythonVerticleFactory
+
+from core.future import Future
+from core.handlers import NullDoneHandler, TimerHandler
+
+class Return(Exception):
+    """Raised to finish a coroutine with a result"""
+    def __init__(self, value=None):
+        Exception.__init__(self, value)
+        self.value = value
+
+class CoroutineError(Exception):
+    """Raised inside a coroutine when a future it yielded failed with an error which isn't an exception"""
+    def __init__(self, error):
+        Exception.__init__(self, error)
+        self.error = error
+
+def coroutine(func):
+    """Decorator which turns a generator function into a coroutine"""
+    def start(*args, **kwargs):
+        future = Future()
+        try:
+            gen = func(*args, **kwargs)
+        except Return, e:
+            future.complete(e.value)
+            return future
+        except (Exception, java.lang.Throwable), e:
+            _fail(future, func, e)
+            return future
+        if isinstance(gen, types.GeneratorType):
+            _Coroutine(func, gen, future).step(None, None)
+        else:
+            # Not a generator after all, there's nothing to wait for
+            future.complete(gen)
+        return future
+    start.__name__ = func.__name__
+    start.__doc__ = func.__doc__
+    return start
+
+def call(func, *args, **kwargs):
+    """Call an asynchronous function which takes a handler(error, result) as its last argument
+
+    @return: a Future of the result
+    """
+    future = Future()
+    func(*(args + (future.handler,)), **kwargs)
+    return future
+
+def call_value(func, *args, **kwargs):
+    """Call an asynchronous function which takes a handler(value) as its last argument, such as
+    EventBus.send or HttpClient.get_now
+
+    @return: a Future of the value
+    """
+    future = Future()
+    func(*(args + (future.value_handler,)), **kwargs)
+    return future
+
+def sleep(delay):
+    """Wait for a delay
+
+    Keyword arguments:
+    @param delay: the delay, in milliseconds
+    @return: a Future which completes once the delay has passed
+    """
+    future = Future()
+    _java_vertx().setTimer(delay, TimerHandler(future.value_handler))
+    return future
+
+class _Coroutine(object):
+    """Steps a coroutine's generator, resuming it each time a future it yielded completes"""
+
+    def __init__(self, func, gen, future):
+        self.func = func
+        self.gen = gen
+        self.future = future
+        # Bound once and reused for every future the coroutine waits on. Futures run their handlers on the
+        # context they were created on, normally the coroutine's own
+        self.resume = self.step
+
+    def step(self, error, value):
+        gen = self.gen
+        # Futures which have already completed are consumed in this loop rather than recursively
+        while True:
+            try:
+                if error is None:
+                    yielded = gen.send(value)
+                else:
+                    yielded = gen.throw(_exception(error))
+            except StopIteration:
+                self.future.complete(None)
+                return
+            except Return, e:
+                self.future.complete(e.value)
+                return
+            except (Exception, java.lang.Throwable), e:
+                _fail(self.future, self.func, e)
+                return
+            if isinstance(yielded, (list, tuple)):
+                yielded = Future.all(yielded)
+            if not isinstance(yielded, Future):
+                error, value = TypeError("A coroutine can only yield a Future, not %r" % (yielded,)), None
+            elif yielded.done:
+                error, value = yielded.error, yielded.result
+            else:
+                yielded.on_complete(self.resume)
+                return
+
+def _exception(error):
+    if isinstance(error, (Exception, java.lang.Throwable)):
+        return error
+    return CoroutineError(error)
+
+def _fail(future, func, error):
+    trace = traceback.format_exc()
+    future.fail(error)
+    if not future._observed:
+        # Nothing may ever look at the future, e.g. when a coroutine is a request handler, so log
+        # the error unless a handler is added before the context gets round to checking
+        def check():
+            if not future._observed:
+                _logger().error("Unhandled error in coroutine %s: %s\n%s" % (func.__name__, error, trace))
+        context = _java_vertx().currentContext()
+        if context is None:
+            check()
+        else:
+            context.runOnContext(NullDoneHandler(check))
+
+def _java_vertx():
+    return org.vertx.java.platform.impl.JythonVerticleFactory.vertx
+
+def _logger():
+    return org.vertx.java.platform.impl.JythonVerticleFactory.container.logger()
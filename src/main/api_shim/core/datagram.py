@@ -22,7 +22,7 @@ __email__ = 'nmaurer@redhat.com'
 import org.vertx.java.core.Handler
 
 from core.streams import ReadSupport, DrainSupport, ExceptionSupport
-from core.handlers import AsyncHandler, CloseHandler
+from core.handlers import AsyncHandler, CloseHandler, cached
 from core.buffer import Buffer
 from core.network_support import NetworkSupport
 
@@ -127,7 +127,7 @@ class DatagramSocket(ReadSupport, DrainSupport, ExceptionSupport,  NetworkSuppor
 
         @param handler: the function to notify once the operation completes
         """
-        self.java_obj.close(CloseHandler(handler))
+        self.java_obj.close(cached(CloseHandler, handler))
 
     @property
     def local_address(self):
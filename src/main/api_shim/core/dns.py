@@ -14,7 +14,8 @@
 
 import org.vertx.java.platform.impl.JythonVerticleFactory
 
-from core.handlers import AsyncHandler
+from core.handlers import AsyncHandler, cached
+from core.future import returns_future
 from java.net import InetSocketAddress
 from java.util import ArrayList
 
@@ -29,6 +30,7 @@ class DnsClient():
 
         self.java_obj = org.vertx.java.platform.impl.JythonVerticleFactory.createDnsClient(addresses)
 
+    @returns_future()
     def lookup(self, name, handler):
         """Try to lookup the A (ipv4) or AAAA (ipv6) record for the given name. The first found will be used.
 
@@ -40,6 +42,7 @@ class DnsClient():
         self.java_obj.lookup(name, AsyncHandler(handler, self.__address_converter))
         return self
 
+    @returns_future()
     def lookup_4(self, name, handler):
         """Try to lookup the A (ipv4) record for the given name.
 
@@ -51,6 +54,7 @@ class DnsClient():
         self.java_obj.lookup4(name, AsyncHandler(handler, self.__address_converter))
         return self
 
+    @returns_future()
     def lookup_6(self, name, handler):
         """Try to lookup the AAAA (ipv6) record for the given name.
 
@@ -62,6 +66,7 @@ class DnsClient():
         self.java_obj.lookup6(name, AsyncHandler(handler, self.__address_converter))
         return self
 
+    @returns_future()
     def resolve_a(self, name, handler):
         """Try to resolve all A records for the given name. The handler will get notified with an array hold them.
 
@@ -73,6 +78,7 @@ class DnsClient():
         self.java_obj.resolveA(name, AsyncHandler(handler, self.__address_array_converter))
         return self
 
+    @returns_future()
     def resolve_aaaa(self, name, handler):
         """Try to resolve all AAAA records for the given name. The handler will get notified with an array hold them.
 
@@ -84,6 +90,7 @@ class DnsClient():
         self.java_obj.resolveAAAA(name, AsyncHandler(handler, self.__address_array_converter))
         return self
 
+    @returns_future()
     def resolve_cname(self, name, handler):
         """Try to resolve all CNAME records for the given name. The handler will get notified with an array hold them.
 
@@ -92,9 +99,10 @@ class DnsClient():
         @param handler: The handler to notify once the response was received or a failure was detected
         @return:        Itself for method-chaining.
         """
-        self.java_obj.resolveCNAME(name, AsyncHandler(handler))
+        self.java_obj.resolveCNAME(name, cached(AsyncHandler, handler))
         return self
 
+    @returns_future()
     def resolve_txt(self, name, handler):
         """Try to resolve all TXT records for the given name. The handler will get notified with an array hold them.
 
@@ -103,9 +111,10 @@ class DnsClient():
         @param handler: The handler to notify once the response was received or a failure was detected
         @return:        Itself for method-chaining.
         """
-        self.java_obj.resolveTXT(name, AsyncHandler(handler))
+        self.java_obj.resolveTXT(name, cached(AsyncHandler, handler))
         return self
 
+    @returns_future()
     def resolve_mx(self, name, handler):
         """Try to resolve all MX records for the given name. The handler will get notified with an array hold them.
         The MxRecord's are sorted based on their priority
@@ -124,6 +133,7 @@ class DnsClient():
         self.java_obj.resolveMX(name, AsyncHandler(handler, converter))
         return self
 
+    @returns_future()
     def resolve_ptr(self, name, handler):
         """Try to resolve the PTR record for the given name.
 
@@ -132,9 +142,10 @@ class DnsClient():
         @param handler: The handler to notify once the response was received or a failure was detected
         @return:        Itself for method-chaining.
         """
-        self.java_obj.resolvePTR(name, AsyncHandler(handler))
+        self.java_obj.resolvePTR(name, cached(AsyncHandler, handler))
         return self
 
+    @returns_future()
     def resolve_ns(self, name, handler):
         """Try to resolve all NS records for the given name. The handler will get notified with an array hold them.
 
@@ -143,9 +154,10 @@ class DnsClient():
         @param handler: The handler to notify once the response was received or a failure was detected
         @return:        Itself for method-chaining.
         """
-        self.java_obj.resolveNS(name, AsyncHandler(handler))
+        self.java_obj.resolveNS(name, cached(AsyncHandler, handler))
         return self
 
+    @returns_future()
     def resolve_srv(self, name, handler):
         """Try to resolve all SRV records for the given name. The handler will get notified with an array hold them.
         The SrvRecord's are sorted based on their priority
@@ -164,6 +176,7 @@ class DnsClient():
         self.java_obj.resolveSRV(name, AsyncHandler(handler, converter))
         return self
 
+    @returns_future()
     def reverse_lookup(self, ip, handler):
         """ Try to do a reverse lookup of an ipaddress. This is basically the same as doing trying to resolve a PTR record
         but allows you to just pass in the ipaddress and not a valid ptr query string.
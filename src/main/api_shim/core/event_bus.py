@@ -17,8 +17,13 @@ import org.vertx.java.core.Handler
 import org.vertx.java.core.AsyncResultHandler
 import org.vertx.java.core.eventbus.ReplyException
 import java.util.UUID
+import java.util.ArrayList
+import java.lang.System
 
-from core.javautils import map_to_vertx, map_from_vertx
+from bisect import bisect_left
+from core.handlers import NullDoneHandler
+from core.future import returns_future
+from core.javautils import map_to_vertx, map_from_vertx, view_from_vertx
 
 __author__ = "Scott Horn"
 __email__ = "scott@hornmicro.com"
@@ -43,6 +48,9 @@ class EventBus(object):
     has been received.
     """
     handler_dict = {}
+    # Ids of the handlers registered from each context, and the context of each handler
+    _context_handlers = {}
+    _handler_contexts = {}
 
     @staticmethod
     def send(address, message, reply_handler=None):
@@ -50,22 +58,26 @@ class EventBus(object):
 
         Keyword arguments:
         @param address: the address to send to
-        @param message: The message to send
+        @param message: The message to send. A received Message, or a view of its body, is forwarded as is
+        without being converted, unless the body of the Message was changed
         @param reply_handler: An optional reply handler.
         It will be called when the reply from a receiver is received.
         """
         EventBus.send_or_pub(True, address, message, None, reply_handler)
 
     @staticmethod
+    @returns_future("reply_handler")
     def send_with_timeout(address, message, timeout, reply_handler):
         """Send a message on the event bus with a reply timeout
 
         Keyword arguments:
         @param address: the address to send to
-        @param message: The message to send
+        @param message: The message to send. A received Message, or a view of its body, is forwarded as is
+        without being converted, unless the body of the Message was changed
         @param timeout: A reply timeout
-        @param reply_handler: An optional reply handler.
-        It will be called when the reply from a receiver is received.
+        @param reply_handler: A reply handler taking (error, reply).
+        It will be called when the reply from a receiver is received. If it is left out a Future of the reply
+        is returned instead.
         """
         EventBus.send_or_pub(True, address, message, timeout, reply_handler)
 
@@ -75,10 +87,57 @@ class EventBus(object):
 
         Keyword arguments:
         @param address: the address to publish to
-        @param message: The message to publish
+        @param message: The message to publish. A received Message, or a view of its body, is forwarded as is
+        without being converted, unless the body of the Message was changed
         """
         EventBus.send_or_pub(False, address, message)
 
+    @staticmethod
+    def send_batch(address, messages):
+        """Send a batch of messages to an address on the event bus.
+        This is equivalent to calling send for each message, but much cheaper for large batches.
+
+        Keyword arguments:
+        @param address: the address to send to
+        @param messages: an iterable of messages to send
+        """
+        org.vertx.java.platform.impl.JythonVerticleFactory.sendBatch(EventBus._check_address(address),
+                                                                     EventBus.convert_msgs(messages))
+
+    @staticmethod
+    def publish_batch(address, messages):
+        """Publish a batch of messages to an address on the event bus.
+        This is equivalent to calling publish for each message, but much cheaper for large batches.
+
+        Keyword arguments:
+        @param address: the address to publish to
+        @param messages: an iterable of messages to publish
+        """
+        org.vertx.java.platform.impl.JythonVerticleFactory.publishBatch(EventBus._check_address(address),
+                                                                        EventBus.convert_msgs(messages))
+
+    @staticmethod
+    def send_to_all(addresses, message):
+        """Send a message to each of several addresses on the event bus. The message is only converted once.
+
+        Keyword arguments:
+        @param addresses: an iterable of addresses to send to
+        @param message: the message to send
+        """
+        org.vertx.java.platform.impl.JythonVerticleFactory.sendToAll(EventBus._check_addresses(addresses),
+                                                                     EventBus._convert_checked_msg(message))
+
+    @staticmethod
+    def publish_to_all(addresses, message):
+        """Publish a message to each of several addresses on the event bus. The message is only converted once.
+
+        Keyword arguments:
+        @param addresses: an iterable of addresses to publish to
+        @param message: the message to publish
+        """
+        org.vertx.java.platform.impl.JythonVerticleFactory.publishToAll(EventBus._check_addresses(addresses),
+                                                                        EventBus._convert_checked_msg(message))
+
     @staticmethod
     def send_or_pub(send, address, message, timeout=None, reply_handler=None):
         if not address:
@@ -117,7 +176,7 @@ class EventBus(object):
         else:
             EventBus.java_eventbus().registerHandler(address, internal)
         id = java.util.UUID.randomUUID().toString()
-        EventBus.handler_dict[id] = address, internal
+        EventBus._add_handler(id, address, internal)
         return id
 
     @staticmethod
@@ -152,7 +211,7 @@ class EventBus(object):
             EventBus.java_eventbus().registerLocalHandler(id, internal)
         else:
             EventBus.java_eventbus().registerHandler(id, internal)
-        EventBus.handler_dict[id] = id, internal
+        EventBus._add_handler(id, id, internal)
         return id
 
     @staticmethod
@@ -163,16 +222,122 @@ class EventBus(object):
         @param handler_id: the id of the handler to unregister. Returned from EventBus.register_handler
         """
         [address, handler] = EventBus.handler_dict.pop(handler_id)
+        EventBus._remove_owner(handler_id)
         EventBus.java_eventbus().unregisterHandler(address, handler)
 
+    @staticmethod
+    def discard_handler(handler_id):
+        """Unregisters a handler if it is still registered
+
+        Keyword arguments:
+        @param handler_id: the id of the handler to unregister. Returned from EventBus.register_handler
+
+        @return: True if the handler was registered
+        """
+        entry = EventBus.handler_dict.pop(handler_id, None)
+        if entry is None:
+            return False
+        EventBus._remove_owner(handler_id)
+        EventBus.java_eventbus().unregisterHandler(entry[0], entry[1])
+        return True
+
+    @staticmethod
+    def unregister_context_handlers(context=None):
+        """Unregisters all handlers registered from a context. This is called automatically when a verticle is
+        stopped, so handlers never outlive the verticle that registered them.
+
+        Keyword arguments:
+        @param context: the Java context, defaults to the current context
+
+        @return: the number of handlers unregistered
+        """
+        if context is None:
+            context = EventBus.java_vertx().currentContext()
+        ids = EventBus._context_handlers.pop(context, None)
+        if ids is None:
+            return 0
+        count = 0
+        for handler_id in ids:
+            EventBus._handler_contexts.pop(handler_id, None)
+            entry = EventBus.handler_dict.pop(handler_id, None)
+            if entry is not None:
+                EventBus.java_eventbus().unregisterHandler(entry[0], entry[1])
+                count += 1
+        return count
+
+    @staticmethod
+    def registry_size():
+        """Returns the number of handlers currently registered through EventBus"""
+        return len(EventBus.handler_dict)
+
+    @staticmethod
+    def _add_handler(id, address, internal):
+        EventBus.handler_dict[id] = address, internal
+        # Remember which context registered the handler so it can be cleaned up when the verticle stops
+        context = EventBus.java_vertx().currentContext()
+        if context is not None:
+            EventBus._handler_contexts[id] = context
+            EventBus._context_handlers.setdefault(context, {})[id] = True
+
+    @staticmethod
+    def _remove_owner(handler_id):
+        context = EventBus._handler_contexts.pop(handler_id, None)
+        if context is not None:
+            ids = EventBus._context_handlers.get(context)
+            if ids is not None:
+                ids.pop(handler_id, None)
+                if not ids:
+                    EventBus._context_handlers.pop(context, None)
+
     @staticmethod
     def convert_msg(message):
+        if isinstance(message, Message):
+            return message._to_vertx()
         return map_to_vertx(message)
 
+    @staticmethod
+    def convert_msgs(messages):
+        """Convert an iterable of messages to a Java list of Vert.x messages in a single pass"""
+        result = java.util.ArrayList()
+        add = result.add
+        convert = EventBus.convert_msg
+        for message in messages:
+            if message is None:
+                raise RuntimeError("A message must be specified")
+            add(convert(message))
+        return result
+
+    @staticmethod
+    def _convert_checked_msg(message):
+        if message is None:
+            raise RuntimeError("A message must be specified")
+        return EventBus.convert_msg(message)
+
+    @staticmethod
+    def _check_address(address):
+        if not address:
+            raise RuntimeError("An address must be specified")
+        return address
+
+    @staticmethod
+    def _check_addresses(addresses):
+        result = java.util.ArrayList()
+        for address in addresses:
+            result.add(EventBus._check_address(address))
+        return result
+
     @staticmethod
     def java_eventbus():
         return org.vertx.java.platform.impl.JythonVerticleFactory.vertx.eventBus()
 
+    @staticmethod
+    def java_vertx():
+        return org.vertx.java.platform.impl.JythonVerticleFactory.vertx
+
+def release_context(context):
+    """Unregister the handlers of a context whose verticle has stopped"""
+    EventBus.unregister_context_handlers(context)
+
 # Allow the event bus reply timeout to be set directly as
 # a property of the event bus.
 EventBus.default_reply_timeout = property(lambda: EventBus.java_eventbus().getDefaultReplyTimeout(), lambda x: EventBus.java_eventbus().setDefaultReplyTimeout(x))
@@ -198,19 +363,55 @@ class Message(object):
     """Represents a message received from the event bus"""
     def __init__(self, message):
         self.java_obj = message
-        self.body = map_from_vertx(message.body())
+        self._body = None
+        self._body_converted = False
+        self._body_replaced = False
+        self._body_view = None
+
+    def get_body(self):
+        """The body of the message. It is converted to Python types the first time it is accessed."""
+        if not self._body_converted:
+            self._body = map_from_vertx(self.java_obj.body())
+            self._body_converted = True
+        return self._body
+
+    def set_body(self, body):
+        self._body = body
+        self._body_converted = True
+        self._body_replaced = True
+
+    body = property(get_body, set_body)
+
+    @property
+    def body_view(self):
+        """A read-only view of the body. JSON objects and arrays are returned as dict and list like views which
+        only convert the fields that are actually read, use to_dict() or to_list() on them for a full copy.
+        Other bodies are the same as body.
+        """
+        if self._body_view is None:
+            self._body_view = view_from_vertx(self.java_obj.body())
+        return self._body_view
 
     @property
     def address(self):
         return self.java_obj.address()
 
+    def _to_vertx(self):
+        """The body to send when this message is forwarded"""
+        if not self._body_converted or (not self._body_replaced and not isinstance(self._body, (dict, list))):
+            # The original body, there's no need to convert it to Python and back
+            return self.java_obj.body()
+        # The body was replaced, or could have been changed in place
+        return map_to_vertx(self._body)
+
     def reply(self, reply, handler=None):
         """Reply to this message. If the message was sent specifying a receipt handler, that handler will be
         called when it has received a reply. If the message wasn't sent specifying a receipt handler
         this method does nothing.
 
         Keyword arguments:
-        @param reply: message to send as reply
+        @param reply: message to send as reply. A received Message, or a view of its body, is forwarded as is
+        without being converted, unless the body of the Message was changed
         @param handler: the reply handler 
         """
         reply = EventBus.convert_msg(reply)
@@ -224,6 +425,7 @@ class ReplyError(Exception):
     TIMEOUT = 0
     NO_HANDLERS = 1
     RECIPIENT_FAILURE = 2
+    REJECTED = 3
 
     def __init__(self, exception):
         self.exception = exception
@@ -231,3 +433,161 @@ class ReplyError(Exception):
     @property
     def type(self):
         return self.exception.failureType().toInt()
+
+
+class RequestRejectedError(ReplyError):
+    """The error a RequestTracker passes to reply handlers when a request is
+    rejected because too many requests are already waiting for replies."""
+    def __init__(self, address):
+        ReplyError.__init__(self, None)
+        self.address = address
+
+    @property
+    def type(self):
+        return ReplyError.REJECTED
+
+class RequestTracker(object):
+    """Sends requests on the event bus and tracks them until their replies arrive.
+
+    Every request is sent with a reply timeout, either the one given for the
+    request, the one set for its address with set_timeout or the tracker's
+    default, so a reply handler never waits for ever. The number of requests
+    waiting for a reply is bounded: once max_pending requests (or
+    max_pending_per_address to a single address) are in flight new requests
+    fail fast with a RequestRejectedError instead of being sent.
+
+    Per address statistics, including the number of requests in flight and a
+    histogram of reply latencies, are available from stats. Statistics are
+    kept for up to max_addresses addresses, beyond that those of the addresses
+    least recently sent to which have nothing in flight are dropped.
+
+    A tracker is meant to be used from a single verticle, it isn't thread safe.
+    """
+
+    def __init__(self, default_timeout=30000, max_pending=10000, max_pending_per_address=None, max_addresses=1000):
+        self.default_timeout = default_timeout
+        self.max_pending = max_pending
+        self.max_pending_per_address = max_pending_per_address
+        self.max_addresses = max_addresses
+        self.pending = 0
+        self._sends = 0
+        self.timeouts = {}
+        self.address_stats = {}
+
+    def set_timeout(self, address, timeout):
+        """Set the reply timeout for requests sent to an address.
+
+        Keyword arguments:
+        @param address: the address
+        @param timeout: the reply timeout in milliseconds
+
+        @return: self
+        """
+        self.timeouts[address] = timeout
+        return self
+
+    def send(self, address, message, reply_handler, timeout=None):
+        """Send a request.
+
+        Keyword arguments:
+        @param address: the address to send to
+        @param message: the message to send
+        @param reply_handler: called with (error, message) when the reply arrives, the request times out or the
+        request is rejected
+        @param timeout: reply timeout in milliseconds, overriding the timeout for the address
+
+        @return: True if the request was sent, False if it was rejected
+        """
+        if reply_handler is None:
+            raise RuntimeError("A reply handler is required")
+        stats = self.stats(address)
+        if self.pending >= self.max_pending or \
+                (self.max_pending_per_address is not None and stats.in_flight >= self.max_pending_per_address):
+            stats.rejected += 1
+            def reject():
+                reply_handler(RequestRejectedError(address), None)
+            EventBus.java_vertx().runOnContext(NullDoneHandler(reject))
+            return False
+        if timeout is None:
+            timeout = self.timeouts.get(address, self.default_timeout)
+        self._sends += 1
+        stats.last_sent = self._sends
+        start = java.lang.System.nanoTime()
+        def handler(error, reply):
+            self.pending -= 1
+            stats.in_flight -= 1
+            stats.record(error, (java.lang.System.nanoTime() - start) / 1000000.0)
+            reply_handler(error, reply)
+        EventBus.send_with_timeout(address, message, timeout, handler)
+        self.pending += 1
+        stats.in_flight += 1
+        stats.sent += 1
+        return True
+
+    def stats(self, address):
+        """Return the RequestStats for an address"""
+        stats = self.address_stats.get(address)
+        if stats is None:
+            if len(self.address_stats) >= self.max_addresses:
+                self._prune()
+            stats = self.address_stats[address] = RequestStats(address)
+        return stats
+
+    def _prune(self):
+        # Drop down to three quarters of the limit so pruning doesn't happen for every new address. Addresses
+        # with requests in flight are kept, their counts are needed for max_pending_per_address.
+        idle = [(stats.last_sent, address) for address, stats in self.address_stats.iteritems()
+                if stats.in_flight == 0]
+        idle.sort()
+        excess = len(self.address_stats) - self.max_addresses * 3 / 4
+        for last_sent, address in idle[:excess]:
+            del self.address_stats[address]
+
+    @property
+    def addresses(self):
+        """The addresses requests have been sent to"""
+        return self.address_stats.keys()
+
+class RequestStats(object):
+    """Statistics for the requests a RequestTracker has sent to an address."""
+
+    # Upper bounds, in milliseconds, of the latency histogram buckets. The last bucket counts anything slower.
+    LATENCY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)
+
+    def __init__(self, address):
+        self.address = address
+        self.in_flight = 0
+        self.sent = 0
+        self.replied = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.rejected = 0
+        # When the tracker last sent a request to the address, for pruning
+        self.last_sent = 0
+        self.total_latency = 0.0
+        self.latency_counts = [0] * (len(self.LATENCY_BUCKETS) + 1)
+
+    def record(self, error, latency):
+        """Record the outcome of a request which took latency milliseconds"""
+        if error is None:
+            self.replied += 1
+        elif error.type == ReplyError.TIMEOUT:
+            self.timed_out += 1
+        else:
+            self.failed += 1
+        self.total_latency += latency
+        self.latency_counts[bisect_left(self.LATENCY_BUCKETS, latency)] += 1
+
+    @property
+    def histogram(self):
+        """The latency histogram as a list of (upper bound in milliseconds, count) tuples. The upper bound of the
+        last bucket is None."""
+        return zip(self.LATENCY_BUCKETS + (None,), self.latency_counts)
+
+    @property
+    def mean_latency(self):
+        """The mean latency in milliseconds of the requests that have completed"""
+        completed = self.replied + self.failed + self.timed_out
+        if completed == 0:
+            return None
+        return self.total_latency / completed
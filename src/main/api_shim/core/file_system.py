@@ -18,7 +18,8 @@ import org.vertx.java.core.AsyncResultHandler
 import org.vertx.java.platform.impl.JythonVerticleFactory
 
 from core.buffer import Buffer
-from core.handlers import AsyncHandler
+from core.handlers import AsyncHandler, cached
+from core.future import returns_future
 
 __author__ = "Scott Horn"
 __email__ = "scott@hornmicro.com"
@@ -99,13 +100,15 @@ class AsyncFile(core.streams.ReadStream, core.streams.WriteStream):
     def __init__(self, java_obj):
         self.java_obj = java_obj
 
+    @returns_future()
     def close(self, handler=None):
         if (handler is None):
             self.java_obj.close()
         else:
-            self.java_obj.close(AsyncHandler(handler))
+            self.java_obj.close(cached(AsyncHandler, handler))
 
 
+    @returns_future()
     def write_at_pos(self, buf, position, handler):
         """Write a Buffer to the file, asynchronously.
         When multiple writes are invoked on the same file
@@ -117,9 +120,10 @@ class AsyncFile(core.streams.ReadStream, core.streams.WriteStream):
         starts with zero at the beginning of the file.
         """
 
-        self.java_obj.write(buf._to_java_buffer(), position, AsyncHandler(handler))
+        self.java_obj.write(buf._to_java_buffer(), position, cached(AsyncHandler, handler))
         return self
 
+    @returns_future()
     def read_at_pos(self, buf, offset, position, length, handler):
         """Reads some data from a file into a buffer, asynchronously.
         When multiple reads are invoked on the same file
@@ -136,6 +140,7 @@ class AsyncFile(core.streams.ReadStream, core.streams.WriteStream):
         self.java_obj.read(buf._to_java_buffer(), offset, position, length, AsyncHandler(handler, converter))
         return self
 
+    @returns_future()
     def flush(self, handler=None):
         """Flush any writes made to this file to underlying persistent storage, asynchronously.
         If the file was opened with flush set to true then calling this method will have no effect.
@@ -144,9 +149,9 @@ class AsyncFile(core.streams.ReadStream, core.streams.WriteStream):
         @param handler: the handler which is called on completion.
         """
         if handler is None:
-            Future(self.java_obj.flush())
+            self.java_obj.flush()
         else:
-            Future(self.java_obj.flush(AsyncHandler(handler)))
+            self.java_obj.flush(cached(AsyncHandler, handler))
         return self
 
 
@@ -157,13 +162,15 @@ class FileSystem(object):
     called when the operation completes or an error occurs. The handler is called
     with two arguments; the first an exception, this will be None if the operation has
     succeeded. The second is the result - this will be None if the operation failed or
-    there was no result to return.
+    there was no result to return. If the handler is a Future, or a required handler is left out, the
+    operation returns a Future instead.
     The synchronous versions return the results, or throw exceptions directly."""
 
     def __init__(self):
         self.java_obj = org.vertx.java.platform.impl.JythonVerticleFactory.vertx.fileSystem()
 
 
+    @returns_future()
     def copy(self, frm, to, handler):
         """Copy a file, asynchronously. The copy will fail if from does not exist, or if to already exists.
 
@@ -171,7 +178,7 @@ class FileSystem(object):
         @param frm: path of file to copy
         @param to: path of file to copy to
         @param handler: the handler which is called on completion."""
-        self.java_obj.copy(frm, to, AsyncHandler(handler))
+        self.java_obj.copy(frm, to, cached(AsyncHandler, handler))
         return self
 
     def copy_sync(self, frm, to):
@@ -179,6 +186,7 @@ class FileSystem(object):
         self.java_obj.copySync(frm, to)
         return self
 
+    @returns_future()
     def copy_recursive(self, frm, to, handler):
         """Copy a file recursively, asynchronously. The copy will fail if from does not exist, or if to already exists and is not empty.
         If the source is a directory all contents of the directory will be copied recursively, i.e. the entire directory
@@ -189,7 +197,7 @@ class FileSystem(object):
         @param to: path of file to copy to
         @param handler: the function to call when complete
         """
-        self.java_obj.copy(frm, to, True, AsyncHandler(handler))
+        self.java_obj.copy(frm, to, True, cached(AsyncHandler, handler))
         return self
 
     def copy_recursive_sync(self, frm, to):
@@ -197,6 +205,7 @@ class FileSystem(object):
         self.copySync(frm, to, True)
         return self
 
+    @returns_future()
     def move(self, frm, to, handler):
         """Move a file, asynchronously. The move will fail if from does not exist, or if to already exists.
 
@@ -205,7 +214,7 @@ class FileSystem(object):
         @param to: Path of file to move to
         @param handler: the function to call when complete
         """
-        self.java_obj.move(frm, to, AsyncHandler(handler))
+        self.java_obj.move(frm, to, cached(AsyncHandler, handler))
         return self
 
     def move_sync(self, frm, to):
@@ -213,6 +222,7 @@ class FileSystem(object):
         self.java_obj.moveSync(frm, to)
         return self
 
+    @returns_future()
     def truncate(self, path, len, handler):
         """Truncate a file, asynchronously. The move will fail if path does not exist.
 
@@ -221,7 +231,7 @@ class FileSystem(object):
         @param len: Length to truncate file to. Will fail if len < 0. If len > file size then will do nothing.
         @param handler: the function to call when complete
         """
-        self.java_obj.truncate(path, len, AsyncHandler(handler))
+        self.java_obj.truncate(path, len, cached(AsyncHandler, handler))
         return self
 
     def truncate_sync(self, path, len):
@@ -229,6 +239,7 @@ class FileSystem(object):
         self.java_obj.truncateSync(path, len)
         return self
 
+    @returns_future()
     def chown(self, path, user, group, handler=None):
         """Change the ownership on a file, asynchronously.
 
@@ -238,7 +249,7 @@ class FileSystem(object):
         @param group: the group to which to change
         @param handler: the function to call when complete
         """
-        self.java_obj.chown(path, user, group, AsyncHandler(handler))
+        self.java_obj.chown(path, user, group, cached(AsyncHandler, handler))
         return self
 
     def chown_sync(self, path, user, group):
@@ -246,6 +257,7 @@ class FileSystem(object):
         self.java_obj.chownSync(path, user, group)
         return self
 
+    @returns_future()
     def chmod(self, path, perms, dir_perms=None, handler=None):
         """Change the permissions on a file, asynchronously. If the file is directory then all contents will also have their permissions changed recursively.
 
@@ -256,7 +268,7 @@ class FileSystem(object):
         @param dir_perms: a permission string of the form rwxr-x---. Used to set permissions for regular files.
         @param handler: the function to call when complete
         """
-        self.java_obj.chmod(path, perms, dir_perms, AsyncHandler(handler))
+        self.java_obj.chmod(path, perms, dir_perms, cached(AsyncHandler, handler))
         return self
 
     def chmod_sync(self, path, perms, dir_perms=None):
@@ -264,6 +276,7 @@ class FileSystem(object):
         self.java_obj.chmodSync(path, perms, dir_perms)
         return self
 
+    @returns_future()
     def props(self, path, handler):
         """Get file properties for a file, asynchronously.
 
@@ -282,6 +295,7 @@ class FileSystem(object):
         java_obj = self.java_obj.propsSync(path)
         return FileProps(java_obj)
 
+    @returns_future()
     def lprops(self, path, handler):
         """Obtain properties for the link represented by {@code path}, asynchronously.
         The link will not be followed..
@@ -302,6 +316,7 @@ class FileSystem(object):
         return FileProps(java_obj)
 
 
+    @returns_future()
     def link(self, link, existing, handler):
         """Create a hard link, asynchronously..
 
@@ -310,7 +325,7 @@ class FileSystem(object):
         @param existing: path of where the link points to.
         @param handler: the function to call when complete
         """
-        self.java_obj.link(link, existing, AsyncHandler(handler))
+        self.java_obj.link(link, existing, cached(AsyncHandler, handler))
         return self
 
     def link_sync(self, link, existing):
@@ -318,6 +333,7 @@ class FileSystem(object):
         self.java_obj.linkSync(link, existing)
         return self
 
+    @returns_future()
     def symlink(self, link, existing, handler):
         """Create a symbolic link, asynchronously.
 
@@ -326,7 +342,7 @@ class FileSystem(object):
         @param existing: Path of where the link points to.
         @param handler: the function to call when complete
         """
-        self.java_obj.symlink(link, existing, AsyncHandler(handler))
+        self.java_obj.symlink(link, existing, cached(AsyncHandler, handler))
         return self
 
     def symlink_sync(self, link, existing):
@@ -334,13 +350,14 @@ class FileSystem(object):
         self.java_obj.symlinkSync(link, existing)
         return self
 
+    @returns_future()
     def unlink(self, link, handler):
         """Unlink a hard link.
 
         Keyword arguments:
         @param link: path of the link to unlink.
         """
-        self.java_obj.unlink(link, AsyncHandler(handler))
+        self.java_obj.unlink(link, cached(AsyncHandler, handler))
         return self
 
     def unlinkSync(self, link):
@@ -348,6 +365,7 @@ class FileSystem(object):
         self.java_obj.unlinkSync(link)
         return self
 
+    @returns_future()
     def read_symlink(self, link, handler):
         """Read a symbolic link, asynchronously. I.e. tells you where the symbolic link points.
 
@@ -355,7 +373,7 @@ class FileSystem(object):
         @param link: path of the link to read.
         @param handler: the function to call when complete
         """
-        self.java_obj.readSymlink(link, AsyncHandler(handler))
+        self.java_obj.readSymlink(link, cached(AsyncHandler, handler))
         return self
 
     def read_symlink_sync(self, link):
@@ -363,6 +381,7 @@ class FileSystem(object):
         self.java_obj.readSymlinkSync(link)
         return self
 
+    @returns_future()
     def delete(self, path, handler):
         """Delete a file on the file system, asynchronously.
         The delete will fail if the file does not exist, or is a directory and is not empty.
@@ -371,7 +390,7 @@ class FileSystem(object):
         @param path: path of the file to delete.
         @param handler: the function to call when complete
         """
-        self.java_obj.delete(path, AsyncHandler(handler))
+        self.java_obj.delete(path, cached(AsyncHandler, handler))
         return self
 
     def delete_sync(self, path):
@@ -379,6 +398,7 @@ class FileSystem(object):
         self.java_obj.deleteSync(path)
         return self
 
+    @returns_future()
     def delete_recursive(self, path, handler):
         """Delete a file on the file system recursively, asynchronously.
         The delete will fail if the file does not exist. If the file is a directory the entire directory contents
@@ -388,7 +408,7 @@ class FileSystem(object):
         @param path: path of the file to delete.
         @param handler: the function to call when complete
         """
-        self.java_obj.delete(path, True, AsyncHandler(handler))
+        self.java_obj.delete(path, True, cached(AsyncHandler, handler))
         return self
 
     def delete_recursive_sync(self, path):
@@ -396,6 +416,7 @@ class FileSystem(object):
         self.java_obj.deleteSync(path, True)
         return self
 
+    @returns_future()
     def mkdir(self, path, perms=None, handler=None):
         """Create a directory, asynchronously.
         The create will fail if the directory already exists, or if it contains parent directories which do not already
@@ -406,7 +427,7 @@ class FileSystem(object):
         @param perms: a permission string of the form rwxr-x--- to give directory.
         @param handler: the function to call when complete
         """
-        self.java_obj.mkdir(path, perms, AsyncHandler(handler))
+        self.java_obj.mkdir(path, perms, cached(AsyncHandler, handler))
         return self
 
     def mkdir_sync(self, path, perms=None):
@@ -414,6 +435,7 @@ class FileSystem(object):
         self.java_obj.mkdirSync(path, perms)
         return self
 
+    @returns_future()
     def mkdir_with_parents(self, path, perms=None, handler=None):
         """Create a directory, and create all it's parent directories if they do not already exist, asynchronously.
         The create will fail if the directory already exists.
@@ -422,7 +444,7 @@ class FileSystem(object):
         @param path: path of the directory to create.
         @param perms: a permission string of the form rwxr-x--- to give the created directory(ies).
         """
-        self.java_obj.mkdir(path, perms, True, AsyncHandler(handler))
+        self.java_obj.mkdir(path, perms, True, cached(AsyncHandler, handler))
         return self
 
     def mkdir_with_parents_sync(self, path, perms=None):
@@ -430,6 +452,7 @@ class FileSystem(object):
         self.java_obj.mkdirSync(path, perms, True)
         return self
 
+    @returns_future()
     def read_dir(self, path, filter=None, handler=None):
         """Read a directory, i.e. list it's contents, asynchronously.
         The read will fail if the directory does not exist.
@@ -440,7 +463,7 @@ class FileSystem(object):
         then only files which match the filter will be returned.
         @param handler: the function to call when complete
         """
-        self.java_obj.readDir(path, filter, AsyncHandler(handler))
+        self.java_obj.readDir(path, filter, cached(AsyncHandler, handler))
         return self
 
     def read_dir_sync(self, path, filter=None):
@@ -448,6 +471,7 @@ class FileSystem(object):
         self.java_obj.readDirSync(path, filter)
         return self
 
+    @returns_future()
     def read_file_as_buffer(self, path, handler):
         """Read the contents of an entire file as a Buffer, asynchronously.
 
@@ -465,6 +489,7 @@ class FileSystem(object):
         self.java_obj.readFileSync(path)
         return self
 
+    @returns_future()
     def write_buffer_to_file(self, path, buffer, handler):
         """Write a  as the entire contents of a file, asynchronously.
 
@@ -473,7 +498,7 @@ class FileSystem(object):
         @param buffer: the Buffer to write
         @param handler: the function to call when complete
         """
-        self.java_obj.writeFile(path, buffer, AsyncHandler(handler))
+        self.java_obj.writeFile(path, buffer, cached(AsyncHandler, handler))
         return self
 
     def write_buffer_to_file_sync(self, path, buf):
@@ -481,6 +506,7 @@ class FileSystem(object):
         self.java_obj.writeFileSync(path, buf)
         return self
 
+    @returns_future()
     def open(self, path, perms=None, read=True, write=True, create_new=True, flush=False, handler=None):
         """Open a file on the file system, asynchronously.
 
@@ -503,6 +529,7 @@ class FileSystem(object):
         java_obj = self.java_obj.open(path, perms, read, write, create_new, flush)
         return AsyncFile(java_obj)
 
+    @returns_future()
     def create_file(self, path, perms=None, handler=None):
         """Create a new empty file, asynchronously.
 
@@ -511,7 +538,7 @@ class FileSystem(object):
         @param perms: the file will be created with these permissions.
         @param handler: the function to call when complete
         """
-        self.java_obj.createFile(path, perms, AsyncHandler(handler))
+        self.java_obj.createFile(path, perms, cached(AsyncHandler, handler))
         return self
 
     def create_file_sync(self, path, perms=None):
@@ -519,6 +546,7 @@ class FileSystem(object):
         self.java_obj.createFileSync(path, perms)
         return self
 
+    @returns_future()
     def exists(self, path, handler):
         """Check if  a file exists, asynchronously.
 
@@ -526,13 +554,14 @@ class FileSystem(object):
         @param path: Path of the file to check.
         @param handler: the function to call when complete
         """
-        self.java_obj.exists(path, AsyncHandler(handler))
+        self.java_obj.exists(path, cached(AsyncHandler, handler))
         return self
 
     def exists_sync(self, path):
         """Synchronous version of FileSystem.exists"""
         return self.java_obj.existsSync(path)
 
+    @returns_future()
     def fs_props(self, path, handler):
         """Get properties for the file system, asynchronously.
 
@@ -0,0 +1,326 @@
+# Copyright 2011 the original author or authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import java.lang.Throwable
+import java.util.concurrent.locks.ReentrantLock
+import org.vertx.java.platform.impl.JythonVerticleFactory
+
+from core.handlers import NullDoneHandler, TimerHandler
+
+class FutureTimeoutError(Exception):
+    """The error a future returned by Future.with_timeout fails with when the timeout passes first"""
+    def __init__(self, timeout):
+        Exception.__init__(self, "Timed out after %d ms" % timeout)
+        self.timeout = timeout
+
+class Future(object):
+    """The result of an asynchronous operation which may not have completed yet.
+
+    A future is completed exactly once, either with a result or with an error. Handlers added
+    with on_complete are called as handler(error, result), the same way as the handlers passed
+    to the asynchronous methods of the API, once the future completes. Handlers are always
+    scheduled on the context the future was created on, even if the future is completed on
+    another thread or has already completed when the handler is added.
+
+    Instead of taking a handler, the asynchronous methods of the API return a new future when the
+    handler is left out, or complete and return the future if one is passed as the handler.
+    """
+
+    def __init__(self):
+        self._done = False
+        self._error = None
+        self._result = None
+        self._handlers = None
+        self._observed = False
+        self._context = _java_vertx().currentContext()
+
+    @property
+    def done(self):
+        """True once the future has completed"""
+        return self._done
+
+    @property
+    def succeeded(self):
+        """True if the future has completed with a result"""
+        return self._done and self._error is None
+
+    @property
+    def failed(self):
+        """True if the future has completed with an error"""
+        return self._error is not None
+
+    @property
+    def result(self):
+        """The result, None until the future has completed"""
+        return self._result
+
+    @property
+    def error(self):
+        """The error, None unless the future has failed"""
+        return self._error
+
+    def complete(self, result=None):
+        """Complete the future with a result
+
+        Keyword arguments:
+        @param result: the result
+        """
+        self._set(None, result)
+
+    def fail(self, error):
+        """Complete the future with an error
+
+        Keyword arguments:
+        @param error: the error, this can't be None
+        """
+        if error is None:
+            raise RuntimeError("error is required")
+        self._set(error, None)
+
+    def on_complete(self, handler):
+        """Add a handler to call with (error, result) when the future completes
+
+        Keyword arguments:
+        @param handler: the handler
+        @return: self
+        """
+        _lock.lock()
+        try:
+            self._observed = True
+            done = self._done
+            if not done:
+                if self._handlers is None:
+                    self._handlers = [handler]
+                else:
+                    self._handlers.append(handler)
+        finally:
+            _lock.unlock()
+        if done:
+            self._dispatch([handler], self._error, self._result)
+        return self
+
+    @property
+    def handler(self):
+        """A function taking (error, result) which completes the future, so it can be passed as the
+        handler of any of the asynchronous methods of the API"""
+        return self._set
+
+    @property
+    def value_handler(self):
+        """A function taking a single value which completes the future with it, for handlers which are
+        only passed a value such as event bus reply handlers and timer handlers"""
+        return self.complete
+
+    def map(self, func):
+        """Transform the result of the future
+
+        Keyword arguments:
+        @param func: a function called with the result, its return value is the result of the new future
+        @return: a Future which completes with the transformed result, or fails with the error of this
+        future or the error raised by func
+        """
+        future = Future()
+        def handler(error, result):
+            if error is not None:
+                future._set(error, None)
+                return
+            try:
+                mapped = func(result)
+            except (Exception, java.lang.Throwable), e:
+                future._set(e, None)
+                return
+            future._set(None, mapped)
+        self.on_complete(handler)
+        return future
+
+    def flat_map(self, func):
+        """Chain another asynchronous operation on to the future
+
+        Keyword arguments:
+        @param func: a function called with the result which returns another Future
+        @return: a Future which completes the same way as the future returned by func, or fails with the error
+        of this future or the error raised by func
+        """
+        future = Future()
+        def handler(error, result):
+            if error is not None:
+                future._set(error, None)
+                return
+            try:
+                chained = func(result)
+            except (Exception, java.lang.Throwable), e:
+                future._set(e, None)
+                return
+            chained.on_complete(future._set)
+        self.on_complete(handler)
+        return future
+
+    def with_timeout(self, timeout):
+        """Limit how long to wait for the future
+
+        Keyword arguments:
+        @param timeout: the timeout, in milliseconds
+        @return: a Future which completes the same way as this future, or fails with a FutureTimeoutError if
+        this future hasn't completed within the timeout
+        """
+        future = Future()
+        if self._done:
+            future._set(self._error, self._result)
+            return future
+        def expired(timer_id):
+            future._try_set(FutureTimeoutError(timeout), None)
+        timer_id = _java_vertx().setTimer(timeout, TimerHandler(expired))
+        def handler(error, result):
+            if future._try_set(error, result):
+                _java_vertx().cancelTimer(timer_id)
+        self.on_complete(handler)
+        return future
+
+    @staticmethod
+    def all(futures):
+        """Wait for all of a number of futures
+
+        Keyword arguments:
+        @param futures: the futures
+        @return: a Future of the list of their results, in the same order, which fails as soon as any of the
+        futures fails
+        """
+        futures = list(futures)
+        future = Future()
+        results = [None] * len(futures)
+        remaining = [len(futures)]
+        if not futures:
+            future._set(None, results)
+        for i in xrange(len(futures)):
+            # Bind the index now, the loop variable would only hold the last one
+            def handler(error, result, i=i):
+                if error is not None:
+                    future._try_set(error, None)
+                    return
+                # The futures may complete on different contexts
+                _lock.lock()
+                try:
+                    results[i] = result
+                    remaining[0] -= 1
+                    finished = remaining[0] == 0
+                finally:
+                    _lock.unlock()
+                if finished:
+                    future._try_set(None, results)
+            futures[i].on_complete(handler)
+        return future
+
+    @staticmethod
+    def any(futures):
+        """Wait for the first of a number of futures to succeed
+
+        Keyword arguments:
+        @param futures: the futures
+        @return: a Future of the first result, which fails with the last error if all the futures fail
+        """
+        futures = list(futures)
+        future = Future()
+        remaining = [len(futures)]
+        if not futures:
+            future._set(RuntimeError("No futures to wait for"), None)
+        def handler(error, result):
+            # The futures may complete on different contexts
+            _lock.lock()
+            try:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            finally:
+                _lock.unlock()
+            if error is None:
+                future._try_set(None, result)
+            elif last:
+                future._try_set(error, None)
+        for f in futures:
+            f.on_complete(handler)
+        return future
+
+    def _set(self, error, result=None):
+        if not self._try_set(error, result):
+            raise RuntimeError("Future has already completed")
+
+    def _try_set(self, error, result):
+        """Complete the future unless it already has, returning whether it did"""
+        _lock.lock()
+        try:
+            if self._done:
+                return False
+            self._error = error
+            self._result = result
+            self._done = True
+            handlers = self._handlers
+            self._handlers = None
+        finally:
+            _lock.unlock()
+        if handlers is not None:
+            self._dispatch(handlers, error, result)
+        return True
+
+    def _dispatch(self, handlers, error, result):
+        def run():
+            for handler in handlers:
+                handler(error, result)
+        if self._context is None:
+            # Created outside of any context, there's nowhere else to run them
+            run()
+        else:
+            self._context.runOnContext(NullDoneHandler(run))
+
+def returns_future(name="handler"):
+    """Decorator for asynchronous methods which lets them be used with futures. If the handler argument is
+    a Future it is completed when the operation completes, and if the handler is required but left out a new
+    Future is. Either way the method returns the future.
+
+    Keyword arguments:
+    @param name: the name of the handler argument, which must take (error, result)
+    """
+    def wrap(func):
+        code = func.func_code
+        args = code.co_varnames[:code.co_argcount]
+        index = list(args).index(name)
+        required = index < len(args) - len(func.func_defaults or ())
+        def call(*args, **kwargs):
+            if len(args) > index:
+                handler = args[index]
+                if isinstance(handler, Future):
+                    args = args[:index] + (handler._set,) + args[index + 1:]
+                    func(*args, **kwargs)
+                    return handler
+            elif name in kwargs:
+                handler = kwargs[name]
+                if isinstance(handler, Future):
+                    kwargs[name] = handler._set
+                    func(*args, **kwargs)
+                    return handler
+            elif required:
+                handler = Future()
+                kwargs[name] = handler._set
+                func(*args, **kwargs)
+                return handler
+            return func(*args, **kwargs)
+        call.__name__ = func.__name__
+        call.__doc__ = func.__doc__
+        return call
+    return wrap
+
+# Guards the state of all futures, which can be completed and observed from any thread. It's only ever held
+# for a few assignments so there's no point in a lock per future.
+_lock = java.util.concurrent.locks.ReentrantLock()
+
+def _java_vertx():
+    return org.vertx.java.platform.impl.JythonVerticleFactory.vertx
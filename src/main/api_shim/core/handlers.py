@@ -12,6 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import types
+import weakref
 import org.vertx.java.core.Handler
 
 from core.buffer import Buffer
@@ -128,3 +130,41 @@ class NullAsyncHandler(org.vertx.java.core.AsyncResultHandler):
                 self.handler(None)
             else:
                 self.handler(async_result.cause())
+
+# The adapters for a None handler are stateless so one of each is kept for good
+_null_adapters = {}
+# Adapters by handler and then by class. Both the handlers and the adapters are only weakly referenced, so an
+# entry goes once Java has dropped the adapter and nothing else uses the handler.
+_adapters = weakref.WeakKeyDictionary()
+# Only these can be weakly referenced and compared cheaply, other callables get a new adapter every time
+_cacheable_types = (types.FunctionType, types.MethodType)
+
+def cached(cls, handler):
+    """Get an adapter of class cls which calls handler, reusing the adapter created for the same handler by an
+    earlier call rather than creating a new Java proxy every time. Only adapters without state other than the
+    handler can be shared this way.
+
+    Functions and bound methods are cached, bound methods of the same object and function count as the same
+    handler. Other callables get a new adapter every time.
+
+    Keyword arguments:
+    @param cls: the adapter class, e.g. TimerHandler
+    @param handler: the Python callable
+    @return: the adapter
+    """
+    if handler is None:
+        adapter = _null_adapters.get(cls)
+        if adapter is None:
+            adapter = _null_adapters[cls] = cls(None)
+        return adapter
+    if not isinstance(handler, _cacheable_types):
+        return cls(handler)
+    by_class = _adapters.get(handler)
+    if by_class is None:
+        by_class = _adapters[handler] = {}
+    ref = by_class.get(cls)
+    adapter = ref is not None and ref() or None
+    if adapter is None:
+        adapter = cls(handler)
+        by_class[cls] = weakref.ref(adapter)
+    return adapter
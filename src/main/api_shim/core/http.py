@@ -18,14 +18,16 @@ This module adds the http support to the python vert.x platform
 
 import org.vertx.java.platform.impl.JythonVerticleFactory
 import org.vertx.java.core.http.RouteMatcher
+import org.vertx.java.core.http.CaseInsensitiveMultiMap
 import core.tcp_support
 import core.ssl_support
 import core.buffer
 import core.streams
 
 from core.javautils import map_from_java, map_to_java
-from core.handlers import CloseHandler, ExceptionHandler
+from core.handlers import CloseHandler, ExceptionHandler, cached
 from core.handlers import ContinueHandler, BufferHandler, AsyncHandler
+from core.future import returns_future
 from UserDict import DictMixin
 
 __author__ = "Scott Horn"
@@ -85,13 +87,14 @@ class HttpServer(core.tcp_support.ServerTCPSupport, core.ssl_support.ServerSSLSu
         self.java_obj.websocketHandler(ServerWebSocketHandler(handler))
         return self
 
+    @returns_future()
     def listen(self, port=80, host="0.0.0.0", handler=None):
         """Instruct the server to listen for incoming connections. If host is None listens on all.
 
         Keyword arguments:
         @param port:    The port to listen on.
         @param host:    The host name or ip address to listen on. (default 0.0.0.0)
-        @param handler: The handler to notify once the listen operation completes. (default None)
+        @param handler: The handler to notify once the listen operation completes, or a Future to complete. (default None)
     
         @return self
         """
@@ -112,7 +115,7 @@ class HttpServer(core.tcp_support.ServerTCPSupport, core.ssl_support.ServerSSLSu
         if handler is None:
             self.java_obj.close()
         else:
-            self.java_obj.close(AsyncHandler(handler))
+            self.java_obj.close(cached(AsyncHandler, handler))
 
     def _to_java_server(self):
         """private """
@@ -137,7 +140,7 @@ class HttpClient(core.ssl_support.ClientSSLSupport, core.tcp_support.TCPSupport,
         Keyword arguments:
         @param handler: function to be used as the handler
         """
-        self.java_obj.exceptionHandler(ExceptionHandler(handler))
+        self.java_obj.exceptionHandler(cached(ExceptionHandler, handler))
         return self
     
     def get_max_pool_size(self):
@@ -419,6 +422,18 @@ class HttpClientRequest(core.streams.WriteStream):
         self.java_obj.putHeader(key, value)
         return self
 
+    def put_headers(self, headers):
+        """Inserts a number of headers into the request, replacing any headers with the same names.
+
+        Keyword arguments:
+        @param headers: a dict or a list of (name, value) pairs, where a value can also be a list of values, a
+        HeaderSet, or the name a HeaderSet was registered with
+
+        @return: self so multiple operations can be chained.
+        """
+        _put_headers(self.java_obj.headers(), headers)
+        return self
+
 
     def write_str(self, str, enc="UTF-8"):
         """Write a to the request body.
@@ -515,7 +530,7 @@ class HttpClientRequest(core.streams.WriteStream):
         Keyword arguments:
         @param handler: The handler
         """
-        self.java_obj.continueHandler(ContinueHandler(handler))
+        self.java_obj.continueHandler(cached(ContinueHandler, handler))
         return self
 
    
@@ -572,7 +587,7 @@ class HttpClientResponse(core.streams.ReadStream):
 
     def body_handler(self, handler):
         """Set a handler to receive the entire body in one go - do not use this for large bodies"""
-        self.java_obj.bodyHandler(BufferHandler(handler))
+        self.java_obj.bodyHandler(cached(BufferHandler, handler))
         return self
   
 class HttpServerRequest(core.streams.ReadStream):
@@ -583,14 +598,21 @@ class HttpServerRequest(core.streams.ReadStream):
 
     Each instance of this class is associated with a corresponding HttpServerResponse instance via the property response.
     """
+    # One of these is created for every request, so keep them small and only wrap what's used
+    __slots__ = ['java_obj', 'http_server_response', 'hdrs', 'prms', 'vrsn', 'attrs', 'expect_mp', '_method',
+                 '_uri', '_path']
+
     def __init__(self, java_obj):
         self.java_obj = java_obj
-        self.http_server_response = HttpServerResponse(java_obj.response())
+        self.http_server_response = None
         self.hdrs = None
         self.prms = None
         self.vrsn = None
         self.attrs = None
         self.expect_mp = False
+        self._method = None
+        self._uri = None
+        self._path = None
 
     @property
     def version(self):
@@ -602,17 +624,23 @@ class HttpServerRequest(core.streams.ReadStream):
     @property
     def method(self):
         """The HTTP method, one of HEAD, OPTIONS, GET, POST, PUT, DELETE, CONNECT, TRACE"""
-        return self.java_obj.method()
+        if self._method is None:
+            self._method = self.java_obj.method()
+        return self._method
 
     @property
     def uri(self):
         """The uri of the request. For example 'http://www.somedomain.com/somepath/somemorepath/somresource.foo?someparam=32&someotherparam=x """
-        return self.java_obj.uri()
+        if self._uri is None:
+            self._uri = self.java_obj.uri()
+        return self._uri
 
     @property
     def path(self):
         """The path part of the uri. For example /somepath/somemorepath/somresource.foo """
-        return self.java_obj.path()
+        if self._path is None:
+            self._path = self.java_obj.path()
+        return self._path
 
     @property
     def query(self):
@@ -629,6 +657,8 @@ class HttpServerRequest(core.streams.ReadStream):
     @property
     def response(self):
         """The response HttpServerResponse object."""
+        if self.http_server_response is None:
+            self.http_server_response = HttpServerResponse(self.java_obj.response())
         return self.http_server_response
 
     @property
@@ -646,7 +676,7 @@ class HttpServerRequest(core.streams.ReadStream):
         @param handler: a handler that is called when the body has been received. The handler is wrapped in a BufferHandler.
 
         """
-        self.java_obj.bodyHandler(BufferHandler(handler))
+        self.java_obj.bodyHandler(cached(BufferHandler, handler))
         return self
 
     @property
@@ -709,6 +739,8 @@ class HttpServerResponse(core.streams.WriteStream):
     to the response.
 
     """
+    __slots__ = ['java_obj', 'hdrs', 'trls']
+
     def __init__(self, java_obj):
         self.java_obj = java_obj
         self.hdrs = None
@@ -755,6 +787,18 @@ class HttpServerResponse(core.streams.WriteStream):
         self.java_obj.putHeader(key, value)
         return self
 
+    def put_headers(self, headers):
+        """Inserts a number of headers into the response, replacing any headers with the same names.
+
+        Keyword arguments:
+        @param headers: a dict or a list of (name, value) pairs, where a value can also be a list of values, a
+        HeaderSet, or the name a HeaderSet was registered with
+
+        @return: HttpServerResponse so multiple operations can be chained.
+        """
+        _put_headers(self.java_obj.headers(), headers)
+        return self
+
     @property
     def trailers(self):
         """Get a copy of the trailers as a dictionary """
@@ -799,11 +843,11 @@ class HttpServerResponse(core.streams.WriteStream):
         @return: a HttpServerResponse so multiple operations can be chained.
         """
         if not_found_file is not None and handler is not None:
-            self.java_obj.sendFile(path, not_found_file, AsyncHandler(handler))
+            self.java_obj.sendFile(path, not_found_file, cached(AsyncHandler, handler))
         elif not_found_file is not None:
             self.java_obj.sendFile(path, not_found_file)
         elif handler is not None:
-            self.java_obj.sendFile(path, AsyncHandler(handler))
+            self.java_obj.sendFile(path, cached(AsyncHandler, handler))
         else:
             self.java_obj.sendFile(path)
         return self
@@ -936,7 +980,7 @@ class WebSocket(core.streams.ReadStream, core.streams.WriteStream):
         Keyword arguments:
         handler - The handler to be called when writing has been completed. It is wrapped in a CloseHandler.
         """
-        self.java_obj.closeHandler(CloseHandler(handler))
+        self.java_obj.closeHandler(cached(CloseHandler, handler))
         return self
 
 class ServerWebSocket(WebSocket):
@@ -1461,7 +1505,12 @@ class RouteMatcher(object):
 
 
 class MultiMap(DictMixin, object):
-    """A map which can hold multiple values for one name / key"""
+    """A map which can hold multiple values for one name / key
+
+    As a mapping it maps each name to its first value. Names are looked up without regard to case, and
+    lookups, iteration and the other mapping methods work on the Java map directly rather than on a copy
+    of its names. to_dict and to_multidict take a snapshot of the whole map in one go.
+    """
     def __init__(self, map):
         self.map = map
 
@@ -1492,7 +1541,7 @@ class MultiMap(DictMixin, object):
         values = self.map.getAll(key)
         if values.isEmpty():
             raise KeyError
-        return map_from_java(values)
+        return list(values)
 
     def add(self, key, value):
         """Adds a new value with the specified name and value.
@@ -1546,8 +1595,68 @@ class MultiMap(DictMixin, object):
         self.map.remove(key)
         return self
 
+    def get(self, key, default=None):
+        """Returns the first value with the specified name, or default if there is none"""
+        value = self.map.get(key)
+        if value is None:
+            return default
+        return value
+
+    def __len__(self):
+        return self.map.size()
+
+    def __contains__(self, key):
+        return self.map.contains(key)
+
+    def has_key(self, key):
+        return self.map.contains(key)
+
+    def __iter__(self):
+        return iter(self.map.names())
+
+    def iterkeys(self):
+        return iter(self.map.names())
+
     def keys(self):
-        return self.names()
+        return list(self.map.names())
+
+    def iteritems(self):
+        # A single pass over the entries, keeping the first value of each name
+        seen = {}
+        for entry in self.map.entries():
+            name = entry.getKey()
+            lower = name.lower()
+            if lower not in seen:
+                seen[lower] = True
+                yield name, entry.getValue()
+
+    def items(self):
+        return list(self.iteritems())
+
+    def itervalues(self):
+        for name, value in self.iteritems():
+            yield value
+
+    def values(self):
+        return [value for name, value in self.iteritems()]
+
+    def to_dict(self):
+        """Return a dict of the first value of each name"""
+        return dict(self.iteritems())
+
+    def to_multidict(self):
+        """Return a dict of the list of values of each name"""
+        result = {}
+        # Names which only differ in case are the same name, they are keyed as they first appear
+        names = {}
+        for entry in self.map.entries():
+            name = entry.getKey()
+            lower = name.lower()
+            values = names.get(lower)
+            if values is None:
+                values = names[lower] = result[name] = []
+            values.append(entry.getValue())
+        return result
 
     def contains(self, key):
         """Returns true if an entry with the given name was found"""
@@ -1573,6 +1682,87 @@ class MultiMap(DictMixin, object):
         self.map.clear()
         return self
 
+class HeaderSet(object):
+    """A fixed set of headers, such as the security headers sent with every response, which can be put into
+    any number of requests and responses with put_headers.
+
+    The headers are converted to a Java map once, when the set is created, and put into a request or
+    response with a single call to Java rather than a call per header.
+    """
+
+    _registry = {}
+
+    def __init__(self, headers):
+        """
+        Keyword arguments:
+        @param headers: a dict or a list of (name, value) pairs, where a value can also be a list of values
+        """
+        self.java_obj = org.vertx.java.core.http.CaseInsensitiveMultiMap()
+        if isinstance(headers, HeaderSet):
+            self.java_obj.add(headers.java_obj)
+            return
+        if isinstance(headers, dict):
+            headers = headers.iteritems()
+        for name, value in headers:
+            if isinstance(value, (list, tuple)):
+                for v in value:
+                    self.java_obj.add(name, _header_value(v))
+            else:
+                self.java_obj.add(name, _header_value(value))
+
+    @staticmethod
+    def register(name, headers):
+        """Create a HeaderSet and register it with a name which can be passed to put_headers instead
+
+        Keyword arguments:
+        @param name: the name of the set
+        @param headers: a dict or a list of (name, value) pairs, or a HeaderSet
+        @return: the HeaderSet
+        """
+        header_set = HeaderSet(headers)
+        HeaderSet._registry[name] = header_set
+        return header_set
+
+    @staticmethod
+    def named(name):
+        """Get a registered HeaderSet, or None"""
+        return HeaderSet._registry.get(name)
+
+    def names(self):
+        """The names of the headers"""
+        return list(self.java_obj.names())
+
+    def __len__(self):
+        return self.java_obj.size()
+
+def _header_value(value):
+    if isinstance(value, basestring):
+        return value
+    return str(value)
+
+def _put_headers(java_headers, headers):
+    if isinstance(headers, basestring):
+        header_set = HeaderSet.named(headers)
+        if header_set is None:
+            raise KeyError("No header set registered as %s" % headers)
+        headers = header_set
+    elif isinstance(headers, dict) and not [v for v in headers.itervalues() if not isinstance(v, basestring)]:
+        # A dict of strings is a java.util.Map already, so can be passed as is
+        if java_headers.isEmpty():
+            java_headers.add(headers)
+        else:
+            for name, value in headers.iteritems():
+                java_headers.set(name, value)
+        return
+    elif not isinstance(headers, HeaderSet):
+        headers = HeaderSet(headers)
+    if java_headers.isEmpty():
+        # Nothing to replace, so the whole set can be added in one go
+        java_headers.add(headers.java_obj)
+    else:
+        for name in headers.java_obj.names():
+            java_headers.set(name, headers.java_obj.getAll(name))
+
 class HttpServerFileUpload(core.streams.ReadStream):
     """An Upload which was found in the HttpServerMultipartRequest while handling it."""
     def __init__(self, upload):
@@ -0,0 +1,257 @@
+# Copyright 2011 the original author or authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import java.lang.System
+import java.security.MessageDigest
+import java.util.LinkedHashMap
+import org.vertx.java.core.buffer.Buffer
+
+import core.buffer
+from core.http import HttpServerResponse, HeaderSet, _put_headers
+
+# Headers which are worked out again when a cached response is sent, or which must never be sent to
+# another client
+_SKIPPED_HEADERS = ("content-length", "transfer-encoding", "set-cookie")
+
+# Cache-Control directives which keep a response out of a shared cache
+_UNCACHEABLE_DIRECTIVES = ("no-store", "private")
+
+class ResponseCache(object):
+    """An in memory cache of the responses of request handlers.
+
+    Decorating a handler with the cache makes GET requests for the same uri, and the same values of the
+    headers the cache varies on, be answered from the cache for ttl milliseconds after a response was
+    generated, without calling the handler:
+
+        cache = ResponseCache(max_bytes=16 * 1024 * 1024, ttl=60000)
+
+        @route_matcher.get("/products/:id")
+        @cache
+        def product(req):
+            ...
+
+    or with options for the route, @cache(ttl=5000, vary=["Accept-Language"]). Only responses with a 200
+    status which are ended with their body rather than sent with send_file are cached, and not those which
+    set a cookie or have a Cache-Control header with no-store or private. Each response is
+    given an ETag of its body, unless the handler sets one, and requests with a matching If-None-Match
+    header get an empty 304 response.
+
+    The least recently used responses are dropped when their bodies take more than max_bytes. A cache
+    should only be used from the verticle that created it.
+    """
+
+    def __init__(self, max_bytes=16 * 1024 * 1024, ttl=60000, vary=()):
+        """
+        Keyword arguments:
+        @param max_bytes: the most bytes of response bodies to keep
+        @param ttl: how long a response is served from the cache for, in milliseconds
+        @param vary: the names of the request headers whose values are part of the key of a response
+        """
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.vary = tuple(vary)
+        # Iterated least recently used first
+        self._entries = java.util.LinkedHashMap(16, 0.75, True)
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, handler=None, ttl=None, vary=None):
+        """Decorate a request handler so its responses are cached. This can be used as a decorator with or
+        without arguments.
+
+        Keyword arguments:
+        @param handler: the request handler
+        @param ttl: how long responses of this handler are cached for, in milliseconds, instead of the cache's ttl
+        @param vary: the names of the request headers whose values are part of the key, instead of the cache's
+        """
+        if handler is None:
+            def wrap(handler):
+                return self(handler, ttl, vary)
+            return wrap
+        if ttl is None:
+            ttl = self.ttl
+        if vary is None:
+            vary = self.vary
+        def cached_handler(req):
+            if req.method != "GET":
+                handler(req)
+                return
+            key = self._key(req, vary)
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires > java.lang.System.currentTimeMillis():
+                    self.hits += 1
+                    entry.send(req)
+                    return
+                self._remove(key)
+            self.misses += 1
+            def store(entry):
+                entry.expires = java.lang.System.currentTimeMillis() + ttl
+                self._put(key, entry)
+            req.http_server_response = _CachingResponse(req, store)
+            handler(req)
+        cached_handler.__name__ = getattr(handler, "__name__", cached_handler.__name__)
+        cached_handler.__doc__ = getattr(handler, "__doc__", None)
+        return cached_handler
+
+    @property
+    def size(self):
+        """The number of bytes of response bodies in the cache"""
+        return self._bytes
+
+    def __len__(self):
+        return self._entries.size()
+
+    def invalidate(self, uri):
+        """Remove the cached responses for a uri
+
+        Keyword arguments:
+        @param uri: the uri, as in HttpServerRequest.uri
+        """
+        for key in list(self._entries.keySet()):
+            if key[0] == uri:
+                self._remove(key)
+
+    def clear(self):
+        """Remove all the cached responses"""
+        self._entries.clear()
+        self._bytes = 0
+
+    def _key(self, req, vary):
+        if not vary:
+            return (req.uri,)
+        headers = req.java_obj.headers()
+        return (req.uri,) + tuple([headers.get(name) for name in vary])
+
+    def _put(self, key, entry):
+        if entry.size > self.max_bytes:
+            return
+        self._remove(key)
+        self._entries.put(key, entry)
+        self._bytes += entry.size
+        if self._bytes > self.max_bytes:
+            entries = self._entries.values().iterator()
+            while self._bytes > self.max_bytes and entries.hasNext():
+                self._bytes -= entries.next().size
+                entries.remove()
+
+    def _remove(self, key):
+        entry = self._entries.remove(key)
+        if entry is not None:
+            self._bytes -= entry.size
+
+class _Entry(object):
+    """A cached response"""
+    __slots__ = ['headers', 'body', 'etag', 'size', 'expires']
+
+    def __init__(self, headers, body, etag):
+        # A HeaderSet
+        self.headers = headers
+        self.body = body
+        self.etag = etag
+        self.size = body.length()
+        self.expires = 0
+
+    def send(self, req):
+        response = req.java_obj.response()
+        if _etag_matches(req, self.etag):
+            response.setStatusCode(304)
+            response.putHeader("ETag", self.etag)
+            response.end()
+            return
+        _put_headers(response.headers(), self.headers)
+        # The response owns the buffer it's ended with, so send a copy
+        response.end(self.body.copy())
+
+class _CachingResponse(HttpServerResponse):
+    """A response which keeps a copy of its body to put in the cache when it ends"""
+
+    def __init__(self, req, store):
+        HttpServerResponse.__init__(self, req.java_obj.response())
+        self._req = req
+        self._store = store
+        self._body = org.vertx.java.core.buffer.Buffer()
+        self._written = False
+        self._cacheable = True
+
+    def write(self, buff):
+        self._written = True
+        self._body.appendBuffer(buff._to_java_buffer())
+        return HttpServerResponse.write(self, buff)
+
+    def write_str(self, str, enc="UTF-8"):
+        self._written = True
+        self._body.appendString(str, enc)
+        return HttpServerResponse.write_str(self, str, enc)
+
+    def send_file(self, path, not_found_file=None, handler=None):
+        self._cacheable = False
+        return HttpServerResponse.send_file(self, path, not_found_file, handler)
+
+    def end(self, data=None):
+        if data is not None:
+            if isinstance(data, basestring):
+                self._body.appendString(data)
+            elif isinstance(data, core.buffer.Buffer):
+                data = data._to_java_buffer()
+                self._body.appendBuffer(data)
+            else:
+                self._body.appendBuffer(data)
+        headers = self.java_obj.headers()
+        if not self._cacheable or self.java_obj.getStatusCode() != 200 or not _storable(headers):
+            HttpServerResponse.end(self, data)
+            return
+        etag = headers.get("ETag")
+        pairs = []
+        if etag is None:
+            etag = _etag(self._body)
+            if self._written:
+                # Too late for this response, the headers have been sent
+                pairs.append(("ETag", etag))
+            else:
+                headers.set("ETag", etag)
+        for name in headers.names():
+            if name.lower() not in _SKIPPED_HEADERS:
+                for value in headers.getAll(name):
+                    pairs.append((name, value))
+        self._store(_Entry(HeaderSet(pairs), self._body, etag))
+        if not self._written and _etag_matches(self._req, etag):
+            self.java_obj.setStatusCode(304)
+            self.java_obj.end()
+        else:
+            HttpServerResponse.end(self, data)
+
+def _storable(headers):
+    if headers.contains("Set-Cookie"):
+        return False
+    for value in headers.getAll("Cache-Control"):
+        for directive in value.split(","):
+            if directive.split("=")[0].strip().lower() in _UNCACHEABLE_DIRECTIVES:
+                return False
+    return True
+
+def _etag(body):
+    digest = java.security.MessageDigest.getInstance("MD5").digest(body.getBytes())
+    return '"%s"' % "".join(["%02x" % (b & 0xff) for b in digest])
+
+def _etag_matches(req, etag):
+    if_none_match = req.java_obj.headers().get("If-None-Match")
+    if if_none_match is None:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == etag or tag == "*":
+            return True
+    return False
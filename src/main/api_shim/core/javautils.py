@@ -21,6 +21,7 @@ Initially based on resources in the following article http://www.ibm.com/develop
 
 import sys
 from types import TupleType, ListType, DictType
+from UserDict import DictMixin
 from java.util import (
     Map,
     HashMap,
@@ -43,21 +44,110 @@ __author__ = "Scott Horn"
 __email__ = "scott@hornmicro.com"
 __credits__ = "Based entirely on work by Tim Fox http://tfox.org"
 
+# Conversions dispatch on the exact type of a value through these tables. They
+# start out with the common types and learn the converter for any other type
+# the first time it is seen, so after warm up each value costs one dict lookup
+# instead of a chain of isinstance checks.
+_from_java_converters = {}
+_from_vertx_converters = {}
+_to_java_converters = {}
+_to_vertx_converters = {}
+
+def _identity(value):
+    return value
+
+def _from_java_converter(t):
+    """Returns the function converting Java values of type t to Jython values."""
+    if issubclass(t, Map):
+        converter = map_map_from_java
+    elif issubclass(t, Set):
+        converter = map_set_from_java
+    elif issubclass(t, Collection):
+        converter = map_collection_from_java
+    else:
+        converter = _identity
+    _from_java_converters[t] = converter
+    return converter
+
+def _from_vertx_converter(t):
+    """Returns the function converting Vert.x values of type t to Jython values."""
+    if issubclass(t, Map):
+        converter = map_map_from_java
+    elif issubclass(t, Set):
+        converter = map_set_from_java
+    elif issubclass(t, Collection):
+        converter = map_collection_from_java
+    elif issubclass(t, org.vertx.java.core.json.JsonObject):
+        converter = map_object_from_java
+    elif issubclass(t, org.vertx.java.core.json.JsonArray):
+        converter = map_array_from_java
+    elif issubclass(t, org.vertx.java.core.buffer.Buffer):
+        converter = map_buffer_from_java
+    else:
+        converter = _identity
+    _from_vertx_converters[t] = converter
+    return converter
+
+def _to_java_converter(t):
+    """Returns the function converting Jython values of type t to Java values."""
+    if t in (TupleType, ListType):
+        converter = map_seq_to_java
+    elif t == DictType:
+        converter = map_dict_to_java
+    else:
+        converter = _identity
+    _to_java_converters[t] = converter
+    return converter
+
+def _to_vertx_converter(t):
+    """Returns the function converting Jython values of type t to Vert.x values."""
+    if issubclass(t, (list, tuple)):
+        converter = _seq_to_vertx
+    elif issubclass(t, dict):
+        converter = _dict_to_vertx
+    elif issubclass(t, Buffer):
+        converter = _buffer_to_vertx
+    elif issubclass(t, long):
+        converter = Long
+    elif issubclass(t, float):
+        converter = Double
+    elif issubclass(t, int):
+        converter = Integer
+    else:
+        converter = _to_java_converters.get(t) or _to_java_converter(t)
+    _to_vertx_converters[t] = converter
+    return converter
+
+def _seq_to_vertx(seq):
+    return org.vertx.java.core.json.JsonArray(map_seq_to_java(seq))
+
+def _dict_to_vertx(dict):
+    return org.vertx.java.core.json.JsonObject(map_dict_to_java(dict))
+
+def _buffer_to_vertx(buffer):
+    return buffer._to_java_buffer()
+
 def map_array_from_java(array):
     """Converts a JsonArray to a list."""
     result = []
-    iter = array.iterator()
-    while iter.hasNext():
-        result.append(map_from_vertx(iter.next()))
+    append = result.append
+    get = _from_vertx_converters.get
+    for value in array:
+        t = type(value)
+        append((get(t) or _from_vertx_converter(t))(value))
     return result
 
 def map_map_from_java(map):
     """Convert a Map to a Dictionary."""
     result = {}
-    iter = map.keySet().iterator()
-    while iter.hasNext():
-        key = iter.next()
-        result[map_from_java(key)] = map_from_java(map.get(key))
+    get = _from_java_converters.get
+    for entry in map.entrySet():
+        key = entry.getKey()
+        value = entry.getValue()
+        t = type(key)
+        key = (get(t) or _from_java_converter(t))(key)
+        t = type(value)
+        result[key] = (get(t) or _from_java_converter(t))(value)
     return result
 
 def map_object_from_java(obj):
@@ -71,105 +161,219 @@ def map_buffer_from_java(obj):
 def map_set_from_java(set_):
     """Convert a Set to a set."""
     result = set()
-    iter = set_.iterator()
-    while iter.hasNext():
-        result.add(map_from_java(iter.next()))
+    add = result.add
+    get = _from_java_converters.get
+    for value in set_:
+        t = type(value)
+        add((get(t) or _from_java_converter(t))(value))
     return result
 
 def map_collection_from_java(coll):
     """Convert a Collection to a List."""
     result = []
-    iter = coll.iterator()
-    while iter.hasNext():
-        result.append(map_from_java(iter.next()))
+    append = result.append
+    get = _from_java_converters.get
+    for value in coll:
+        t = type(value)
+        append((get(t) or _from_java_converter(t))(value))
     return result
 
 def map_from_java(value):
     """Convert a Java type to a Jython type."""
-    if value is None:
-        return value
-    if isinstance(value, Map):
-        return map_map_from_java(value)
-    elif isinstance(value, Set):
-        return map_set_from_java(value)
-    elif isinstance(value, Collection):
-        return map_collection_from_java(value)
-    return value
+    t = type(value)
+    return (_from_java_converters.get(t) or _from_java_converter(t))(value)
 
 def map_from_vertx(value):
     """Converts a Vert.x type to a Jython type."""
-    if value is None:
-        return value
-    if isinstance(value, Map):
-        return map_map_from_java(value)
-    elif isinstance(value, Set):
-        return map_set_from_java(value)
-    elif isinstance(value, Collection):
-        return map_collection_from_java(value)
-    elif isinstance(value, org.vertx.java.core.json.JsonObject):
-        return map_object_from_java(value)
-    elif isinstance(value, org.vertx.java.core.json.JsonArray):
-        return map_array_from_java(value)
-    elif isinstance(value, org.vertx.java.core.buffer.Buffer):
-        return map_buffer_from_java(value)
-    return value
+    t = type(value)
+    return (_from_vertx_converters.get(t) or _from_vertx_converter(t))(value)
 
 def map_seq_to_java(seq):
     """Convert a seqence to a Java ArrayList."""
     result = ArrayList(len(seq))
+    add = result.add
+    get = _to_java_converters.get
     for e in seq:
-        result.add(map_to_java(e));
+        t = type(e)
+        add((get(t) or _to_java_converter(t))(e))
     return result
 
 def map_list_to_java(list):
     """Convert a List to a Java ArrayList."""
-    result = ArrayList(len(list))
-    for e in list:
-        result.add(map_to_java(e));
-    return result
+    return map_seq_to_java(list)
 
 def map_list_to_java_vector(list):
     """Convert a List to a Java Vector."""
     result = Vector(len(list))
+    add = result.add
+    get = _to_java_converters.get
     for e in list:
-        result.add(map_to_java(e));
+        t = type(e)
+        add((get(t) or _to_java_converter(t))(e))
     return result
 
 def map_dict_to_java(dict):
     """Convert a Dictionary to a Java HashMap."""
     result = HashMap()
-    for key, value in dict.items():
-        result.put(map_to_java(key), map_to_java(value))
+    put = result.put
+    get = _to_java_converters.get
+    for key, value in dict.iteritems():
+        t = type(key)
+        key = (get(t) or _to_java_converter(t))(key)
+        t = type(value)
+        put(key, (get(t) or _to_java_converter(t))(value))
     return result
 
 def map_to_java(value):
     """Convert a Jython type to a Java type."""
-    if value is None:
-        return value
     t = type(value)
-    if t in (TupleType, ListType):
-        return map_seq_to_java(value)
-    elif t == DictType:
-        return map_dict_to_java(value)
-    return value
+    return (_to_java_converters.get(t) or _to_java_converter(t))(value)
 
 def map_to_vertx(value):
     """Converts a Jython type to a Vert.x type."""
-    if value is None:
-        return value
-    if isinstance(value, (list, tuple)):
-        return org.vertx.java.core.json.JsonArray(map_seq_to_java(value))
-    elif isinstance(value, dict):
-        return org.vertx.java.core.json.JsonObject(map_dict_to_java(value))
-    elif isinstance(value, Buffer):
-        return value._to_java_buffer()
-    elif isinstance(value, long):
-        return Long(value)
-    elif isinstance(value, float):
-        return Double(value)
-    elif isinstance(value, int):
-        return Integer(value)
-    return map_to_java(value)
+    t = type(value)
+    return (_to_vertx_converters.get(t) or _to_vertx_converter(t))(value)
+
+# Scalars and strings are by far the most common values, make sure they never
+# go through the checks above
+for t in (type(None), str, unicode, bool, int, long, float):
+    _from_java_converters[t] = _identity
+    _from_vertx_converters[t] = _identity
+    _to_java_converter(t)
+    _to_vertx_converter(t)
+for t in (list, tuple, dict):
+    _to_java_converter(t)
+    _to_vertx_converter(t)
+del t
+
+class JsonObjectView(DictMixin, object):
+    """A read-only dict-like view of a JsonObject.
+
+    Fields are only converted to Python types when they are accessed, and
+    each one is converted once. Nested objects and arrays are returned as
+    views too, so reading one field of a large message doesn't convert the
+    rest of it.
+    """
+    def __init__(self, json_object):
+        self.java_obj = json_object
+        self._values = {}
+
+    def __getitem__(self, key):
+        try:
+            return self._values[key]
+        except KeyError:
+            if not self.java_obj.containsField(key):
+                raise KeyError(key)
+            value = view_from_vertx(self.java_obj.getField(key))
+            self._values[key] = value
+            return value
+
+    def __setitem__(self, key, value):
+        raise TypeError("JsonObjectView is read-only, use to_dict() to get a modifiable copy")
+
+    def __delitem__(self, key):
+        raise TypeError("JsonObjectView is read-only, use to_dict() to get a modifiable copy")
+
+    def __contains__(self, key):
+        return key in self._values or self.java_obj.containsField(key)
+
+    has_key = __contains__
+
+    def __iter__(self):
+        return iter(self.java_obj.getFieldNames())
+
+    def __len__(self):
+        return self.java_obj.size()
+
+    def keys(self):
+        return list(self.java_obj.getFieldNames())
+
+    def to_dict(self):
+        """Returns the whole object converted to a dict"""
+        return map_object_from_java(self.java_obj)
+
+    def __repr__(self):
+        return "JsonObjectView(%s)" % self.java_obj.encode()
+
+class JsonArrayView(object):
+    """A read-only list-like view of a JsonArray.
+
+    Elements are only converted to Python types when they are accessed, and
+    each one is converted once. Nested objects and arrays are returned as
+    views too.
+    """
+    def __init__(self, json_array):
+        self.java_obj = json_array
+        self._values = {}
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in xrange(*index.indices(len(self)))]
+        size = self.java_obj.size()
+        if index < 0:
+            index += size
+        if index < 0 or index >= size:
+            raise IndexError("JsonArrayView index out of range")
+        try:
+            return self._values[index]
+        except KeyError:
+            value = view_from_vertx(self.java_obj.get(index))
+            self._values[index] = value
+            return value
+
+    def __len__(self):
+        return self.java_obj.size()
+
+    def __iter__(self):
+        for i in xrange(len(self)):
+            yield self[i]
+
+    def __contains__(self, value):
+        for v in self:
+            if v == value:
+                return True
+        return False
+
+    def __eq__(self, other):
+        if isinstance(other, JsonArrayView):
+            other = other.to_list()
+        return self.to_list() == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    def index(self, value):
+        for i, v in enumerate(self):
+            if v == value:
+                return i
+        raise ValueError("JsonArrayView.index(x): x not in list")
+
+    def count(self, value):
+        return len([v for v in self if v == value])
+
+    def to_list(self):
+        """Returns the whole array converted to a list"""
+        return map_array_from_java(self.java_obj)
+
+    def __repr__(self):
+        return "JsonArrayView(%s)" % self.java_obj.encode()
+
+def view_from_vertx(value):
+    """Converts a Vert.x type to a Jython type, returning lazy read-only views
+    instead of converting JsonObjects and JsonArrays.
+    """
+    if isinstance(value, org.vertx.java.core.json.JsonObject):
+        return JsonObjectView(value)
+    elif isinstance(value, org.vertx.java.core.json.JsonArray):
+        return JsonArrayView(value)
+    return map_from_vertx(value)
+
+# Views are sent back to Vert.x as the Java objects they wrap, so forwarding
+# them costs no conversion at all
+_to_vertx_converters[JsonObjectView] = lambda view: view.java_obj
+_to_vertx_converters[JsonArrayView] = lambda view: view.java_obj
+_to_java_converters[JsonObjectView] = lambda view: view.java_obj.toMap()
+_to_java_converters[JsonArrayView] = lambda view: view.java_obj.toList()
 
 def inetsocketaddress_to_tuple(object):
     return object.getAddress().getHostAddress() , object.getPort()
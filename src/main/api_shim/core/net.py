@@ -24,7 +24,8 @@ import core.buffer
 import core.streams
 
 from core.javautils import inetsocketaddress_to_tuple
-from core.handlers import CloseHandler, NullDoneHandler, AsyncHandler
+from core.handlers import CloseHandler, NullDoneHandler, AsyncHandler, cached
+from core.future import returns_future
 from core.event_bus import EventBus
 
 __author__ = "Scott Horn"
@@ -57,13 +58,14 @@ class NetServer(core.ssl_support.ServerSSLSupport, core.tcp_support.ServerTCPSup
         return self
 
 
+    @returns_future()
     def listen(self, port, host="0.0.0.0", handler=None):
         """Instruct the server to listen for incoming connections.
 
         Keyword arguments:
         @param port:    The port to listen on.
         @param host:    The host name or ip address to listen on.
-        @param handler: The handler to notify once the listen operations completes (default None)
+        @param handler: The handler to notify once the listen operations completes, or a Future to complete (default None)
         
         @return: a reference to self so invocations can be chained
         """
@@ -81,7 +83,7 @@ class NetServer(core.ssl_support.ServerSSLSupport, core.tcp_support.ServerTCPSup
         if (handler is None):
             self.java_obj.close()
         else:
-            self.java_obj.close(AsyncHandler(handler))
+            self.java_obj.close(cached(AsyncHandler, handler))
 
     @property
     def port(self):
@@ -106,6 +108,7 @@ class NetClient(core.ssl_support.ClientSSLSupport, core.tcp_support.TCPSupport):
         for item in kwargs.keys():
            setattr(self, item, kwargs[item])
 
+    @returns_future()
     def connect(self, port, host, handler):
         """Attempt to open a connection to a server. The connection is opened asynchronously and the result returned in the
         handler.
@@ -115,7 +118,8 @@ class NetClient(core.ssl_support.ClientSSLSupport, core.tcp_support.TCPSupport):
         @param host: The host or ip address to connect to.
         @param handler: The connection handler
 
-        @return: a reference to self so invocations can be chained
+        @return: a reference to self so invocations can be chained, or a Future of the socket if the handler
+        is left out
         """
         def converter(socket):
             return NetSocket(socket)
@@ -170,17 +174,35 @@ class NetSocket(core.streams.ReadStream, core.streams.WriteStream):
         self.java_obj = j_socket
         self.remote_addr = None
         self.local_addr = None
+        self._write_handler_id = None
+        self._close_handler = None
+        self._watching_close = False
 
-        def simple_handler(msg):
-            self.write(msg.body)
-
-        self.write_handler_id = EventBus.register_simple_handler(False, simple_handler)
-        
-        def wrapped_close_handler():
-            EventBus.unregister_handler(self.write_handler_id)
-            if hasattr(self, "_close_handler"):
-                self._close_handler()
-        self.java_obj.closeHandler(CloseHandler(wrapped_close_handler))
+    @property
+    def write_handler_id(self):
+        """When a NetSocket is created it can register an event handler with the event bus, the ID of that
+        handler is given by write_handler_id. The handler is only registered the first time this is read.
+        Given this ID, a different event loop can send a buffer to that event handler using the event bus and
+        that buffer will be received by this instance in its own event loop and written to the underlying connection.
+        This allows you to write data to other connections which are owned by different event loops.
+        """
+        if self._write_handler_id is None:
+            def simple_handler(msg):
+                self.write(msg.body)
+            self._watch_close()
+            self._write_handler_id = EventBus.register_simple_handler(False, simple_handler)
+        return self._write_handler_id
+
+    def _watch_close(self):
+        # Only set a close handler on the Java socket once something needs one
+        if not self._watching_close:
+            self._watching_close = True
+            def wrapped_close_handler():
+                if self._write_handler_id is not None:
+                    EventBus.discard_handler(self._write_handler_id)
+                if self._close_handler is not None:
+                    self._close_handler()
+            self.java_obj.closeHandler(CloseHandler(wrapped_close_handler))
 
     @property
     def is_ssl(self):
@@ -194,7 +216,7 @@ class NetSocket(core.streams.ReadStream, core.streams.WriteStream):
         @param handler: a function to be called once complete
         @return: self
         """
-        self.java_obj.ssl(NullDoneHandler(handler))
+        self.java_obj.ssl(cached(NullDoneHandler, handler))
         return self
 
     def write_str(self, str, enc="UTF-8"):
@@ -214,6 +236,7 @@ class NetSocket(core.streams.ReadStream, core.streams.WriteStream):
         @param handler: A block to be used as the handler
         """
         self._close_handler = handler
+        self._watch_close()
         return self
 
     def send_file(self, file_path):
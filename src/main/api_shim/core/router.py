@@ -0,0 +1,395 @@
+# Copyright 2011 the original author or authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import re
+import java.util.regex.Pattern
+import java.util.regex.PatternSyntaxException
+
+METHODS = ("GET", "PUT", "POST", "DELETE", "OPTIONS", "HEAD", "TRACE", "PATCH", "CONNECT")
+
+# The same parameter syntax as the Java RouteMatcher
+_PARAM = re.compile(r":([A-Za-z][A-Za-z0-9_]*)")
+_PARAM_SEGMENT = re.compile(r"^:([A-Za-z][A-Za-z0-9_]*)$")
+# Characters which make a pattern a regular expression rather than a plain path
+_REGEX_CHARS = re.compile(r"[\\^$.|?*+()\[\]{}]")
+
+class Router(object):
+    """A request router with the same patterns and the same API as core.http.RouteMatcher, which finds the
+    route for a request in time that hardly grows with the number of routes.
+
+    The Java RouteMatcher tries the regular expression of each route for the request's method in turn. Here
+    patterns made up of plain path segments and :name parameters are compiled into a tree per method, with a
+    branch per path segment, so a request only needs a lookup per segment of its path. The regular expressions
+    of *_re routes, and of patterns which mix parameters and text within a segment, are combined into a single
+    alternation per method. Numbered backreferences can't be used in them because of that.
+
+    Each route can be given a priority. The route with the highest priority which matches a request handles it,
+    and of routes with the same priority the one added first, as with RouteMatcher. Handlers are passed the
+    HttpServerRequest the router was called with, so the request isn't wrapped again for each route.
+    """
+
+    def __init__(self):
+        self._tables = {}
+        for method in METHODS:
+            self._tables[method] = _RouteTable()
+        self._count = 0
+        self._no_match = None
+
+    def __call__(self, request):
+        self.input(request)
+
+    def input(self, request):
+        """Route a request to the handler of the route it matches
+
+        Keyword arguments:
+        @param request: the HttpServerRequest
+        """
+        table = self._tables.get(request.method)
+        if table is not None:
+            match = table.match(request.path)
+            if match is not None:
+                route, values = match
+                if values:
+                    params = request.java_obj.params()
+                    if route.names is None:
+                        for i in xrange(len(values)):
+                            params.add("param%d" % i, values[i])
+                    elif route.groups is None:
+                        for i in xrange(len(values)):
+                            params.add(route.names[i], values[i])
+                    else:
+                        # Other groups of the pattern aren't parameters, as with RouteMatcher
+                        for i in xrange(len(route.names)):
+                            params.add(route.names[i], values[route.groups[i]])
+                route.handler(request)
+                return
+        if self._no_match is not None:
+            self._no_match(request)
+        else:
+            request.response.status_code = 404
+            request.response.end()
+
+    def route(self, method, pattern, handler=None, priority=0):
+        """Specify a handler that will be called for requests with a method whose path matches a pattern.
+        Without a handler this returns a decorator which adds the decorated handler.
+
+        Keyword arguments:
+        @param method: the HTTP method, or None for all of them
+        @param pattern: pattern to match, in which :name matches a path segment and adds it to the request
+        parameters as name
+        @param handler: http server request handler
+        @param priority: routes with a higher priority are matched first
+        """
+        return self._add(method, pattern, handler, priority, False)
+
+    def route_re(self, method, pattern, handler=None, priority=0):
+        """Specify a handler that will be called for requests with a method whose path matches a regular
+        expression. The groups of the expression are added to the request parameters as param0, param1 and so on.
+        Without a handler this returns a decorator which adds the decorated handler.
+
+        Keyword arguments:
+        @param method: the HTTP method, or None for all of them
+        @param pattern: the Java regular expression to match
+        @param handler: http server request handler
+        @param priority: routes with a higher priority are matched first
+        """
+        return self._add(method, pattern, handler, priority, True)
+
+    def get(self, pattern, handler=None, priority=0):
+        """Specify a handler that will be called for a matching HTTP GET"""
+        return self._add("GET", pattern, handler, priority, False)
+
+    def put(self, pattern, handler=None, priority=0):
+        """Specify a handler that will be called for a matching HTTP PUT"""
+        return self._add("PUT", pattern, handler, priority, False)
+
+    def post(self, pattern, handler=None, priority=0):
+        """Specify a handler that will be called for a matching HTTP POST"""
+        return self._add("POST", pattern, handler, priority, False)
+
+    def delete(self, pattern, handler=None, priority=0):
+        """Specify a handler that will be called for a matching HTTP DELETE"""
+        return self._add("DELETE", pattern, handler, priority, False)
+
+    def options(self, pattern, handler=None, priority=0):
+        """Specify a handler that will be called for a matching HTTP OPTIONS"""
+        return self._add("OPTIONS", pattern, handler, priority, False)
+
+    def head(self, pattern, handler=None, priority=0):
+        """Specify a handler that will be called for a matching HTTP HEAD"""
+        return self._add("HEAD", pattern, handler, priority, False)
+
+    def trace(self, pattern, handler=None, priority=0):
+        """Specify a handler that will be called for a matching HTTP TRACE"""
+        return self._add("TRACE", pattern, handler, priority, False)
+
+    def patch(self, pattern, handler=None, priority=0):
+        """Specify a handler that will be called for a matching HTTP PATCH"""
+        return self._add("PATCH", pattern, handler, priority, False)
+
+    def connect(self, pattern, handler=None, priority=0):
+        """Specify a handler that will be called for a matching HTTP CONNECT"""
+        return self._add("CONNECT", pattern, handler, priority, False)
+
+    def all(self, pattern, handler=None, priority=0):
+        """Specify a handler that will be called for any matching HTTP request"""
+        return self._add(None, pattern, handler, priority, False)
+
+    def get_re(self, pattern, handler=None, priority=0):
+        """Specify a handler that will be called for a matching HTTP GET"""
+        return self._add("GET", pattern, handler, priority, True)
+
+    def put_re(self, pattern, handler=None, priority=0):
+        """Specify a handler that will be called for a matching HTTP PUT"""
+        return self._add("PUT", pattern, handler, priority, True)
+
+    def post_re(self, pattern, handler=None, priority=0):
+        """Specify a handler that will be called for a matching HTTP POST"""
+        return self._add("POST", pattern, handler, priority, True)
+
+    def delete_re(self, pattern, handler=None, priority=0):
+        """Specify a handler that will be called for a matching HTTP DELETE"""
+        return self._add("DELETE", pattern, handler, priority, True)
+
+    def options_re(self, pattern, handler=None, priority=0):
+        """Specify a handler that will be called for a matching HTTP OPTIONS"""
+        return self._add("OPTIONS", pattern, handler, priority, True)
+
+    def head_re(self, pattern, handler=None, priority=0):
+        """Specify a handler that will be called for a matching HTTP HEAD"""
+        return self._add("HEAD", pattern, handler, priority, True)
+
+    def trace_re(self, pattern, handler=None, priority=0):
+        """Specify a handler that will be called for a matching HTTP TRACE"""
+        return self._add("TRACE", pattern, handler, priority, True)
+
+    def patch_re(self, pattern, handler=None, priority=0):
+        """Specify a handler that will be called for a matching HTTP PATCH"""
+        return self._add("PATCH", pattern, handler, priority, True)
+
+    def connect_re(self, pattern, handler=None, priority=0):
+        """Specify a handler that will be called for a matching HTTP CONNECT"""
+        return self._add("CONNECT", pattern, handler, priority, True)
+
+    def all_re(self, pattern, handler=None, priority=0):
+        """Specify a handler that will be called for any matching HTTP request"""
+        return self._add(None, pattern, handler, priority, True)
+
+    def no_match(self, handler):
+        """Specify a handler that will be called when nothing matches
+        Default behaviour is to return a 404
+
+        Keyword arguments:
+        @param handler: http server request handler"""
+        self._no_match = handler
+        return self
+
+    def _add(self, method, pattern, handler, priority, regex):
+        if handler is None:
+            def wrap(handler):
+                self._add(method, pattern, handler, priority, regex)
+                return handler
+            return wrap
+        if method is None:
+            tables = [self._tables[m] for m in METHODS]
+        else:
+            tables = [self._tables[method.upper()]]
+        self._count += 1
+        key = (-priority, self._count)
+        if regex:
+            route = _Route(key, handler, None, None)
+            for table in tables:
+                table.regex.add(pattern, route)
+            return self
+        names = _PARAM.findall(pattern)
+        for name in names:
+            if names.count(name) > 1:
+                raise RuntimeError("Cannot use identifier %s more than once in pattern string" % name)
+        segments = pattern.split("/")
+        if [s for s in segments if _REGEX_CHARS.search(s) or (_PARAM.search(s) and not _PARAM_SEGMENT.match(s))]:
+            # Turned into a regular expression the same way RouteMatcher does, but with plain groups as
+            # the same name may be used by the other routes it's combined with, so the group of each
+            # parameter is kept
+            pieces = []
+            groups = []
+            end = 0
+            for m in _PARAM.finditer(pattern):
+                pieces.append(pattern[end:m.start()])
+                groups.append(_group_count("".join(pieces)))
+                pieces.append(r"([^\/]+)")
+                end = m.end()
+            pieces.append(pattern[end:])
+            route = _Route(key, handler, names, groups)
+            for table in tables:
+                table.regex.add("".join(pieces), route)
+        else:
+            route = _Route(key, handler, names, None)
+            for table in tables:
+                table.tree.add(segments, route)
+        return self
+
+def _group_count(regex):
+    """The number of capturing groups in the text of a regular expression"""
+    count = 0
+    in_class = 0
+    i = 0
+    while i < len(regex):
+        c = regex[i]
+        if c == "\\":
+            if regex.startswith("Q", i + 1):
+                # Quoted up to \E
+                end = regex.find("\\E", i + 2)
+                if end == -1:
+                    break
+                i = end
+            i += 2
+            continue
+        if c == "[":
+            in_class += 1
+        elif c == "]" and in_class:
+            in_class -= 1
+        elif c == "(" and not in_class:
+            if not regex.startswith("?", i + 1):
+                count += 1
+            elif regex.startswith("?<", i + 1) and not regex[i + 3:i + 4] in ("=", "!"):
+                # A named group
+                count += 1
+        i += 1
+    return count
+
+class _Route(object):
+    __slots__ = ['key', 'handler', 'names', 'groups']
+
+    def __init__(self, key, handler, names, groups):
+        # Routes with lower keys win, the key orders by priority and then by when the route was added
+        self.key = key
+        self.handler = handler
+        # The names of the parameters, in order, or None for regular expression routes
+        self.names = names
+        # The index of the group of each parameter for patterns matched as regular expressions, or None
+        self.groups = groups
+
+class _RouteTable(object):
+    """The routes of one method"""
+
+    def __init__(self):
+        self.tree = _Node()
+        self.regex = _RegexRoutes()
+
+    def match(self, path):
+        match = None
+        if self.tree.children or self.tree.param is not None:
+            match = self.tree.match(path.split("/"), 0, [])
+        if self.regex.routes:
+            regex_match = self.regex.match(path)
+            if regex_match is not None and (match is None or regex_match[0].key < match[0].key):
+                match = regex_match
+        return match
+
+class _Node(object):
+    """A node of the route tree, for a path segment"""
+    __slots__ = ['children', 'param', 'route']
+
+    def __init__(self):
+        # Nodes for the next segment by its text, and for a parameter in the next segment
+        self.children = {}
+        self.param = None
+        # The best route whose pattern ends at this segment
+        self.route = None
+
+    def add(self, segments, route):
+        node = self
+        for segment in segments:
+            if _PARAM_SEGMENT.match(segment):
+                if node.param is None:
+                    node.param = _Node()
+                node = node.param
+            else:
+                child = node.children.get(segment)
+                if child is None:
+                    child = node.children[segment] = _Node()
+                node = child
+        # Routes with the same segments match the same paths, so only the best of them can ever be used
+        if node.route is None or route.key < node.route.key:
+            node.route = route
+
+    def match(self, segments, index, values):
+        """Find the best route for the segments of a path from index on, values holds the parameters so far"""
+        if index == len(segments):
+            if self.route is None:
+                return None
+            return self.route, list(values)
+        segment = segments[index]
+        match = None
+        child = self.children.get(segment)
+        if child is not None:
+            match = child.match(segments, index + 1, values)
+        if self.param is not None and segment:
+            values.append(segment)
+            param_match = self.param.match(segments, index + 1, values)
+            values.pop()
+            if param_match is not None and (match is None or param_match[0].key < match[0].key):
+                match = param_match
+        return match
+
+class _RegexRoutes(object):
+    """Regular expression routes, matched with a single alternation of all their expressions"""
+
+    def __init__(self):
+        self.routes = []
+        self._pattern = None
+        self._groups = None
+
+    def add(self, regex, route):
+        # Check the expression on its own first so errors point at the right route
+        group_count = java.util.regex.Pattern.compile(regex).matcher("").groupCount()
+        self.routes.append((route, regex, group_count))
+        self.routes.sort(key=lambda r: r[0].key)
+        self._pattern = None
+
+    def match(self, path):
+        if self._pattern is None:
+            self._compile()
+        if self._groups is None:
+            # Expressions which couldn't be combined
+            for route, pattern, group_count in self._pattern:
+                m = pattern.matcher(path)
+                if m.matches():
+                    return route, [m.group(i) for i in xrange(1, group_count + 1)]
+            return None
+        m = self._pattern.matcher(path)
+        if not m.matches():
+            return None
+        # Alternatives are tried in order, so the one which matched is the best route that matches
+        for route, group, group_count in self._groups:
+            if m.start(group) != -1:
+                return route, [m.group(i) for i in xrange(group + 1, group + group_count + 1)]
+        return None
+
+    def _compile(self):
+        alternatives = []
+        groups = []
+        group = 1
+        for route, regex, group_count in self.routes:
+            alternatives.append("(" + regex + ")")
+            groups.append((route, group, group_count))
+            group += group_count + 1
+        try:
+            self._pattern = java.util.regex.Pattern.compile("|".join(alternatives))
+            self._groups = groups
+        except java.util.regex.PatternSyntaxException:
+            # e.g. the same group name used in more than one expression
+            self._pattern = [(route, java.util.regex.Pattern.compile(regex), group_count)
+                             for route, regex, group_count in self.routes]
+            self._groups = None
@@ -21,7 +21,7 @@ import org.vertx.java.core.json.JsonObject
 import org.vertx.java.core.json.JsonArray
 import org.vertx.java.platform.impl.JythonVerticleFactory
 
-from core.handlers import AsyncHandler
+from core.handlers import AsyncHandler, NullDoneHandler, cached
 from core.javautils import map_from_java, map_to_java
 from core.event_bus import EventBus
 
@@ -92,29 +92,63 @@ class SockJSSocket(core.streams.ReadStream, core.streams.WriteStream):
     flow control.
     """
     
-    def __init__(self, java_sock):
+    def __init__(self, java_sock, manage_end=True):
         self.java_obj = java_sock
         self.remote_addr = None
         self.local_addr = None
+        self._handler_id = None
+        self._end_handler = None
+        # Sockets owned by the event bus bridge keep the bridge's end handler, the bridge hook releases them instead
+        self._manage_end = manage_end
+        self._watching_end = False
 
-        def simple_handler(msg):
-            self.write(msg.body)
+    @property
+    def handler_id(self):
+        """A SockJSSocket can register an event handler with the system, the ID of that handler is given by
+        handler_id. The handler is only registered the first time this is read.
+        Given this ID, a different event loop can send a buffer to that event handler using the event bus. This
+        allows you to write data to other SockJSSockets which are owned by different event loops.
+        """
+        if self._handler_id is None:
+            def simple_handler(msg):
+                self.write(msg.body)
+            self._watch_end()
+            self._handler_id = EventBus.register_simple_handler(True, simple_handler)
+        return self._handler_id
 
-        self.handler_id = EventBus.register_simple_handler(True, simple_handler)
+    def end_handler(self, handler):
+        """Set an end handler on the socket. Once the socket has ended, and there is no more data to be read, this
+        handler will be called.
+
+        Keyword arguments:
+        @param handler: The end handler
+        """
+        self._end_handler = handler
+        if self._manage_end:
+            self._watch_end()
+        else:
+            self.java_obj.endHandler(cached(NullDoneHandler, handler))
+        return self
 
     def close(self):
         """Close the socket"""
-        EventBus.unregister_handler(self.handler_id)
+        self._release()
         self.java_obj.close()
 
-    def handler_id(self):
-        """When a SockJSSocket is created it automatically registers an event handler with the system, the ID of that
-        handler is given by handler_id.
-        Given this ID, a different event loop can send a buffer to that event handler using the event bus. This
-        allows you to write data to other SockJSSockets which are owned by different event loops.
-        """
-        return self.handler_id
-        
+    def _watch_end(self):
+        # The handler must go when the client goes away, not just when we close the socket
+        if self._manage_end and not self._watching_end:
+            self._watching_end = True
+            def wrapped_end_handler():
+                self._release()
+                if self._end_handler is not None:
+                    self._end_handler()
+            self.java_obj.endHandler(NullDoneHandler(wrapped_end_handler))
+
+    def _release(self):
+        if self._handler_id is not None:
+            EventBus.discard_handler(self._handler_id)
+
     @property
     def remote_address(self):
         """Returns the remote address as tuple in form of ('ipaddress', port)"""
@@ -174,14 +208,34 @@ class _EventBusBridgeHook(org.vertx.java.core.sockjs.EventBusBridgeHook):
     _unregister_handler = None
     _authorise_handler = None
 
+    def __init__(self):
+        # The wrapper of each bridged socket, so every hook sees the same SockJSSocket and its handler is
+        # unregistered once the socket closes
+        self._sockets = {}
+
     def socket_created_handler(self, func):
         self._socket_created_handler = func
         return func
 
+    def _socket(self, j_sock):
+        sock = self._sockets.get(j_sock)
+        if sock is None:
+            sock = self._sockets[j_sock] = SockJSSocket(j_sock, False)
+        return sock
+
     def handleSocketCreated(self, j_sock):
         if self._socket_created_handler is not None:
-            result = self._socket_created_handler(SockJSSocket(j_sock))
-            return result if result is not None else True
+            accepted = False
+            try:
+                result = self._socket_created_handler(self._socket(j_sock))
+                accepted = result is None or bool(result)
+            finally:
+                if not accepted:
+                    # A rejected socket never gets a close callback, so forget it now
+                    sock = self._sockets.pop(j_sock, None)
+                    if sock is not None:
+                        sock._release()
+            return accepted
         return True
 
     def socket_closed_handler(self, func):
@@ -189,8 +243,14 @@ class _EventBusBridgeHook(org.vertx.java.core.sockjs.EventBusBridgeHook):
         return func
 
     def handleSocketClosed(self, j_sock):
-        if self._socket_closed_handler is not None:
-            self._socket_closed_handler(SockJSSocket(j_sock))
+        sock = self._sockets.pop(j_sock, None)
+        if sock is None:
+            sock = SockJSSocket(j_sock, False)
+        try:
+            if self._socket_closed_handler is not None:
+                self._socket_closed_handler(sock)
+        finally:
+            sock._release()
 
     def send_or_pub_handler(self, func):
         self._send_or_pub_handler = func
@@ -198,7 +258,7 @@ class _EventBusBridgeHook(org.vertx.java.core.sockjs.EventBusBridgeHook):
 
     def handleSendOrPub(self, j_sock, send, message, address):
         if self._send_or_pub_handler is not None:
-            result = self._send_or_pub_handler(SockJSSocket(j_sock), send, map_from_java(message), address)
+            result = self._send_or_pub_handler(self._socket(j_sock), send, map_from_java(message), address)
             return result if result is not None else True
         return True
 
@@ -208,7 +268,7 @@ class _EventBusBridgeHook(org.vertx.java.core.sockjs.EventBusBridgeHook):
 
     def handlePreRegister(self, j_sock, address):
         if self._pre_register_handler is not None:
-            result = self._pre_register_handler(SockJSSocket(j_sock), address)
+            result = self._pre_register_handler(self._socket(j_sock), address)
             return result if result is not None else True
         return True
 
@@ -218,7 +278,7 @@ class _EventBusBridgeHook(org.vertx.java.core.sockjs.EventBusBridgeHook):
 
     def handlePostRegister(self, j_sock, address):
         if self._post_register_handler is not None:
-            self._post_register_handler(SockJSSocket(j_sock), address)
+            self._post_register_handler(self._socket(j_sock), address)
 
     def unregister_handler(self, func):
         self._unregister_handler = func
@@ -226,7 +286,7 @@ class _EventBusBridgeHook(org.vertx.java.core.sockjs.EventBusBridgeHook):
 
     def handleUnregister(self, j_sock, address):
         if self._unregister_handler is not None:
-            result = self._unregister_handler(SockJSSocket(j_sock), address)
+            result = self._unregister_handler(self._socket(j_sock), address)
             return result if result is not None else True
         return True
 
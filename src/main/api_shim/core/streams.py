@@ -14,23 +14,27 @@
 
 import org.vertx.java.core.streams.Pump
 
-from core.handlers import BufferHandler, NullDoneHandler, ExceptionHandler
+from core.handlers import BufferHandler, NullDoneHandler, ExceptionHandler, cached
 
 __author__ = "Scott Horn"
 __email__ = "scott@hornmicro.com"
 __credits__ = "Based entirely on work by Tim Fox http://tfox.org"
 
 class ExceptionSupport(object):
+    __slots__ = ()
+
     def exception_handler(self, handler):
         """Set an execption handler on the stream.
 
         Keyword arguments:
         @param handler: The exception handler
         """
-        self.java_obj.exceptionHandler(ExceptionHandler(handler))
+        self.java_obj.exceptionHandler(cached(ExceptionHandler, handler))
         return self
 
 class DrainSupport(object):
+    __slots__ = ()
+
     def set_write_queue_max_size(self, size):
         """Set the maximum size of the write queue. You will still be able to write to the stream even
         if there is more data than this in the write queue. This is used as an indicator by classes such as
@@ -62,7 +66,7 @@ class DrainSupport(object):
         Keyword arguments:
         @param handler: The drain handler
         """
-        self.java_obj.drainHandler(NullDoneHandler(handler))
+        self.java_obj.drainHandler(cached(NullDoneHandler, handler))
         return self
 
 class WriteStream(DrainSupport, ExceptionSupport, object):
@@ -71,6 +75,7 @@ class WriteStream(DrainSupport, ExceptionSupport, object):
 
     Any class that mixes in this class can be used by a  to pump data from a  to it.
     """
+    __slots__ = ()
 
     def write(self, buff):
         """Write some data to the stream. The data is put on an internal write queue, and the write actually happens
@@ -84,7 +89,8 @@ class WriteStream(DrainSupport, ExceptionSupport, object):
     def _to_write_stream(self):
         return self.java_obj
 
-class ReadSupport(ExceptionHandler, object):
+class ReadSupport(object):
+    __slots__ = ()
 
     def data_handler(self, handler):
         """Set a data handler. As data is read, the handler will be called with the data.
@@ -110,6 +116,7 @@ class ReadStream(ExceptionSupport, ReadSupport, object):
 
     Any class that mixes in this class can be used by a  to pump data from a  to it.
     """
+    __slots__ = ()
 
     def data_handler(self, handler):
         """Set a data handler. As data is read, the handler will be called with the data.
@@ -117,7 +124,7 @@ class ReadStream(ExceptionSupport, ReadSupport, object):
         Keyword arguments:
         @param handler: The data handler
         """
-        self.java_obj.dataHandler(BufferHandler(handler))
+        self.java_obj.dataHandler(cached(BufferHandler, handler))
         return self
 
     def end_handler(self, handler):
@@ -125,7 +132,7 @@ class ReadStream(ExceptionSupport, ReadSupport, object):
 
         Keyword arguments:
         @param handler: The exception handler"""
-        self.java_obj.endHandler(NullDoneHandler(handler))
+        self.java_obj.endHandler(cached(NullDoneHandler, handler))
         return self
 
     def _to_read_stream(self):
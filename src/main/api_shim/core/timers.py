@@ -0,0 +1,284 @@
+# Copyright 2011 the original author or authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import traceback
+import java.lang.System
+import java.lang.Throwable
+import java.util.concurrent.atomic.AtomicLong
+import org.vertx.java.platform.impl.JythonVerticleFactory
+
+from core.handlers import TimerHandler
+
+class TimerWheel(object):
+    """Schedules large numbers of one-shot timers on a single periodic Java timer.
+
+    Timers are kept in a hierarchical timing wheel: each level is a ring of slots, the first level
+    has a slot per tick and each level above covers a whole turn of the level below in each of
+    its slots. Setting and cancelling a timer are O(1), and the timers in a slot of a higher level
+    are only spread over the level below once they get close to firing. This makes it a good fit
+    for timeouts, of which there are many and which nearly always get cancelled.
+
+    Timers fire on the first tick after their delay has passed, so the tick is the resolution of
+    the wheel. The Java timer only runs while there are timers pending. A wheel should only be
+    used from the context it was created on, that is where its timers fire.
+    """
+
+    _BITS = 8
+    _SLOTS = 1 << _BITS
+    _MASK = _SLOTS - 1
+    _LEVELS = 4
+    # Longer delays are clamped to this many ticks
+    _MAX_TICKS = (1 << (_BITS * _LEVELS)) - 1
+
+    def __init__(self, tick=10):
+        """
+        Keyword arguments:
+        @param tick: the length of a tick, in milliseconds
+        """
+        if tick < 1:
+            raise RuntimeError("tick must be at least 1 ms")
+        self._tick_ms = tick
+        self._tick_nanos = tick * 1000000
+        self._wheels = [[{} for i in xrange(self._SLOTS)] for j in xrange(self._LEVELS)]
+        self._timers = {}
+        self._next_id = 0
+        self._start = java.lang.System.nanoTime()
+        self._tick = 0
+        self._java_timer = None
+        self._tick_handler = TimerHandler(self._on_tick)
+
+    @property
+    def tick(self):
+        """The length of a tick, in milliseconds"""
+        return self._tick_ms
+
+    @property
+    def pending(self):
+        """The number of timers which haven't fired or been cancelled yet"""
+        return len(self._timers)
+
+    def set_timer(self, delay, handler):
+        """Sets a one-shot timer that will fire after a certain delay.
+
+        Keyword arguments:
+        @param delay: the delay, in milliseconds
+        @param handler: an handler that will be called with the id of the timer when it fires
+        @return: the id of the timer, unique within the wheel
+        """
+        elapsed = java.lang.System.nanoTime() - self._start
+        now = elapsed // self._tick_nanos
+        if self._java_timer is None:
+            # The wheel is empty so no ticks need processing, just skip to the current one
+            self._tick = now
+            self._java_timer = _java_vertx().setPeriodic(self._tick_ms, self._tick_handler)
+        # The first tick at or after the delay, counting from the current time even if the wheel is still
+        # catching up on ticks
+        due = int(-(-(elapsed + delay * 1000000) // self._tick_nanos))
+        tick = max(now, self._tick)
+        if due <= tick:
+            due = tick + 1
+        elif due - tick > self._MAX_TICKS:
+            due = tick + self._MAX_TICKS
+        self._next_id += 1
+        timer = _Timer(self._next_id, due, handler)
+        self._timers[timer.id] = timer
+        self._place(timer)
+        return timer.id
+
+    def cancel_timer(self, id):
+        """Cancels a timer.
+
+        Keyword arguments:
+        @param id: the id of the timer, as returned from set_timer
+        @return: True if the timer was cancelled, False if it wasn't found.
+        """
+        timer = self._timers.pop(id, None)
+        if timer is None:
+            return False
+        del timer.slot[id]
+        if not self._timers:
+            self._stop()
+        return True
+
+    def _place(self, timer):
+        delta = timer.due - self._tick
+        level = 0
+        while delta >= self._SLOTS and level < self._LEVELS - 1:
+            delta >>= self._BITS
+            level += 1
+        slot = self._wheels[level][(timer.due >> (self._BITS * level)) & self._MASK]
+        slot[timer.id] = timer
+        timer.slot = slot
+
+    def _on_tick(self, timer_id):
+        # Catch up on every tick which has passed, the Java timer may fire late
+        target = (java.lang.System.nanoTime() - self._start) // self._tick_nanos
+        while self._tick < target and self._timers:
+            self._tick += 1
+            self._advance(self._tick)
+        if not self._timers:
+            self._stop()
+
+    def _advance(self, tick):
+        # At the start of each turn of a level, spread the next slot of the level above over it
+        level = 0
+        while level < self._LEVELS - 1 and ((tick >> (self._BITS * level)) & self._MASK) == 0:
+            level += 1
+        while level > 0:
+            index = (tick >> (self._BITS * level)) & self._MASK
+            slot = self._wheels[level][index]
+            if slot:
+                self._wheels[level][index] = {}
+                for timer in slot.values():
+                    self._place(timer)
+            level -= 1
+        slot = self._wheels[0][tick & self._MASK]
+        if slot:
+            self._wheels[0][tick & self._MASK] = {}
+            # Handlers may cancel other timers in the slot, so go through a copy
+            for timer in slot.values():
+                if self._timers.get(timer.id) is not timer:
+                    continue
+                if timer.due > tick:
+                    # Clamped delays can outlast a whole turn of the top level
+                    self._place(timer)
+                    continue
+                del self._timers[timer.id]
+                # Java exceptions too, or the rest of the slot would be lost
+                try:
+                    timer.handler(timer.id)
+                except (Exception, java.lang.Throwable), e:
+                    _logger().error("Exception in timer handler: %s\n%s" % (e, traceback.format_exc()))
+
+    def _stop(self):
+        if self._java_timer is not None:
+            _java_vertx().cancelTimer(self._java_timer)
+            self._java_timer = None
+
+class PeriodicScheduler(object):
+    """Runs periodic handlers with the same period on a shared Java periodic timer per context.
+
+    Many handlers firing every second, say, then cost one timer and one wake up per second on each
+    event loop, rather than one each. Periods which only differ by up to the allowed jitter can share
+    a timer too, the handlers then run at the shared period. Ids are negative so they never clash
+    with the ids of Java timers.
+    """
+
+    def __init__(self):
+        # Periodic groups by context and then by period, and the group of each handler id
+        self._contexts = {}
+        self._groups = {}
+        # Handlers are set from every event loop
+        self._ids = java.util.concurrent.atomic.AtomicLong()
+
+    @property
+    def timer_count(self):
+        """The number of Java timers the handlers share"""
+        return sum([len(groups) for groups in self._contexts.itervalues()])
+
+    def set_periodic(self, delay, handler, jitter=0):
+        """Run a handler periodically
+
+        Keyword arguments:
+        @param delay: the period, in milliseconds
+        @param handler: an handler that will be called with the id each time the period passes
+        @param jitter: how many milliseconds the actual period may differ from delay by
+        @return: the id, a negative number
+        """
+        context = _java_vertx().currentContext()
+        groups = self._contexts.get(context)
+        if groups is None:
+            groups = self._contexts[context] = {}
+        group = groups.get(delay)
+        if group is None and jitter > 0:
+            # Join the timer with the closest period within the jitter, there are only ever a few periods
+            for period, candidate in groups.iteritems():
+                if abs(period - delay) <= jitter and (group is None or
+                                                      abs(period - delay) < abs(group.period - delay)):
+                    group = candidate
+        if group is None:
+            group = groups[delay] = _PeriodicGroup(context, delay)
+            group.timer_id = _java_vertx().setPeriodic(delay, TimerHandler(group.fire))
+        id = -self._ids.incrementAndGet()
+        group.handlers[id] = handler
+        self._groups[id] = group
+        return id
+
+    def cancel_timer(self, id):
+        """Stop running a periodic handler
+
+        Keyword arguments:
+        @param id: the id returned by set_periodic
+        @return: True if the handler was cancelled, False if it wasn't found.
+        """
+        group = self._groups.pop(id, None)
+        if group is None:
+            return False
+        del group.handlers[id]
+        if not group.handlers:
+            _java_vertx().cancelTimer(group.timer_id)
+            groups = self._contexts.get(group.context)
+            if groups is not None:
+                groups.pop(group.period, None)
+                if not groups:
+                    del self._contexts[group.context]
+        return True
+
+    def release_context(self, context):
+        """Forget the handlers of a context whose timers Vert.x has already cancelled, when its verticle stops"""
+        groups = self._contexts.pop(context, None)
+        if groups is not None:
+            for group in groups.itervalues():
+                for id in group.handlers.keys():
+                    self._groups.pop(id, None)
+
+class _PeriodicGroup(object):
+    __slots__ = ['context', 'period', 'timer_id', 'handlers']
+
+    def __init__(self, context, period):
+        self.context = context
+        self.period = period
+        self.timer_id = None
+        self.handlers = {}
+
+    def fire(self, timer_id):
+        # Handlers may cancel themselves or each other, so go through a copy
+        for id, handler in self.handlers.items():
+            if id in self.handlers:
+                try:
+                    handler(id)
+                except (Exception, java.lang.Throwable), e:
+                    _logger().error("Exception in periodic handler: %s\n%s" % (e, traceback.format_exc()))
+
+# The scheduler behind vertx.set_periodic(..., coalesce=True)
+periodic_scheduler = PeriodicScheduler()
+
+def release_context(context):
+    """Forget the coalesced periodic timers of a context whose verticle has stopped"""
+    periodic_scheduler.release_context(context)
+
+class _Timer(object):
+    __slots__ = ['id', 'due', 'handler', 'slot']
+
+    def __init__(self, id, due, handler):
+        self.id = id
+        self.due = due
+        self.handler = handler
+        self.slot = None
+
+def _java_vertx():
+    return org.vertx.java.platform.impl.JythonVerticleFactory.vertx
+
+def _logger():
+    return org.vertx.java.platform.impl.JythonVerticleFactory.container.logger()
@@ -20,14 +20,11 @@ import org.vertx.java.platform.impl.JythonVerticleFactory
 import java.lang.System
 import org.vertx.java.core.json.JsonObject
 
-from core.dns import DnsClient
-from core.file_system import FileSystem
-from core.datagram import DatagramSocket
-from core.http import HttpServer, HttpClient
-from core.net import NetServer, NetClient
-from core.sock_js import SockJSServer
-from core.handlers import TimerHandler, NullDoneHandler, AsyncHandler, NullAsyncHandler
+# The modules backing the create_* functions are imported when first used, so
+# verticles only pay for the parts of the API they actually use
+from core.handlers import TimerHandler, NullDoneHandler, AsyncHandler, NullAsyncHandler, cached
 from core.javautils import map_to_java, map_from_java
+from core.future import returns_future
 
 __author__ = "Scott Horn"
 __email__ = "scott@hornmicro.com"
@@ -35,41 +32,50 @@ __credits__ = "Based entirely on work by Tim Fox http://tfox.org"
 
 def create_http_server(**kwargs):
     """ Return a HttpServer """
+    from core.http import HttpServer
     return HttpServer(org.vertx.java.platform.impl.JythonVerticleFactory.vertx.createHttpServer(), **kwargs)
 
 def create_http_client(**kwargs):
     """ Return a HttpClient """
+    from core.http import HttpClient
     return HttpClient(**kwargs)
 
 def create_net_server(**kwargs):
     """ Return a NetServer """
+    from core.net import NetServer
     return NetServer(org.vertx.java.platform.impl.JythonVerticleFactory.vertx.createNetServer(), **kwargs)
 
 def create_net_client(**kwargs):
     """ Return a NetClient """
+    from core.net import NetClient
     return NetClient(**kwargs)
 
 def create_sockjs_server(http_server):
     """ Return a SockJSServer """
+    from core.sock_js import SockJSServer
     return SockJSServer(http_server)
 
 def create_datagram_socket(ipv4=None):
     """ Return a datagram socket """
+    from core.datagram import DatagramSocket
+    from org.vertx.java.core.datagram import InternetProtocolFamily
     if ipv4 is None:
         return DatagramSocket(org.vertx.java.platform.impl.JythonVerticleFactory.vertx.createDatagramSocket(None))
     elif ipv4:
-        return DatagramSocket(org.vertx.java.platform.impl.JythonVerticleFactory.vertx.createDatagramSocket(org.vertx.java.core.datagram.InternetProtocolFamily.Ipv4))
+        return DatagramSocket(org.vertx.java.platform.impl.JythonVerticleFactory.vertx.createDatagramSocket(InternetProtocolFamily.Ipv4))
     else:
-        return DatagramSocket(org.vertx.java.platform.impl.JythonVerticleFactory.vertx.createDatagramSocket(org.vertx.java.core.datagram.InternetProtocolFamily.Ipv6))
+        return DatagramSocket(org.vertx.java.platform.impl.JythonVerticleFactory.vertx.createDatagramSocket(InternetProtocolFamily.Ipv6))
 
 def file_system():
     """ Return the filesystem """
+    from core.file_system import FileSystem
     return FileSystem()
 
 def logger():
     """ Get the logger for the verticle """
     return org.vertx.java.platform.impl.JythonVerticleFactory.container.logger()
 
+@returns_future()
 def deploy_verticle(main, config=None, instances=1, handler=None):
     """Deploy a verticle. The actual deploy happens asynchronously
 
@@ -77,16 +83,17 @@ def deploy_verticle(main, config=None, instances=1, handler=None):
     @param main: the main of the verticle to deploy
     @param config: dict configuration for the verticle
     @param instances: number of instances to deploy
-    @param handler: a handler that will be called when deploy has completed
+    @param handler: a handler that will be called when deploy has completed, or a Future to complete
 
     """
     if config != None:
         config = org.vertx.java.core.json.JsonObject(map_to_java(config))
 
     if handler != None:
-        handler = AsyncHandler(handler)
+        handler = cached(AsyncHandler, handler)
     org.vertx.java.platform.impl.JythonVerticleFactory.container.deployVerticle(main, config, instances, handler)
 
+@returns_future()
 def deploy_worker_verticle(main, config=None, instances=1, multi_threaded=False, handler=None):
     """Deploy a worker verticle. The actual deploy happens asynchronously
 
@@ -94,13 +101,14 @@ def deploy_worker_verticle(main, config=None, instances=1, multi_threaded=False,
     @param main: the main of the verticle to deploy
     @param config: dict configuration for the verticle
     @param instances: the number of instances to deploy
-    @param handler: an handler that will be called when deploy has completed
+    @param handler: an handler that will be called when deploy has completed, or a Future to complete
     @param multithreaded: enables multithreaded worker
     """
     if config != None:
         config = org.vertx.java.core.json.JsonObject(map_to_java(config))
-    org.vertx.java.platform.impl.JythonVerticleFactory.container.deployWorkerVerticle(main, config, instances, multi_threaded, AsyncHandler(handler))
+    org.vertx.java.platform.impl.JythonVerticleFactory.container.deployWorkerVerticle(main, config, instances, multi_threaded, cached(AsyncHandler, handler))
 
+@returns_future()
 def deploy_module(module_name, config=None, instances=1, handler=None):
     """Deploy a module. The actual deploy happens asynchronously
 
@@ -108,29 +116,31 @@ def deploy_module(module_name, config=None, instances=1, handler=None):
     @param module_name: The name of the module to deploy
     @param config: dict configuration for the module
     @param instances: Number of instances to deploy
-    @param handler: an handler that will be called when deploy has completed
+    @param handler: an handler that will be called when deploy has completed, or a Future to complete
     """
     if config != None:
         config = org.vertx.java.core.json.JsonObject(map_to_java(config))
-    org.vertx.java.platform.impl.JythonVerticleFactory.container.deployModule(module_name, config, instances, AsyncHandler(handler))
+    org.vertx.java.platform.impl.JythonVerticleFactory.container.deployModule(module_name, config, instances, cached(AsyncHandler, handler))
 
+@returns_future()
 def undeploy_verticle(id, handler=None):
     """Undeploy a verticle
 
     Keyword arguments:
     @param id: the unique id of the deployment
-    @param handler: an handler that will be called when undeploy has completed
+    @param handler: an handler that will be called when undeploy has completed, or a Future to complete
     """
-    org.vertx.java.platform.impl.JythonVerticleFactory.container.undeployVerticle(id, NullAsyncHandler(handler))
+    org.vertx.java.platform.impl.JythonVerticleFactory.container.undeployVerticle(id, cached(NullAsyncHandler, handler))
 
+@returns_future()
 def undeploy_module(id, handler=None):
     """Undeploy a module
 
     Keyword arguments:
     @param id: the unique id of the module
-    @param handler: an handler that will be called when undeploy has completed
+    @param handler: an handler that will be called when undeploy has completed, or a Future to complete
     """
-    org.vertx.java.platform.impl.JythonVerticleFactory.container.undeployModule(id, NullAsyncHandler(handler))
+    org.vertx.java.platform.impl.JythonVerticleFactory.container.undeployModule(id, cached(NullAsyncHandler, handler))
 
 def config():
     """Get config for the verticle
@@ -152,17 +162,24 @@ def set_timer(delay, handler):
     @param handler: an handler that will be called when the timer fires
     @return: the unique id of the timer
     """
-    return java_vertx().setTimer(delay, TimerHandler(handler))
+    return java_vertx().setTimer(delay, cached(TimerHandler, handler))
 
-def set_periodic(delay, handler):
+def set_periodic(delay, handler, coalesce=False, jitter=0):
     """Sets a periodic timer.
 
     Keyword arguments:
     @param delay: the period of the timer, in milliseconds
     @param handler: an handler that will be called each time the timer fires
+    @param coalesce: if True the handler shares a single timer with the other coalesced handlers of the
+    same context and period, instead of getting a timer of its own
+    @param jitter: for coalesced handlers, how many milliseconds the actual period may differ from delay,
+    so handlers with close periods can share a timer too
     @return: the unique id of the timer
     """
-    return java_vertx().setPeriodic(delay, TimerHandler(handler))
+    if coalesce:
+        from core.timers import periodic_scheduler
+        return periodic_scheduler.set_periodic(delay, handler, jitter)
+    return java_vertx().setPeriodic(delay, cached(TimerHandler, handler))
 
 def cancel_timer(id):
     """Cancels a timer.
@@ -171,8 +188,24 @@ def cancel_timer(id):
     @param id: the id of the timer, as returned from set_timer or set_periodic
     @return: true if the timer was cancelled, false if it wasn't found.
     """
+    if id < 0:
+        # Coalesced periodic timer
+        from core.timers import periodic_scheduler
+        return periodic_scheduler.cancel_timer(id)
     return java_vertx().cancelTimer(id)
 
+def timer_wheel(tick=10):
+    """Create a timer wheel, which runs large numbers of one-shot timers, such as timeouts, on a single Java
+    timer. Setting and cancelling its timers is much cheaper than with set_timer and cancel_timer, in return
+    timers only fire on the ticks of the wheel.
+
+    Keyword arguments:
+    @param tick: the resolution of the wheel, in milliseconds
+    @return: a core.timers.TimerWheel
+    """
+    from core.timers import TimerWheel
+    return TimerWheel(tick)
+
 def run_on_context(handler):
     """Put the handler on the event queue for this loop so it will be run asynchronously
     ASAP after this event has been processed
@@ -180,7 +213,51 @@ def run_on_context(handler):
     Keyword arguments:
     @param handler: an handler representing the code that will be run ASAP
     """
-    java_vertx().runOnContext(NullDoneHandler(handler))
+    context = java_vertx().currentContext()
+    if context is None:
+        java_vertx().runOnContext(cached(NullDoneHandler, handler))
+    else:
+        from core.context import microtask_queue
+        microtask_queue(context).post(handler)
+
+def set_microtask_budget(budget):
+    """Set how many handlers queued with run_on_context run in one go before other events on the
+    event loop get a turn. The default is 1000.
+
+    Keyword arguments:
+    @param budget: the number of handlers
+    """
+    if budget < 1:
+        raise RuntimeError("budget must be at least 1")
+    import core.context
+    core.context.microtask_budget = budget
+
+def iterate(iterable, func, budget_ms=10):
+    """Process the items of an iterable without blocking the event loop. func is called with each item in
+    turn, in slices of at most budget_ms after which the event loop gets to handle other events before the
+    next slice runs.
+
+    Keyword arguments:
+    @param iterable: the items
+    @param func: the function to call with each item
+    @param budget_ms: how long a slice may run for, in milliseconds
+    @return: a Future which completes with an IterationStats holding the number of items and the duration of
+    each slice, or fails with the first error raised by func
+    """
+    from core.context import iterate
+    return iterate(iterable, func, budget_ms)
+
+def coroutine(func):
+    """Decorator which turns a generator function into a coroutine. Each time the coroutine yields a Future
+    it is suspended until the future completes, and is then resumed on its context with the result, or with
+    the error raised. See core.coroutine for helpers which turn the asynchronous API calls into futures.
+
+    Keyword arguments:
+    @param func: the generator function
+    @return: a function which starts the coroutine and returns a Future of its result
+    """
+    import core.coroutine
+    return core.coroutine.coroutine(func)
 
 def current_context():
     return Context(java_vertx().currentContext())
@@ -193,6 +270,7 @@ def create_dns_client(*args):
     """Create a new dns client
     @param kwargs: tuples which hold (address, port)
     """
+    from core.dns import DnsClient
     return DnsClient(*args)
 
 def java_vertx():
@@ -204,6 +282,7 @@ class Context():
         self.j_context = j_context
 
     def run_on_context(self, handler):
-        self.j_context.runOnContext(NullDoneHandler(handler))
+        from core.context import microtask_queue
+        microtask_queue(self.j_context).post(handler)
 
 
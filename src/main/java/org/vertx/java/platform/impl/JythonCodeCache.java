@@ -0,0 +1,145 @@
+/*
+ * Copyright 2011-2012 the original author or authors.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+package org.vertx.java.platform.impl;
+
+import org.python.core.BytecodeLoader;
+import org.python.core.PyCode;
+import org.python.core.PySystemState;
+import org.python.core.imp;
+import org.vertx.java.core.logging.Logger;
+
+import java.io.ByteArrayInputStream;
+import java.io.File;
+import java.io.IOException;
+import java.nio.charset.Charset;
+import java.nio.file.Files;
+import java.nio.file.StandardCopyOption;
+import java.security.MessageDigest;
+import java.security.NoSuchAlgorithmException;
+import java.util.concurrent.ConcurrentHashMap;
+import java.util.concurrent.ConcurrentMap;
+
+/**
+ * Cache of compiled verticle code.
+ *
+ * Entries are keyed by a hash of the script name, the script source and the Jython version, so a script is only
+ * parsed and compiled the first time it is seen. Compiled code is always kept in memory and, if a cache directory
+ * is given, the class files Jython generates are also written there so unchanged scripts don't need compiling again
+ * after a restart.
+ */
+class JythonCodeCache {
+
+  // Bump this whenever the way verticle source is wrapped before compiling changes
+  private static final String FORMAT_VERSION = "1";
+  private static final Charset UTF8 = Charset.forName("UTF-8");
+
+  private final ConcurrentMap<String, PyCode> codes = new ConcurrentHashMap<>();
+  private final File dir;
+  private final Logger log;
+
+  JythonCodeCache(File dir, Logger log) {
+    this.dir = dir;
+    this.log = log;
+    if (dir != null && !dir.isDirectory() && !dir.mkdirs()) {
+      log.warn("Cannot create Python code cache directory " + dir + ", compiled code will only be cached in memory");
+    }
+  }
+
+  /**
+   * Compute the cache key for a script
+   * @param kind how the source is prepared before compiling, so differently prepared code never collides
+   */
+  String key(String kind, String scriptName, String source) {
+    MessageDigest md;
+    try {
+      md = MessageDigest.getInstance("SHA-1");
+    } catch (NoSuchAlgorithmException e) {
+      throw new IllegalStateException(e);
+    }
+    md.update(FORMAT_VERSION.getBytes(UTF8));
+    md.update((byte)0);
+    md.update(String.valueOf(PySystemState.version).getBytes(UTF8));
+    md.update((byte)0);
+    md.update(kind.getBytes(UTF8));
+    md.update((byte)0);
+    md.update(scriptName.getBytes(UTF8));
+    md.update((byte)0);
+    md.update(source.getBytes(UTF8));
+    StringBuilder sb = new StringBuilder();
+    for (byte b: md.digest()) {
+      sb.append(Character.forDigit((b >> 4) & 0xf, 16)).append(Character.forDigit(b & 0xf, 16));
+    }
+    return sb.toString();
+  }
+
+  /**
+   * Look up previously compiled code, first in memory and then on disk
+   * @return the code or null if it hasn't been compiled yet
+   */
+  PyCode get(String key, String name, String fileName) {
+    PyCode code = codes.get(key);
+    if (code == null && dir != null) {
+      File file = cacheFile(key);
+      if (file.exists()) {
+        try {
+          code = BytecodeLoader.makeCode(name + "$py", Files.readAllBytes(file.toPath()), fileName);
+          PyCode prev = codes.putIfAbsent(key, code);
+          if (prev != null) {
+            code = prev;
+          }
+        } catch (Exception e) {
+          log.warn("Discarding unreadable cached Python code " + file + ": " + e.getMessage());
+          file.delete();
+          code = null;
+        }
+      }
+    }
+    return code;
+  }
+
+  /**
+   * Compile the source as a module and cache the resulting code
+   */
+  PyCode compile(String key, String name, String source, String fileName) {
+    byte[] bytes = imp.compileSource(name, new ByteArrayInputStream(source.getBytes(UTF8)), fileName);
+    if (dir != null) {
+      store(cacheFile(key), bytes);
+    }
+    PyCode code = BytecodeLoader.makeCode(name + "$py", bytes, fileName);
+    PyCode prev = codes.putIfAbsent(key, code);
+    return prev != null ? prev : code;
+  }
+
+  private File cacheFile(String key) {
+    return new File(dir, key + ".class");
+  }
+
+  private void store(File file, byte[] bytes) {
+    // Write to a temp file and rename so concurrent deployments never see a partially written file
+    File tmp = null;
+    try {
+      tmp = File.createTempFile(file.getName(), ".tmp", dir);
+      Files.write(tmp.toPath(), bytes);
+      Files.move(tmp.toPath(), file.toPath(), StandardCopyOption.REPLACE_EXISTING, StandardCopyOption.ATOMIC_MOVE);
+    } catch (IOException e) {
+      log.warn("Failed to write Python code cache file " + file + ": " + e.getMessage());
+      if (tmp != null) {
+        tmp.delete();
+      }
+    }
+  }
+}
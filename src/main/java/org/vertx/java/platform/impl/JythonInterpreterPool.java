@@ -0,0 +1,80 @@
+/*
+ * Copyright 2011-2012 the original author or authors.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+package org.vertx.java.platform.impl;
+
+import org.python.util.PythonInterpreter;
+
+import java.util.ArrayList;
+import java.util.List;
+
+/**
+ * The Python interpreters verticles are run in.
+ *
+ * With a pool size of one every verticle shares a single interpreter. Otherwise each thread that starts a verticle
+ * is given an interpreter of its own, until the pool is full after which threads share the existing interpreters
+ * round robin. A thread always gets the same interpreter so verticles on an event loop never contend with verticles on
+ * other event loops for an interpreter's system state.
+ */
+abstract class JythonInterpreterPool {
+
+  private final int maxSize;
+  private final List<PythonInterpreter> interpreters = new ArrayList<>();
+  private final ThreadLocal<PythonInterpreter> affinity = new ThreadLocal<>();
+  private int next;
+
+  JythonInterpreterPool(int maxSize) {
+    if (maxSize < 1) {
+      throw new IllegalArgumentException("Interpreter pool size must be at least 1");
+    }
+    this.maxSize = maxSize;
+  }
+
+  /**
+   * Create a new interpreter for the pool
+   */
+  protected abstract PythonInterpreter create();
+
+  /**
+   * Get the interpreter for the current thread
+   */
+  PythonInterpreter get() {
+    PythonInterpreter py = affinity.get();
+    if (py == null) {
+      py = assign();
+      affinity.set(py);
+    }
+    return py;
+  }
+
+  synchronized void close() {
+    for (PythonInterpreter py: interpreters) {
+      py.cleanup();
+    }
+    interpreters.clear();
+  }
+
+  private synchronized PythonInterpreter assign() {
+    if (interpreters.size() < maxSize) {
+      PythonInterpreter py = create();
+      interpreters.add(py);
+      return py;
+    }
+    PythonInterpreter py = interpreters.get(next);
+    next = (next + 1) % interpreters.size();
+    return py;
+  }
+}
@@ -0,0 +1,181 @@
+/*
+ * Copyright 2011-2012 the original author or authors.
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+package org.vertx.java.platform.impl;
+
+import org.python.core.Py;
+import org.python.core.PyObject;
+import org.python.core.imp;
+import org.vertx.java.core.json.JsonArray;
+import org.vertx.java.core.json.JsonObject;
+
+import java.util.ArrayDeque;
+import java.util.ArrayList;
+import java.util.Deque;
+import java.util.LinkedHashMap;
+import java.util.List;
+import java.util.Map;
+
+/**
+ * Timings for the start of a single verticle instance.
+ *
+ * Records how long each phase of starting the verticle took and, while the verticle's top level code runs, the tree of
+ * modules it imports with the cumulative time spent importing each one.
+ */
+class JythonStartupProfile {
+
+  private static final ThreadLocal<JythonStartupProfile> current = new ThreadLocal<>();
+
+  private final String scriptName;
+  private final long startTime = System.nanoTime();
+  private final Map<String, Long> phases = new LinkedHashMap<>();
+  private final Import root = new Import(null);
+  private final Deque<Import> importStack = new ArrayDeque<>();
+  private long phaseStart = startTime;
+  private boolean cached;
+
+  JythonStartupProfile(String scriptName) {
+    this.scriptName = scriptName;
+    importStack.push(root);
+  }
+
+  /**
+   * Install the import hook which records imports for the profile of the current thread, if any
+   */
+  static void installImportHook() {
+    PyObject builtin = imp.importName("__builtin__", true);
+    PyObject importFunc = builtin.__getattr__("__import__");
+    if (!(importFunc instanceof ImportHook)) {
+      builtin.__setattr__("__import__", new ImportHook(importFunc));
+    }
+  }
+
+  /**
+   * Record the time since the previous phase ended
+   */
+  void endPhase(String name) {
+    long now = System.nanoTime();
+    phases.put(name, now - phaseStart);
+    phaseStart = now;
+  }
+
+  void setCached(boolean cached) {
+    this.cached = cached;
+  }
+
+  /**
+   * Record the imports made on this thread until {@link #endImports()} is called
+   */
+  void beginImports() {
+    current.set(this);
+  }
+
+  void endImports() {
+    current.remove();
+  }
+
+  JsonObject toJson() {
+    JsonObject json = new JsonObject();
+    json.putString("verticle", scriptName);
+    json.putBoolean("cached", cached);
+    json.putNumber("total", millis(phaseStart - startTime));
+    JsonObject phasesJson = new JsonObject();
+    for (Map.Entry<String, Long> phase: phases.entrySet()) {
+      phasesJson.putNumber(phase.getKey(), millis(phase.getValue()));
+    }
+    json.putObject("phases", phasesJson);
+    json.putArray("imports", root.childrenToJson());
+    return json;
+  }
+
+  @Override
+  public String toString() {
+    StringBuilder sb = new StringBuilder("Started Python verticle ").append(scriptName).append(" in ")
+        .append(millis(phaseStart - startTime)).append(" ms").append(cached ? " (compiled code cached)" : "");
+    for (Map.Entry<String, Long> phase: phases.entrySet()) {
+      sb.append("\n  ").append(phase.getKey()).append(": ").append(millis(phase.getValue())).append(" ms");
+    }
+    if (!root.children.isEmpty()) {
+      sb.append("\n  imports:");
+      root.appendChildren(sb, "    ");
+    }
+    return sb.toString();
+  }
+
+  private static double millis(long nanos) {
+    return nanos / 1000000d;
+  }
+
+  private static class Import {
+    final String module;
+    final List<Import> children = new ArrayList<>();
+    long time;
+
+    Import(String module) {
+      this.module = module;
+    }
+
+    JsonArray childrenToJson() {
+      JsonArray json = new JsonArray();
+      for (Import child: children) {
+        JsonObject childJson = new JsonObject();
+        childJson.putString("module", child.module);
+        childJson.putNumber("time", millis(child.time));
+        childJson.putArray("imports", child.childrenToJson());
+        json.addObject(childJson);
+      }
+      return json;
+    }
+
+    void appendChildren(StringBuilder sb, String indent) {
+      for (Import child: children) {
+        sb.append("\n").append(indent).append(child.module).append(": ").append(millis(child.time)).append(" ms");
+        child.appendChildren(sb, indent + "  ");
+      }
+    }
+  }
+
+  /**
+   * Replacement for __builtin__.__import__ which times the imports made while a profile is being recorded
+   */
+  private static class ImportHook extends PyObject {
+
+    private final PyObject importFunc;
+
+    ImportHook(PyObject importFunc) {
+      this.importFunc = importFunc;
+    }
+
+    @Override
+    public PyObject __call__(PyObject[] args, String[] keywords) {
+      JythonStartupProfile profile = current.get();
+      // Modules which are already loaded cost next to nothing so leave them out of the tree
+      if (profile == null || args.length == 0 || Py.getSystemState().modules.__finditem__(args[0]) != null) {
+        return importFunc.__call__(args, keywords);
+      }
+      Import node = new Import(args[0].toString());
+      profile.importStack.peek().children.add(node);
+      profile.importStack.push(node);
+      long start = System.nanoTime();
+      try {
+        return importFunc.__call__(args, keywords);
+      } finally {
+        node.time = System.nanoTime() - start;
+        profile.importStack.pop();
+      }
+    }
+  }
+}
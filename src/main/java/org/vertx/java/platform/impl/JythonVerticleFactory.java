@@ -17,11 +17,17 @@
 package org.vertx.java.platform.impl;
 
 import org.python.core.Options;
+import org.python.core.Py;
+import org.python.core.PyCode;
+import org.python.core.PyObject;
+import org.python.core.PyStringMap;
 import org.python.core.PySystemState;
+import org.python.core.imp;
 import org.python.util.PythonInterpreter;
 import org.vertx.java.core.Vertx;
 import org.vertx.java.core.VertxException;
 import org.vertx.java.core.dns.DnsClient;
+import org.vertx.java.core.eventbus.EventBus;
 import org.vertx.java.core.logging.Logger;
 import org.vertx.java.platform.Container;
 import org.vertx.java.platform.Verticle;
@@ -29,8 +35,9 @@ import org.vertx.java.platform.VerticleFactory;
 
 import java.io.*;
 import java.net.InetSocketAddress;
+import java.util.ArrayList;
+import java.util.Arrays;
 import java.util.List;
-import java.util.concurrent.atomic.AtomicInteger;
 
 /**
  * @author <a href="https://github.com/sjhorn">Scott Horn</a>
@@ -38,9 +45,63 @@ import java.util.concurrent.atomic.AtomicInteger;
  */
 public class JythonVerticleFactory implements VerticleFactory {
 
+  /**
+   * Directory used to persist compiled verticle code between restarts. If not set compiled code is only cached
+   * in memory.
+   */
+  public static final String CACHE_DIR_PROP_NAME = "vertx.jython.cacheDir";
+
+  /**
+   * How verticles are run. "function" (the default) wraps each script in a function defined in the shared
+   * interpreter. "module" runs each instance as a module with its own fresh globals, nothing is added to the
+   * shared interpreter.
+   */
+  public static final String VERTICLE_MODE_PROP_NAME = "vertx.jython.verticleMode";
+
+  /**
+   * Maximum number of Python interpreters. With the default of 1 all verticles share a single interpreter,
+   * otherwise each thread starting verticles gets its own interpreter until the limit is reached.
+   */
+  public static final String INTERPRETER_POOL_SIZE_PROP_NAME = "vertx.jython.interpreterPoolSize";
+
+  /**
+   * If true the Python API modules are imported in the background as soon as an interpreter is created, so the
+   * first verticles to use them don't pay the import cost.
+   */
+  public static final String WARMUP_PROP_NAME = "vertx.jython.warmup";
+
+  /**
+   * Comma separated list of additional modules to import during warm up
+   */
+  public static final String WARMUP_MODULES_PROP_NAME = "vertx.jython.warmupModules";
+
+  /**
+   * If true the time taken by each phase of starting every verticle, and by the modules it imports, is logged and
+   * published on the event bus
+   */
+  public static final String PROFILE_STARTUP_PROP_NAME = "vertx.jython.profileStartup";
+
+  /**
+   * Event bus address startup profiles are published to
+   */
+  public static final String PROFILE_ADDRESS_PROP_NAME = "vertx.jython.profileAddress";
+
+  private static final String[] API_MODULES = {
+      "vertx", "core.javautils", "core.handlers", "core.buffer", "core.streams", "core.event_bus", "core.http",
+      "core.net", "core.sock_js", "core.file_system", "core.dns", "core.datagram", "core.shared_data",
+      "core.parsetools", "core.future", "core.coroutine", "core.timers",
+      "core.context", "core.router", "core.http_cache"
+  };
+
+  // API modules which keep state per context, each has a release_context function
+  private static final String[] CONTEXT_MODULES = {"core.event_bus", "core.timers", "core.context"};
+
   private ClassLoader cl;
-  private PythonInterpreter py;
-  private static final AtomicInteger seq = new AtomicInteger();
+  private JythonInterpreterPool interpreters;
+  private List<String> warmupModules;
+  private String profileAddress;
+  private JythonCodeCache codeCache;
+  private boolean moduleMode;
 
   public static Vertx vertx;
   public static Container container;
@@ -55,6 +116,36 @@ public class JythonVerticleFactory implements VerticleFactory {
     return vertx.createDnsClient(list.toArray(new InetSocketAddress[0]));
   }
 
+  // Batched event bus operations. Doing the loop in Java means a batch crosses from Jython into Java, and
+  // Jython resolves the overloaded send/publish method, once rather than once per message
+  public static void sendBatch(String address, List<Object> messages) {
+    EventBus eb = vertx.eventBus();
+    for (Object message: messages) {
+      eb.send(address, message);
+    }
+  }
+
+  public static void publishBatch(String address, List<Object> messages) {
+    EventBus eb = vertx.eventBus();
+    for (Object message: messages) {
+      eb.publish(address, message);
+    }
+  }
+
+  public static void sendToAll(List<String> addresses, Object message) {
+    EventBus eb = vertx.eventBus();
+    for (String address: addresses) {
+      eb.send(address, message);
+    }
+  }
+
+  public static void publishToAll(List<String> addresses, Object message) {
+    EventBus eb = vertx.eventBus();
+    for (String address: addresses) {
+      eb.publish(address, message);
+    }
+  }
+
 
   @Override
   public void init(Vertx vertx, Container container, ClassLoader cl) {
@@ -64,7 +155,32 @@ public class JythonVerticleFactory implements VerticleFactory {
     System.setProperty("python.options.internalTablesImpl","weak");
     Thread.currentThread().setContextClassLoader(cl);
     Options.includeJavaStackInExceptions = false;
-    this.py = new PythonInterpreter(null, new PySystemState());
+    if (Boolean.getBoolean(WARMUP_PROP_NAME)) {
+      warmupModules = new ArrayList<>(Arrays.asList(API_MODULES));
+      for (String module: System.getProperty(WARMUP_MODULES_PROP_NAME, "").split(",")) {
+        if (!module.trim().isEmpty()) {
+          warmupModules.add(module.trim());
+        }
+      }
+    }
+    if (Boolean.getBoolean(PROFILE_STARTUP_PROP_NAME)) {
+      profileAddress = System.getProperty(PROFILE_ADDRESS_PROP_NAME, "vertx.jython.startup-profile");
+    }
+    this.interpreters = new JythonInterpreterPool(Integer.getInteger(INTERPRETER_POOL_SIZE_PROP_NAME, 1)) {
+      protected PythonInterpreter create() {
+        return createInterpreter();
+      }
+    };
+    // Create the first interpreter now, on the thread that set up the class loader
+    interpreters.get();
+    String cacheDir = System.getProperty(CACHE_DIR_PROP_NAME);
+    this.codeCache = new JythonCodeCache(cacheDir == null ? null : new File(cacheDir), container.logger());
+    String mode = System.getProperty(VERTICLE_MODE_PROP_NAME, "function");
+    if (mode.equals("module")) {
+      moduleMode = true;
+    } else if (!mode.equals("function")) {
+      throw new IllegalArgumentException("Invalid value for " + VERTICLE_MODE_PROP_NAME + ": " + mode);
+    }
   }
 
   public Verticle createVerticle(String main) throws Exception {
@@ -109,74 +225,198 @@ public class JythonVerticleFactory implements VerticleFactory {
   }
 
   public void close() {
-    py.cleanup();
+    interpreters.close();
+  }
+
+  private PythonInterpreter createInterpreter() {
+    // Interpreters may be created lazily on event loop threads, make sure they see our class loader
+    Thread thread = Thread.currentThread();
+    ClassLoader tccl = thread.getContextClassLoader();
+    thread.setContextClassLoader(cl);
+    PythonInterpreter py;
+    try {
+      py = new PythonInterpreter(null, new PySystemState());
+    } finally {
+      thread.setContextClassLoader(tccl);
+    }
+    if (profileAddress != null) {
+      Py.setSystemState(py.getSystemState());
+      JythonStartupProfile.installImportHook();
+    }
+    if (warmupModules != null) {
+      warmUp(py);
+    }
+    return py;
+  }
+
+  private void warmUp(final PythonInterpreter py) {
+    final Logger log = container.logger();
+    Thread thread = new Thread("vertx-jython-warmup") {
+      public void run() {
+        long start = System.nanoTime();
+        Py.setSystemState(py.getSystemState());
+        for (String module: warmupModules) {
+          long moduleStart = System.nanoTime();
+          try {
+            imp.importName(module, true);
+            log.info("Imported Python module " + module + " in " + millisSince(moduleStart) + " ms");
+          } catch (Exception e) {
+            log.warn("Failed to import Python module " + module + " during warm up", e);
+          }
+        }
+        log.info("Python warm up completed in " + millisSince(start) + " ms");
+      }
+    };
+    thread.setDaemon(true);
+    thread.setContextClassLoader(cl);
+    thread.start();
+  }
+
+  private static long millisSince(long nanoTime) {
+    return (System.nanoTime() - nanoTime) / 1000000;
   }
 
   private class JythonVerticle extends Verticle {
 
     private final String scriptName;
-    private String funcName;
-    private StringBuilder stopFuncName;
-    private StringBuilder stopFuncVar;
+    private PythonInterpreter py;
+    private PyObject stopFunc;
 
     JythonVerticle(String scriptName) {
       this.scriptName = scriptName;
     }
 
     public void start() {
-      try (InputStream is = cl.getResourceAsStream(scriptName)) {
-        if (is == null) {
-          throw new IllegalArgumentException("Cannot find verticle: " + scriptName);
+      JythonStartupProfile profile = profileAddress == null ? null : new JythonStartupProfile(scriptName);
+      try {
+        String source;
+        try (InputStream is = cl.getResourceAsStream(scriptName)) {
+          if (is == null) {
+            throw new IllegalArgumentException("Cannot find verticle: " + scriptName);
+          }
+          if (profile != null) {
+            profile.endPhase("resolve");
+          }
+          source = readSource(is);
         }
-        // We wrap the python verticle in a function so different instances don't see each others top level vars
-        String genName = "__VertxInternalVert__" + seq.incrementAndGet();
-        funcName = "f" + genName;
-        StringBuilder sWrap = new StringBuilder("def ").append(funcName).append("():\n");
-        BufferedReader br = new BufferedReader(new InputStreamReader(is));
-        for (String line = br.readLine(); line != null; line = br.readLine()) {
-          // Append line indented by a tab
-          sWrap.append("\t").append(line).append("\n");
+        if (profile != null) {
+          profile.endPhase("read");
         }
-        br.close();
-        // The return value of the wrapping function is the vertx_stop function (if defined)
-        sWrap.append("\tif 'vertx_stop' in locals():\n");
-        sWrap.append("\t\treturn vertx_stop\n");
-        sWrap.append("\telse:\n");
-        sWrap.append("\t\treturn None\n");
-
-        // And then we have to add a top level wrapper method that calls the actual vertx_stop method
-        stopFuncVar = new StringBuilder("v").append(genName);
-        sWrap.append(stopFuncVar).append(" = ").append(funcName).append("()\n");
-        stopFuncName = new StringBuilder(funcName).append("_stop");
-        sWrap.append("def ").append(stopFuncName).append("():\n");
-        sWrap.append("\tif ").append(stopFuncVar).append(" is not None:\n");
-        sWrap.append("\t\t").append(stopFuncVar).append("()\n");
-
-
-
-        // We have to convert it back to an inputstream since for some reason there is no version
-        // py.exec which takes a String AND a fileName - and without the filename
-        // any stack traces from errors won't show the filename and be hard for the user to parse.
-        try (InputStream sis = new ByteArrayInputStream(sWrap.toString().getBytes("UTF-8"))) {
-          py.execfile(sis, scriptName);
+        // The verticle's handlers will run on this thread so stick with its interpreter for the verticle's lifetime
+        py = interpreters.get();
+        if (profile != null) {
+          profile.endPhase("interpreter");
+        }
+        // In function mode we wrap the python verticle in a function so different instances don't see each others
+        // top level vars. Either way the code is named after the cache key so every instance of the same script
+        // shares the compiled code
+        String key = codeCache.key(moduleMode ? "module" : "function", scriptName, source);
+        String name = (moduleMode ? "m" : "f") + "__VertxInternalVert__" + key;
+        PyCode code = codeCache.get(key, name, scriptName);
+        if (profile != null) {
+          profile.setCached(code != null);
+        }
+        if (code == null) {
+          String wrapped = moduleMode ? moduleSource(source) : wrapSource(name, source);
+          code = codeCache.compile(key, name, wrapped, scriptName);
+        }
+        if (profile != null) {
+          profile.endPhase("compile");
+          profile.beginImports();
+        }
+        PyObject ret;
+        try {
+          ret = moduleMode ? runModule(code) : runFunction(code, name);
+        } finally {
+          if (profile != null) {
+            profile.endImports();
+          }
+        }
+        stopFunc = ret == null || ret == Py.None ? null : ret;
+        if (profile != null) {
+          profile.endPhase("run");
+          container.logger().info(profile);
+          vertx.eventBus().publish(profileAddress, profile.toJson());
         }
-
       } catch (Exception e) {
-        funcName = null;
-        stopFuncName = null;
-        stopFuncVar = null;
+        stopFunc = null;
         throw new VertxException(e);
       }
     }
 
     public void stop() {
-      if (stopFuncName != null) {
-        py.exec(stopFuncName.toString() + "()");
-        // And delete the globals
-        py.exec("del " + stopFuncVar);
-        py.exec("del " + stopFuncName);
-        py.exec("del " + funcName);
+      if (py == null) {
+        return;
+      }
+      Py.setSystemState(py.getSystemState());
+      try {
+        if (stopFunc != null) {
+          stopFunc.__call__();
+          stopFunc = null;
+        }
+      } finally {
+        releaseContext();
+      }
+    }
+
+    // Let the API modules forget the event bus handlers, timers and so on this verticle's context registered,
+    // so their registries don't grow with every verticle that's undeployed
+    private void releaseContext() {
+      PyObject context = Py.java2py(vertx.currentContext());
+      PyObject modules = py.getSystemState().modules;
+      for (String name: CONTEXT_MODULES) {
+        // Modules which were never imported have nothing to release
+        PyObject module = modules.__finditem__(name);
+        if (module != null) {
+          module.invoke("release_context", context);
+        }
       }
     }
+
+    // Returns the vertx_stop function of the verticle, if any
+    private PyObject runFunction(PyCode code, String funcName) {
+      // Executing the compiled module just (re)defines the wrapping function, calling it runs the verticle
+      py.exec(code);
+      return py.get(funcName).__call__();
+    }
+
+    // Returns the vertx_stop function of the verticle, if any
+    private PyObject runModule(PyCode code) {
+      // Each instance gets its own globals so nothing is left behind in the shared interpreter
+      PyStringMap globals = new PyStringMap();
+      globals.__setitem__("__name__", Py.newString("__main__"));
+      Py.setSystemState(py.getSystemState());
+      Py.runCode(code, globals, globals);
+      return globals.__finditem__("vertx_stop");
+    }
+  }
+
+  private static String readSource(InputStream is) throws IOException {
+    StringBuilder source = new StringBuilder();
+    BufferedReader br = new BufferedReader(new InputStreamReader(is));
+    for (String line = br.readLine(); line != null; line = br.readLine()) {
+      source.append(line).append("\n");
+    }
+    return source.toString();
+  }
+
+  private static String moduleSource(String source) {
+    // Keep the same one line offset the function wrapper has so reportException adjusts line numbers correctly
+    return "# vert.x verticle\n" + source;
+  }
+
+  private static String wrapSource(String funcName, String source) throws IOException {
+    StringBuilder sWrap = new StringBuilder("def ").append(funcName).append("():\n");
+    BufferedReader br = new BufferedReader(new StringReader(source));
+    for (String line = br.readLine(); line != null; line = br.readLine()) {
+      // Append line indented by a tab
+      sWrap.append("\t").append(line).append("\n");
+    }
+    // The return value of the wrapping function is the vertx_stop function (if defined)
+    sWrap.append("\tif 'vertx_stop' in locals():\n");
+    sWrap.append("\t\treturn vertx_stop\n");
+    sWrap.append("\telse:\n");
+    sWrap.append("\t\treturn None\n");
+    return sWrap.toString();
   }
-}
\ No newline at end of file
+}
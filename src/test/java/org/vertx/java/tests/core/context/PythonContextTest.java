@@ -26,4 +26,24 @@ public class PythonContextTest extends TestBase {
     startTest(getMethodName());
   }
 
+  public void test_microtask_order() {
+    startTest(getMethodName());
+  }
+
+  public void test_microtask_budget() {
+    startTest(getMethodName());
+  }
+
+  public void test_microtask_error() {
+    startTest(getMethodName());
+  }
+
+  public void test_iterate() {
+    startTest(getMethodName());
+  }
+
+  public void test_iterate_error() {
+    startTest(getMethodName());
+  }
+
 }
@@ -0,0 +1,37 @@
+package org.vertx.java.tests.core.coroutine;
+
+import org.vertx.java.testframework.TestBase;
+
+public class PythonCoroutineTest extends TestBase {
+
+  @Override
+  protected void setUp() throws Exception {
+    super.setUp();
+    startApp("core/coroutine/test_client.py");
+  }
+
+  @Override
+  protected void tearDown() throws Exception {
+    super.tearDown();
+  }
+
+  public void test_sleep() {
+    startTest(getMethodName());
+  }
+
+  public void test_reply() {
+    startTest(getMethodName());
+  }
+
+  public void test_error() {
+    startTest(getMethodName());
+  }
+
+  public void test_return() {
+    startTest(getMethodName());
+  }
+
+  public void test_failure() {
+    startTest(getMethodName());
+  }
+}
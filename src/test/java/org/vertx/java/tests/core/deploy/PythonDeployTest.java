@@ -1,6 +1,7 @@
 package org.vertx.java.tests.core.deploy;
 
 import org.junit.Test;
+import org.vertx.java.platform.impl.JythonVerticleFactory;
 import org.vertx.java.testframework.TestBase;
 
 /**
@@ -11,6 +12,17 @@ public class PythonDeployTest extends TestBase {
 
   @Override
   protected void setUp() throws Exception {
+    // The factory reads its options when the test app is deployed
+    String name = getName();
+    if (name.equals("test_module_mode")) {
+      System.setProperty(JythonVerticleFactory.VERTICLE_MODE_PROP_NAME, "module");
+    } else if (name.equals("test_warmup")) {
+      System.setProperty(JythonVerticleFactory.WARMUP_PROP_NAME, "true");
+      System.setProperty(JythonVerticleFactory.WARMUP_MODULES_PROP_NAME, "warm_module");
+    } else if (name.equals("test_profile_startup")) {
+      System.setProperty(JythonVerticleFactory.PROFILE_STARTUP_PROP_NAME, "true");
+      System.setProperty(JythonVerticleFactory.PROFILE_ADDRESS_PROP_NAME, "deploy-profile");
+    }
     super.setUp();
     startApp("core/deploy/test_client.py");
   }
@@ -18,6 +30,11 @@ public class PythonDeployTest extends TestBase {
   @Override
   protected void tearDown() throws Exception {
     super.tearDown();
+    System.clearProperty(JythonVerticleFactory.VERTICLE_MODE_PROP_NAME);
+    System.clearProperty(JythonVerticleFactory.WARMUP_PROP_NAME);
+    System.clearProperty(JythonVerticleFactory.WARMUP_MODULES_PROP_NAME);
+    System.clearProperty(JythonVerticleFactory.PROFILE_STARTUP_PROP_NAME);
+    System.clearProperty(JythonVerticleFactory.PROFILE_ADDRESS_PROP_NAME);
   }
 
   @Test
@@ -35,6 +52,11 @@ public class PythonDeployTest extends TestBase {
     startTest(getMethodName());
   }
 
+  @Test
+  public void test_deploy_instances() throws Exception {
+    startTest(getMethodName());
+  }
+
   @Test
   public void test_deploy_fail() throws Exception {
     startTest(getMethodName());
@@ -45,4 +67,19 @@ public class PythonDeployTest extends TestBase {
     startTest(getMethodName());
   }
 
+  @Test
+  public void test_module_mode() throws Exception {
+    startTest(getMethodName());
+  }
+
+  @Test
+  public void test_warmup() throws Exception {
+    startTest(getMethodName());
+  }
+
+  @Test
+  public void test_profile_startup() throws Exception {
+    startTest(getMethodName());
+  }
+
 }
@@ -98,6 +98,50 @@ public class PythonEventBusTest extends TestBase {
     startTest(getMethodName());
   }
 
+  public void test_echo_nested() {
+    startTest(getMethodName());
+  }
+
+  public void test_body_view() {
+    startTest(getMethodName());
+  }
+
+  public void test_forward_message() {
+    startTest(getMethodName());
+  }
+
+  public void test_forward_modified_message() {
+    startTest(getMethodName());
+  }
+
+  public void test_send_batch() {
+    startTest(getMethodName());
+  }
+
+  public void test_publish_to_all() {
+    startTest(getMethodName());
+  }
+
+  public void test_request_tracker() {
+    startTest(getMethodName());
+  }
+
+  public void test_request_tracker_limits() {
+    startTest(getMethodName());
+  }
+
+  public void test_request_tracker_max_addresses() {
+    startTest(getMethodName());
+  }
+
+  public void test_handler_registry() {
+    startTest(getMethodName());
+  }
+
+  public void test_unregister_context_handlers() {
+    startTest(getMethodName());
+  }
+
   public void test_echo_json_with_json() {
     startTest(getMethodName());
   }
@@ -0,0 +1,49 @@
+package org.vertx.java.tests.core.future;
+
+import org.vertx.java.testframework.TestBase;
+
+public class PythonFutureTest extends TestBase {
+
+  @Override
+  protected void setUp() throws Exception {
+    super.setUp();
+    startApp("core/future/test_client.py");
+  }
+
+  @Override
+  protected void tearDown() throws Exception {
+    super.tearDown();
+  }
+
+  public void test_complete() {
+    startTest(getMethodName());
+  }
+
+  public void test_on_complete_done() {
+    startTest(getMethodName());
+  }
+
+  public void test_map() {
+    startTest(getMethodName());
+  }
+
+  public void test_map_error() {
+    startTest(getMethodName());
+  }
+
+  public void test_all() {
+    startTest(getMethodName());
+  }
+
+  public void test_any() {
+    startTest(getMethodName());
+  }
+
+  public void test_with_timeout() {
+    startTest(getMethodName());
+  }
+
+  public void test_async_methods() {
+    startTest(getMethodName());
+  }
+}
@@ -170,4 +170,20 @@ public class PythonHttpTest extends TestBase {
   public void test_form_upload_attributes() {
     startTest(getMethodName());
   }
+
+  public void test_multimap() {
+    startTest(getMethodName());
+  }
+
+  public void test_put_headers() {
+    startTest(getMethodName());
+  }
+
+  public void test_response_cache() {
+    startTest(getMethodName());
+  }
+
+  public void test_response_cache_uncacheable() {
+    startTest(getMethodName());
+  }
 }
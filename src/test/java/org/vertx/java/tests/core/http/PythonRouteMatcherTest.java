@@ -101,4 +101,29 @@ public class PythonRouteMatcherTest extends TestBase {
   public void test_route_no_match() {
     startTest(getMethodName());
   }
+
+  public void test_router_with_pattern() {
+    startTest(getMethodName());
+  }
+
+  public void test_router_with_regex() {
+    startTest(getMethodName());
+  }
+
+  public void test_router_with_unnamed_groups() {
+    startTest(getMethodName());
+  }
+
+  public void test_router_order() {
+    startTest(getMethodName());
+  }
+
+  public void test_router_priority() {
+    startTest(getMethodName());
+  }
+
+  public void test_router_no_match() {
+    startTest(getMethodName());
+  }
+
 }
@@ -38,6 +38,11 @@ public class PythonNetTest extends TestBase {
     startTest(getMethodName());
   }
 
+  @Test
+  public void test_write_handler_id() throws Exception {
+    startTest(getMethodName());
+  }
+
   @Test
   public void test_methods() throws Exception {
     startTest(getMethodName());
@@ -25,4 +25,16 @@ public class PythonTimerTest extends TestBase {
   public void test_periodic() {
     startTest(getMethodName());
   }
+
+  public void test_cached_handler() {
+    startTest(getMethodName());
+  }
+
+  public void test_timer_wheel() {
+    startTest(getMethodName());
+  }
+
+  public void test_coalesced_periodic() {
+    startTest(getMethodName());
+  }
 }
@@ -0,0 +1,104 @@
+# Copyright 2011-2012 the original author or authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Helpers for the micro-benchmark verticles in this package.
+
+Benchmarks are run as ordinary verticles, for example:
+
+    vertx run benchmarks/json_conversion.py -cp src/test/python_scripts
+
+Each one logs its results and then exits the container.
+"""
+
+import vertx
+import org.vertx.java.core.http.HttpServerRequest
+import org.vertx.java.core.http.HttpServerResponse
+import org.vertx.java.core.http.CaseInsensitiveMultiMap
+from java.lang import System, Thread
+from java.lang.management import ManagementFactory
+
+def measure(func, iterations, repeat=5):
+    """Call func iterations times, repeat times over, and return the best
+    time per call in microseconds.
+    """
+    best = None
+    for i in xrange(repeat):
+        start = System.nanoTime()
+        for j in xrange(iterations):
+            func()
+        elapsed = System.nanoTime() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best / 1000.0 / iterations
+
+def allocated(func, iterations):
+    """Call func iterations times and return the bytes allocated per call by
+    the current thread, where the JVM can tell.
+    """
+    threads = ManagementFactory.getThreadMXBean()
+    thread_id = Thread.currentThread().getId()
+    # Warm up first so the JIT and any caches don't count
+    for j in xrange(iterations):
+        func()
+    start = threads.getThreadAllocatedBytes(thread_id)
+    for j in xrange(iterations):
+        func()
+    return (threads.getThreadAllocatedBytes(thread_id) - start) / float(iterations)
+
+def report(title, results, unit="us"):
+    """Log a list of (name, microseconds per call) results, or of results in
+    another unit, with the ratio of the first result to each one.
+    """
+    log = vertx.logger()
+    log.info(title)
+    baseline = results[0][1]
+    for name, value in results:
+        log.info("  %-45s %10.2f %s %8.2fx" % (name, value, unit, baseline / value))
+
+class FakeServerRequest(org.vertx.java.core.http.HttpServerRequest):
+    """Just enough of a Java server request to be dispatched and routed"""
+    def __init__(self, method, path):
+        self._method = method
+        self._path = path
+        self._params = None
+        self._response = FakeServerResponse()
+
+    def method(self):
+        return self._method
+
+    def uri(self):
+        return self._path
+
+    def path(self):
+        return self._path
+
+    def params(self):
+        # Fresh parameters for each time the request is routed
+        self._params = org.vertx.java.core.http.CaseInsensitiveMultiMap()
+        return self._params
+
+    def response(self):
+        return self._response
+
+class FakeServerResponse(org.vertx.java.core.http.HttpServerResponse):
+    """A server response which goes nowhere"""
+    def setStatusCode(self, code):
+        return self
+
+    def putHeader(self, *args):
+        return self
+
+    def end(self, *args):
+        pass
@@ -0,0 +1,71 @@
+# Copyright 2011-2012 the original author or authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Compares sending messages one at a time with the batched event bus API.
+"""
+
+import vertx
+from core.event_bus import EventBus
+from benchmarks.bench_utils import measure, report
+
+address = 'benchmark-address'
+batch_size = 1000
+messages = [{'id': i, 'name': 'item %d' % i, 'price': i * 0.5} for i in range(batch_size)]
+addresses = ['benchmark-address-%d' % i for i in range(100)]
+
+def handler(msg):
+    pass
+ids = [EventBus.register_handler(a, True, handler) for a in [address] + addresses]
+
+def send_loop():
+    for message in messages:
+        EventBus.send(address, message)
+
+def send_batch():
+    EventBus.send_batch(address, messages)
+
+def publish_loop():
+    for message in messages:
+        EventBus.publish(address, message)
+
+def publish_batch():
+    EventBus.publish_batch(address, messages)
+
+def publish_each_address():
+    for a in addresses:
+        EventBus.publish(a, messages[0])
+
+def publish_to_all():
+    EventBus.publish_to_all(addresses, messages[0])
+
+def per_message(results, count):
+    return [(name, micros / count) for name, micros in results]
+
+report('Send %d messages, per message' % batch_size, per_message([
+    ('send loop', measure(send_loop, 20)),
+    ('send_batch', measure(send_batch, 20)),
+], batch_size))
+report('Publish %d messages, per message' % batch_size, per_message([
+    ('publish loop', measure(publish_loop, 20)),
+    ('publish_batch', measure(publish_batch, 20)),
+], batch_size))
+report('Publish to %d addresses, per address' % len(addresses), per_message([
+    ('publish loop', measure(publish_each_address, 200)),
+    ('publish_to_all', measure(publish_to_all, 200)),
+], len(addresses)))
+
+for id in ids:
+    EventBus.unregister_handler(id)
+vertx.exit()
@@ -0,0 +1,62 @@
+# Copyright 2011-2012 the original author or authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Compares creating a new Java handler adapter per call with reusing cached
+adapters, both on their own and through set_timer/cancel_timer.
+"""
+
+import vertx
+from core.handlers import TimerHandler, BufferHandler, cached
+from benchmarks.bench_utils import measure, report
+
+def handler(arg):
+    pass
+
+def new_adapter():
+    TimerHandler(handler)
+
+def cached_adapter():
+    cached(TimerHandler, handler)
+
+def new_adapters():
+    TimerHandler(handler)
+    BufferHandler(handler)
+
+def cached_adapters():
+    cached(TimerHandler, handler)
+    cached(BufferHandler, handler)
+
+j_vertx = vertx.java_vertx()
+
+def timer_new_adapter():
+    j_vertx.cancelTimer(j_vertx.setTimer(100000, TimerHandler(handler)))
+
+def timer_cached_adapter():
+    vertx.cancel_timer(vertx.set_timer(100000, handler))
+
+report('Create a timer handler adapter', [
+    ('new adapter', measure(new_adapter, 10000)),
+    ('cached adapter', measure(cached_adapter, 10000)),
+])
+report('Create timer and buffer handler adapters', [
+    ('new adapters', measure(new_adapters, 10000)),
+    ('cached adapters', measure(cached_adapters, 10000)),
+])
+report('Set and cancel a timer', [
+    ('new adapter', measure(timer_new_adapter, 10000)),
+    ('cached adapter', measure(timer_cached_adapter, 10000)),
+])
+
+vertx.exit()
@@ -0,0 +1,91 @@
+# Copyright 2011-2012 the original author or authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Compares the time and memory it takes to dispatch a request to a Python
+handler with the previous request wrappers, which were Java proxies with a
+__dict__ and built their response wrapper up front, and with the current
+ones, which have __slots__ and build the response on first use.
+"""
+
+import vertx
+from core.http import HttpServerRequestHandler, HttpServerResponse
+from core.handlers import ExceptionHandler
+from benchmarks.bench_utils import measure, allocated, report, FakeServerRequest
+
+class EagerServerResponse(object):
+    def __init__(self, java_obj):
+        self.java_obj = java_obj
+        self.hdrs = None
+        self.trls = None
+
+    status_code = property(HttpServerResponse.get_status_code.im_func, HttpServerResponse.set_status_code.im_func)
+    end = HttpServerResponse.end.im_func
+
+class EagerServerRequest(ExceptionHandler, object):
+    """The request wrapper as it was"""
+    def __init__(self, java_obj):
+        self.java_obj = java_obj
+        self.http_server_response = EagerServerResponse(java_obj.response())
+        self.hdrs = None
+        self.prms = None
+        self.vrsn = None
+        self.attrs = None
+        self.expect_mp = False
+
+    @property
+    def method(self):
+        return self.java_obj.method()
+
+    @property
+    def path(self):
+        return self.java_obj.path()
+
+    @property
+    def response(self):
+        return self.http_server_response
+
+class EagerServerRequestHandler(HttpServerRequestHandler):
+    def handle(self, req):
+        self.handler(EagerServerRequest(req))
+
+def ignore(req):
+    pass
+
+def not_found(req):
+    req.response.status_code = 404
+    req.response.end()
+
+def route(req):
+    # A router and the handler it calls would look these up a few times
+    for i in xrange(3):
+        req.method
+        req.path
+
+request = FakeServerRequest("GET", "/api/resource/42")
+
+for name, handler in (("ignores the request", ignore), ("returns a 404", not_found),
+                      ("reads the method and path", route)):
+    eager = EagerServerRequestHandler(handler)
+    lazy = HttpServerRequestHandler(handler)
+    report('Dispatch to a handler which %s' % name, [
+        ('eager wrappers', measure(lambda: eager.handle(request), 10000)),
+        ('lazy wrappers with __slots__', measure(lambda: lazy.handle(request), 10000)),
+    ])
+    report('Memory allocated dispatching to a handler which %s' % name, [
+        ('eager wrappers', allocated(lambda: eager.handle(request), 10000)),
+        ('lazy wrappers with __slots__', allocated(lambda: lazy.handle(request), 10000)),
+    ], "bytes")
+
+vertx.exit()
@@ -0,0 +1,131 @@
+# Copyright 2011-2012 the original author or authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Compares core.javautils JSON conversion with the isinstance based conversion
+it replaced, on nested event bus style payloads.
+"""
+
+import vertx
+import org.vertx.java.core.json.JsonObject
+import org.vertx.java.core.json.JsonArray
+from java.util import Map, Set, Collection, ArrayList, HashMap
+from java.lang import Long, Double, Integer
+from core.javautils import map_to_vertx, map_from_vertx
+from benchmarks.bench_utils import measure, report
+
+# The previous implementation, kept here as the baseline
+
+def old_map_from_java(value):
+    if value is None:
+        return value
+    if isinstance(value, Map):
+        result = {}
+        iter = value.keySet().iterator()
+        while iter.hasNext():
+            key = iter.next()
+            result[old_map_from_java(key)] = old_map_from_java(value.get(key))
+        return result
+    elif isinstance(value, Set):
+        result = set()
+        iter = value.iterator()
+        while iter.hasNext():
+            result.add(old_map_from_java(iter.next()))
+        return result
+    elif isinstance(value, Collection):
+        result = []
+        iter = value.iterator()
+        while iter.hasNext():
+            result.append(old_map_from_java(iter.next()))
+        return result
+    return value
+
+def old_map_from_vertx(value):
+    if value is None:
+        return value
+    if isinstance(value, (Map, Set, Collection)):
+        return old_map_from_java(value)
+    elif isinstance(value, org.vertx.java.core.json.JsonObject):
+        return old_map_from_java(value.toMap())
+    elif isinstance(value, org.vertx.java.core.json.JsonArray):
+        result = []
+        iter = value.iterator()
+        while iter.hasNext():
+            result.append(old_map_from_vertx(iter.next()))
+        return result
+    return value
+
+def old_map_to_java(value):
+    if value is None:
+        return value
+    t = type(value)
+    if t in (tuple, list):
+        result = ArrayList(len(value))
+        for e in value:
+            result.add(old_map_to_java(e))
+        return result
+    elif t == dict:
+        result = HashMap()
+        for key, val in value.items():
+            result.put(old_map_to_java(key), old_map_to_java(val))
+        return result
+    return value
+
+def old_map_to_vertx(value):
+    if value is None:
+        return value
+    if isinstance(value, (list, tuple)):
+        return org.vertx.java.core.json.JsonArray(old_map_to_java(list(value)))
+    elif isinstance(value, dict):
+        return org.vertx.java.core.json.JsonObject(old_map_to_java(value))
+    elif isinstance(value, long):
+        return Long(value)
+    elif isinstance(value, float):
+        return Double(value)
+    elif isinstance(value, int):
+        return Integer(value)
+    return old_map_to_java(value)
+
+def order(i):
+    return {
+        'id': 'order-%d' % i,
+        'customer': {
+            'id': i * 7,
+            'name': 'Customer %d' % i,
+            'vip': i % 3 == 0,
+            'address': {'street': '1 Main Street', 'city': 'Springfield', 'zip': '12345'},
+        },
+        'items': [{'sku': 'sku-%d' % j, 'quantity': j, 'price': j * 1.5, 'tags': ['a', 'b', 'c']} for j in range(10)],
+        'total': i * 15.0,
+        'notes': None,
+    }
+
+small = {'action': 'ping', 'id': 1}
+large = {'orders': [order(i) for i in range(20)], 'page': 1, 'more': True}
+
+for name, payload in (('small', small), ('large', large)):
+    iterations = name == 'small' and 20000 or 200
+    j_payload = map_to_vertx(payload)
+    results = [
+        ('old to_vertx (%s)' % name, measure(lambda: old_map_to_vertx(payload), iterations)),
+        ('new to_vertx (%s)' % name, measure(lambda: map_to_vertx(payload), iterations)),
+    ]
+    report('Jython -> Vert.x conversion, %s payload' % name, results)
+    results = [
+        ('old from_vertx (%s)' % name, measure(lambda: old_map_from_vertx(j_payload), iterations)),
+        ('new from_vertx (%s)' % name, measure(lambda: map_from_vertx(j_payload), iterations)),
+    ]
+    report('Vert.x -> Jython conversion, %s payload' % name, results)
+
+vertx.exit()
@@ -0,0 +1,54 @@
+# Copyright 2011-2012 the original author or authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Compares routing a request with the Java backed RouteMatcher and with the
+route tree of core.router.Router, for 10, 100 and 1000 routes.
+"""
+
+import vertx
+from core.http import RouteMatcher, HttpServerRequestHandler
+from core.router import Router
+from benchmarks.bench_utils import measure, report, FakeServerRequest
+
+def handler(req):
+    pass
+
+def add_routes(matcher, count):
+    for i in xrange(count):
+        matcher.get("/api/resource%d/:id" % i, handler)
+        matcher.get("/api/resource%d/:id/items/:item" % i, handler)
+
+for count in (10, 100, 1000):
+    route_matcher = RouteMatcher()
+    add_routes(route_matcher, count / 2)
+    router = Router()
+    add_routes(router, count / 2)
+    # Server request handlers wrap each request before calling the matcher
+    route_matcher_handler = HttpServerRequestHandler(route_matcher)
+    router_handler = HttpServerRequestHandler(router)
+
+    first = FakeServerRequest("GET", "/api/resource0/42")
+    last = FakeServerRequest("GET", "/api/resource%d/42/items/7" % (count / 2 - 1))
+
+    report('Route to the first of %d routes' % count, [
+        ('RouteMatcher', measure(lambda: route_matcher_handler.handle(first), 2000)),
+        ('Router', measure(lambda: router_handler.handle(first), 2000)),
+    ])
+    report('Route to the last of %d routes' % count, [
+        ('RouteMatcher', measure(lambda: route_matcher_handler.handle(last), 2000)),
+        ('Router', measure(lambda: router_handler.handle(last), 2000)),
+    ])
+
+vertx.exit()
@@ -0,0 +1,54 @@
+# Copyright 2011-2012 the original author or authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Compares setting and cancelling many short lived timeouts with
+set_timer/cancel_timer and with a timer wheel.
+"""
+
+import vertx
+from benchmarks.bench_utils import measure, report
+
+count = 10000
+wheel = vertx.timer_wheel(10)
+
+def handler(timer_id):
+    pass
+
+def java_timers():
+    ids = [vertx.set_timer(5000, handler) for i in xrange(count)]
+    for id in ids:
+        vertx.cancel_timer(id)
+
+def wheel_timers():
+    ids = [wheel.set_timer(5000, handler) for i in xrange(count)]
+    for id in ids:
+        wheel.cancel_timer(id)
+
+def wheel_timers_pending():
+    # Keep the wheel running, as it is when timeouts are constantly in flight
+    keep = wheel.set_timer(60000, handler)
+    wheel_timers()
+    wheel.cancel_timer(keep)
+
+def per_timer(results):
+    return [(name, micros / count) for name, micros in results]
+
+report('Set and cancel %d timers, per timer' % count, per_timer([
+    ('set_timer/cancel_timer', measure(java_timers, 10)),
+    ('timer wheel', measure(wheel_timers, 10)),
+    ('timer wheel, already running', measure(wheel_timers_pending, 10)),
+]))
+
+vertx.exit()
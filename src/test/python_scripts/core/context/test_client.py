@@ -13,6 +13,8 @@
 # limitations under the License.
 
 from test_utils import TestUtils
+from core.handlers import NullDoneHandler
+import java.lang.Integer
 import vertx
 
 tu = TestUtils()    
@@ -32,6 +34,82 @@ class ContextTest(object):
       ctx = vertx.current_context()
       ctx.run_on_context(handler)
 
+  def test_microtask_order(self):
+      ran = []
+      def handler(i):
+          def run():
+              tu.check_thread()
+              ran.append(i)
+              if i == 0:
+                  # Queued while the queue is being drained
+                  vertx.run_on_context(lambda: handler(100)())
+              elif i == 100:
+                  tu.azzert(ran == range(10) + [100])
+                  tu.test_complete()
+          return run
+      for i in range(10):
+          vertx.run_on_context(handler(i))
+
+  def test_microtask_budget(self):
+      vertx.set_microtask_budget(10)
+      ran = []
+      def handler():
+          ran.append(None)
+          if len(ran) == 50:
+              vertx.set_microtask_budget(1000)
+              tu.test_complete()
+      def other():
+          # Posted straight to the event loop after the first handler, it gets in once the budget is used up
+          tu.azzert(len(ran) == 10, "ran %d" % len(ran))
+      vertx.run_on_context(handler)
+      vertx.java_vertx().runOnContext(NullDoneHandler(other))
+      for i in range(49):
+          vertx.run_on_context(handler)
+
+  def test_microtask_error(self):
+      def fail():
+          # A Java exception, reported by Vert.x, mustn't stop the queue
+          java.lang.Integer.parseInt("not a number")
+      def handler():
+          tu.check_thread()
+          vertx.run_on_context(tu.test_complete)
+      vertx.run_on_context(fail)
+      vertx.run_on_context(handler)
+
+  def test_iterate(self):
+      items = []
+      other_ran = []
+      def process(item):
+          tu.check_thread()
+          # Enough work for the iteration to need several slices
+          total = 0
+          for i in xrange(1000):
+              total += i
+          items.append(item)
+      def other():
+          other_ran.append(len(items))
+      def done(error, stats):
+          tu.check_thread()
+          tu.azzert(error is None)
+          tu.azzert(items == range(2000))
+          tu.azzert(stats.count == 2000)
+          tu.azzert(len(stats.slices) > 1)
+          tu.azzert(stats.total >= stats.max_slice > 0)
+          # The event posted before the iteration got in between its slices
+          tu.azzert(other_ran and 0 < other_ran[0] < 2000)
+          tu.test_complete()
+      vertx.iterate(xrange(2000), process, budget_ms=1).on_complete(done)
+      vertx.java_vertx().runOnContext(NullDoneHandler(other))
+
+  def test_iterate_error(self):
+      def process(item):
+          if item == 5:
+              raise ValueError("bad item")
+      def done(error, stats):
+          tu.azzert(isinstance(error, ValueError))
+          tu.test_complete()
+      vertx.iterate(range(10), process).on_complete(done)
+
 def vertx_stop():
   tu.unregister_all()
   tu.app_stopped()
@@ -0,0 +1,103 @@
+# Copyright 2011-2012 the original author or authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import vertx
+from test_utils import TestUtils
+from core.event_bus import EventBus, ReplyError
+from core.coroutine import Return, call, call_value, sleep
+
+tu = TestUtils()
+tu.check_thread()
+
+class CoroutineTest(object):
+    def test_sleep(self):
+        @vertx.coroutine
+        def run():
+            tu.check_thread()
+            yield sleep(10)
+            tu.check_thread()
+            tu.test_complete()
+        run()
+
+    def test_reply(self):
+        def handler(msg):
+            msg.reply('pong')
+        id = EventBus.register_handler('some-address', handler=handler)
+
+        @vertx.coroutine
+        def run():
+            reply = yield call_value(EventBus.send, 'some-address', 'ping')
+            tu.check_thread()
+            tu.azzert(reply.body == 'pong')
+            reply = yield call(EventBus.send_with_timeout, 'some-address', 'ping', 1000)
+            tu.azzert(reply.body == 'pong')
+            EventBus.unregister_handler(id)
+            tu.test_complete()
+        run()
+
+    def test_error(self):
+        @vertx.coroutine
+        def run():
+            try:
+                yield call(EventBus.send_with_timeout, 'no-such-address', 'ping', 100)
+                tu.azzert(False, 'should have raised')
+            except ReplyError, e:
+                tu.check_thread()
+                tu.azzert(e.type in (ReplyError.NO_HANDLERS, ReplyError.TIMEOUT))
+            tu.test_complete()
+        run()
+
+    def test_return(self):
+        @vertx.coroutine
+        def add(a, b):
+            yield sleep(1)
+            raise Return(a + b)
+
+        @vertx.coroutine
+        def not_a_generator():
+            return 'plain'
+
+        @vertx.coroutine
+        def run():
+            result = yield add(1, 2)
+            tu.azzert(result == 3)
+            result = yield not_a_generator()
+            tu.azzert(result == 'plain')
+            raise Return('done')
+
+        def handler(err, result):
+            tu.azzert(err is None)
+            tu.azzert(result == 'done')
+            tu.test_complete()
+        run().on_complete(handler)
+
+    def test_failure(self):
+        @vertx.coroutine
+        def run():
+            yield sleep(1)
+            raise KeyError('oops')
+
+        def handler(err, result):
+            tu.azzert(isinstance(err, KeyError))
+            tu.azzert(result is None)
+            tu.test_complete()
+        run().on_complete(handler)
+
+def vertx_stop():
+    tu.check_thread()
+    tu.unregister_all()
+    tu.app_stopped()
+
+tu.register_all(CoroutineTest())
+tu.app_ready()
@@ -0,0 +1,25 @@
+# Copyright 2011-2012 the original author or authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import sys
+from core.event_bus import EventBus
+
+marker = "module"
+
+# This statement is on line 22, it is reported as 23 because of the line the factory puts first
+EventBus.send("test-handler", {'name': __name__, 'global': 'marker' in globals(), 'line': sys._getframe().f_lineno})
+
+def vertx_stop():
+    EventBus.send("test-handler", "stopped")
@@ -68,6 +68,31 @@ class DeployTest(object):
 
         vertx.deploy_verticle("core/deploy/child2.py", handler=deploy_handler)
 
+    def test_deploy_instances(self):
+        instances = 4
+        self.started = 0
+        self.stopped = 0
+
+        def undeploy_handler(err):
+            tu.azzert(err == None)
+
+        def handler(message):
+            if message.body == "started":
+                self.started += 1
+            elif message.body == "stopped":
+                self.stopped += 1
+                if self.stopped == instances:
+                    tu.azzert(self.started == instances)
+                    tu.test_complete()
+        EventBus.register_handler("test-handler", False, handler)
+
+        def deploy_handler(err, id):
+            tu.azzert(err == None)
+            vertx.undeploy_verticle(id, handler=undeploy_handler)
+
+        conf = {'foo' : 'bar'}
+        vertx.deploy_verticle("core/deploy/child.py", conf, instances, deploy_handler)
+
     def test_deploy_fail(self):
 
         def deploy_handler(err, id):
@@ -85,6 +110,51 @@ class DeployTest(object):
 
         vertx.undeploy_verticle("qijdqwijd", handler=undeploy_handler)
 
+    def test_module_mode(self):
+        self.checked = False
+
+        def handler(message):
+            if message.body == "stopped":
+                tu.azzert(self.checked)
+                tu.test_complete()
+                return
+            tu.azzert(message.body['name'] == '__main__')
+            # Top level names are globals of the verticle rather than locals of a wrapping function
+            tu.azzert(message.body['global'])
+            tu.azzert(message.body['line'] == 23)
+            self.checked = True
+        EventBus.register_handler("test-handler", False, handler)
+
+        def deploy_handler(err, id):
+            tu.azzert(err is None)
+            vertx.undeploy_verticle(id)
+
+        vertx.deploy_verticle("core/deploy/child_module.py", handler=deploy_handler)
+
+    def test_warmup(self):
+        import sys
+        # The modules are imported on a background thread, so wait for them to turn up
+        def check(timer_id):
+            if 'warm_module' in sys.modules and 'core.http_cache' in sys.modules:
+                vertx.cancel_timer(timer_id)
+                tu.test_complete()
+        vertx.set_periodic(10, check)
+
+    def test_profile_startup(self):
+        def handler(message):
+            profile = message.body
+            # The profile of this test's own verticle may arrive as well
+            if profile['verticle'] != "core/deploy/child2.py":
+                return
+            tu.azzert(profile['total'] >= 0)
+            for phase in ("read", "interpreter", "compile", "run"):
+                tu.azzert(phase in profile['phases'], phase)
+            tu.azzert(isinstance(profile['imports'], list))
+            tu.test_complete()
+        EventBus.register_handler("deploy-profile", False, handler)
+
+        vertx.deploy_verticle("core/deploy/child2.py")
+
 def vertx_stop():
     tu.unregister_all()
     tu.app_stopped()
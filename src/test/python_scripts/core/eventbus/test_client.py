@@ -14,7 +14,7 @@
 
 import vertx
 from test_utils import TestUtils
-from core.event_bus import EventBus, ReplyError
+from core.event_bus import EventBus, ReplyError, RequestTracker
 
 tu = TestUtils()
 
@@ -185,6 +185,208 @@ class EventBusTest(object):
             handler.id = EventBus.register_handler(address, handler=handler.handler_func)
         EventBus.publish(address, json)
 
+    def test_body_view(self):
+        json = {'message': 'hello world!', 'nested': {'list': [1, {'x': 'y'}, 'z']}}
+        address = "some-address"
+
+        def handler(msg):
+            view = msg.body_view
+            tu.azzert(len(view) == 2)
+            tu.azzert('message' in view)
+            tu.azzert('missing' not in view)
+            tu.azzert(view['message'] == json['message'])
+            tu.azzert(view['nested']['list'][1]['x'] == 'y')
+            tu.azzert(len(view['nested']['list']) == 3)
+            tu.azzert(view['nested']['list'][-1] == 'z')
+            tu.azzert(view.get('missing') is None)
+            tu.azzert(view.to_dict() == json)
+            tu.azzert(view['nested']['list'].to_list() == json['nested']['list'])
+            try:
+                view['message'] = 'changed'
+                tu.azzert(False, 'view should be read-only')
+            except TypeError:
+                pass
+            tu.azzert(msg.body == json)
+            EventBus.unregister_handler(id)
+            tu.test_complete()
+        id = EventBus.register_handler(address, handler=handler)
+        EventBus.send(address, json)
+
+    def test_forward_message(self):
+        json = {'message': 'hello world!', 'nested': {'list': [1, 2, 3]}}
+        self.ids = []
+
+        def relay_handler(msg):
+            EventBus.send("forward-address", msg)
+            EventBus.publish("view-address", msg.body_view['nested'])
+
+        def forward_handler(msg):
+            tu.azzert(msg.body == json)
+            check_done()
+
+        def view_handler(msg):
+            tu.azzert(msg.body == json['nested'])
+            check_done()
+
+        def check_done():
+            self.received = getattr(self, 'received', 0) + 1
+            if self.received == 2:
+                for id in self.ids:
+                    EventBus.unregister_handler(id)
+                tu.test_complete()
+
+        self.ids.append(EventBus.register_handler("relay-address", handler=relay_handler))
+        self.ids.append(EventBus.register_handler("forward-address", handler=forward_handler))
+        self.ids.append(EventBus.register_handler("view-address", handler=view_handler))
+        EventBus.send("relay-address", json)
+
+    def test_forward_modified_message(self):
+        self.ids = []
+
+        def relay_handler(msg):
+            if msg.body == 'replace':
+                msg.body = {'replaced': True}
+                EventBus.send("forward-address", msg)
+            else:
+                msg.body['changed'] = True
+                msg.reply(msg)
+
+        def forward_handler(msg):
+            tu.azzert(msg.body == {'replaced': True})
+            EventBus.send("relay-address", {'original': True}, reply_handler)
+
+        def reply_handler(msg):
+            tu.azzert(msg.body == {'original': True, 'changed': True})
+            for id in self.ids:
+                EventBus.unregister_handler(id)
+            tu.test_complete()
+
+        self.ids.append(EventBus.register_handler("relay-address", handler=relay_handler))
+        self.ids.append(EventBus.register_handler("forward-address", handler=forward_handler))
+        EventBus.send("relay-address", 'replace')
+
+    def test_send_batch(self):
+        address = "some-address"
+        messages = [{'index': i} for i in range(10)] + ['foo', 123]
+        self.received = []
+
+        def handler(msg):
+            self.received.append(msg.body)
+            if len(self.received) == len(messages):
+                tu.azzert(self.received == messages)
+                EventBus.unregister_handler(id)
+                tu.test_complete()
+        id = EventBus.register_handler(address, handler=handler)
+        EventBus.send_batch(address, messages)
+
+    def test_publish_to_all(self):
+        json = {'message': 'hello world!'}
+        addresses = ["address-1", "address-2", "address-3"]
+        self.ids = []
+        self.received = set()
+
+        def handler(msg):
+            tu.azzert(msg.body == json)
+            self.received.add(msg.address)
+            if len(self.received) == len(addresses):
+                for id in self.ids:
+                    EventBus.unregister_handler(id)
+                tu.test_complete()
+        for address in addresses:
+            self.ids.append(EventBus.register_handler(address, handler=handler))
+        EventBus.publish_to_all(addresses, json)
+
+    def test_request_tracker(self):
+        address = "some-address"
+        tracker = RequestTracker(default_timeout=10000)
+        def handler(msg):
+            msg.reply({'cheese': 'stilton!'})
+        id = EventBus.register_handler(address, handler=handler)
+
+        def reply_handler(error, reply):
+            tu.azzert(error is None)
+            tu.azzert(reply.body['cheese'] == 'stilton!')
+            stats = tracker.stats(address)
+            tu.azzert(tracker.pending == 0)
+            tu.azzert(stats.in_flight == 0)
+            tu.azzert(stats.sent == 1)
+            tu.azzert(stats.replied == 1)
+            tu.azzert(sum([count for bound, count in stats.histogram]) == 1)
+            tu.azzert(stats.mean_latency is not None)
+            EventBus.unregister_handler(id)
+            tu.test_complete()
+        tu.azzert(tracker.send(address, {'message': 'hello world!'}, reply_handler))
+        tu.azzert(tracker.pending == 1)
+        tu.azzert(tracker.stats(address).in_flight == 1)
+
+    def test_request_tracker_limits(self):
+        address = "some-address"
+        tracker = RequestTracker(max_pending=1).set_timeout(address, 10)
+        def handler(msg):
+            pass
+        id = EventBus.register_handler(address, handler=handler)
+        self.errors = []
+
+        def reply_handler(error, reply):
+            tu.azzert(reply is None)
+            self.errors.append(error.type)
+            if len(self.errors) == 2:
+                tu.azzert(ReplyError.REJECTED in self.errors)
+                tu.azzert(ReplyError.TIMEOUT in self.errors)
+                stats = tracker.stats(address)
+                tu.azzert(stats.rejected == 1)
+                tu.azzert(stats.timed_out == 1)
+                tu.azzert(tracker.pending == 0)
+                EventBus.unregister_handler(id)
+                tu.test_complete()
+        tu.azzert(tracker.send(address, 'first', reply_handler))
+        tu.azzert(not tracker.send(address, 'second', reply_handler))
+
+    def test_request_tracker_max_addresses(self):
+        address = "some-address"
+        tracker = RequestTracker(max_addresses=4)
+        def handler(msg):
+            msg.reply('pong')
+        id = EventBus.register_handler(address, handler=handler)
+
+        def reply_handler(error, reply):
+            tu.azzert(error is None)
+            EventBus.unregister_handler(id)
+            tu.test_complete()
+        tu.azzert(tracker.send(address, 'ping', reply_handler))
+        for i in range(10):
+            tracker.stats("idle-address-%d" % i)
+        # Idle addresses are dropped, the one with a request in flight is kept
+        tu.azzert(len(tracker.addresses) <= 4)
+        tu.azzert(address in tracker.addresses)
+        tu.azzert(tracker.stats(address).in_flight == 1)
+
+    def test_handler_registry(self):
+        size = EventBus.registry_size()
+        def handler(msg):
+            pass
+        id1 = EventBus.register_handler("some-address", handler=handler)
+        id2 = EventBus.register_simple_handler(True, handler)
+        tu.azzert(EventBus.registry_size() == size + 2)
+        EventBus.unregister_handler(id1)
+        tu.azzert(EventBus.registry_size() == size + 1)
+        tu.azzert(EventBus.discard_handler(id2))
+        tu.azzert(not EventBus.discard_handler(id2))
+        tu.azzert(EventBus.registry_size() == size)
+        tu.test_complete()
+
+    def test_unregister_context_handlers(self):
+        size = EventBus.registry_size()
+        def handler(msg):
+            tu.azzert(False, "handler should have been unregistered")
+        EventBus.register_handler("some-address", handler=handler)
+        EventBus.register_simple_handler(False, handler)
+        tu.azzert(EventBus.registry_size() == size + 2)
+        tu.azzert(EventBus.unregister_context_handlers() == 2)
+        tu.azzert(EventBus.registry_size() == size)
+        EventBus.send("some-address", "message")
+        vertx.set_timer(100, lambda timer_id: tu.test_complete())
+
     def test_echo_string(self):
         self.echo("foo")
 
@@ -225,6 +427,10 @@ class EventBusTest(object):
         json = ['foo', {'bar': 'baz'}]
         self.echo(json)
 
+    def test_echo_nested(self):
+        json = {'a': [{'b': [1, 2.5, 'c', True]}, ['d', {'e': 'f'}]], 'g': {'h': {'i': 'j', 'k': 12345}}}
+        self.echo(json)
+
     def echo(self, msg):
         address = "some-address"
         class Handler(object):
@@ -0,0 +1,131 @@
+# Copyright 2011-2012 the original author or authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import vertx
+from test_utils import TestUtils
+from core.event_bus import EventBus
+from core.future import Future, FutureTimeoutError
+
+tu = TestUtils()
+tu.check_thread()
+
+class FutureTest(object):
+    def test_complete(self):
+        future = Future()
+        tu.azzert(not future.done)
+        def handler(err, result):
+            tu.check_thread()
+            tu.azzert(err is None)
+            tu.azzert(result == 'foo')
+            tu.azzert(future.succeeded)
+            tu.test_complete()
+        future.on_complete(handler)
+        vertx.set_timer(1, lambda timer_id: future.complete('foo'))
+
+    def test_on_complete_done(self):
+        future = _completed('foo')
+        ran = []
+        def handler(err, result):
+            tu.check_thread()
+            tu.azzert(result == 'foo')
+            # Scheduled on the future's context rather than called straight away
+            tu.azzert(ran == ['added'])
+            tu.test_complete()
+        future.on_complete(handler)
+        ran.append('added')
+
+    def test_map(self):
+        future = Future()
+        mapped = future.map(lambda x: x * 2).flat_map(lambda x: _completed(x + 1))
+        def handler(err, result):
+            tu.azzert(err is None)
+            tu.azzert(result == 5)
+            tu.test_complete()
+        mapped.on_complete(handler)
+        future.complete(2)
+
+    def test_map_error(self):
+        future = Future()
+        def fail(x):
+            raise KeyError(x)
+        def handler(err, result):
+            tu.azzert(isinstance(err, KeyError))
+            tu.azzert(result is None)
+            tu.test_complete()
+        future.map(fail).on_complete(handler)
+        future.complete(1)
+
+    def test_all(self):
+        futures = [Future() for i in range(10)]
+        def handler(err, results):
+            tu.azzert(err is None)
+            tu.azzert(results == range(10))
+            tu.test_complete()
+        Future.all(futures).on_complete(handler)
+        # Complete them out of order, the results must still be in order
+        for i in reversed(range(10)):
+            futures[i].complete(i)
+
+    def test_any(self):
+        futures = [Future() for i in range(3)]
+        def handler(err, result):
+            tu.azzert(err is None)
+            tu.azzert(result == 'second')
+            tu.test_complete()
+        Future.any(futures).on_complete(handler)
+        futures[0].fail(RuntimeError('first'))
+        futures[1].complete('second')
+        futures[2].complete('third')
+
+    def test_with_timeout(self):
+        def handler(err, result):
+            tu.check_thread()
+            tu.azzert(isinstance(err, FutureTimeoutError))
+            tu.test_complete()
+        Future().with_timeout(10).on_complete(handler)
+
+    def test_async_methods(self):
+        def reply_handler(msg):
+            msg.reply('pong')
+        id = EventBus.register_handler('some-address', handler=reply_handler)
+        fs = vertx.file_system()
+        exists = fs.exists('no-such-file')
+        reply = EventBus.send_with_timeout('some-address', 'ping', 1000)
+        deployed = Future()
+        vertx.deploy_verticle('core/future/no_such_verticle.py', handler=deployed)
+        tu.azzert(isinstance(exists, Future))
+        tu.azzert(isinstance(reply, Future))
+        def handler(err, results):
+            tu.azzert(err is None)
+            tu.azzert(results[0] == False)
+            tu.azzert(results[1].body == 'pong')
+            EventBus.unregister_handler(id)
+            def deploy_handler(err, result):
+                tu.azzert(err is not None)
+                tu.test_complete()
+            deployed.on_complete(deploy_handler)
+        Future.all([exists, reply]).on_complete(handler)
+
+def _completed(result):
+    future = Future()
+    future.complete(result)
+    return future
+
+def vertx_stop():
+    tu.check_thread()
+    tu.unregister_all()
+    tu.app_stopped()
+
+tu.register_all(FutureTest())
+tu.app_ready()
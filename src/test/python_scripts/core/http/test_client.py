@@ -15,6 +15,9 @@
 import vertx
 from test_utils import TestUtils
 from core.buffer import Buffer
+from core.http_cache import ResponseCache
+from core.http import MultiMap, HeaderSet
+import org.vertx.java.core.http.CaseInsensitiveMultiMap
 
 tu = TestUtils()
 tu.check_thread()
@@ -218,6 +221,143 @@ class HttpTest(object):
 
         server.listen(8080, "0.0.0.0", listen_handler)
 
+    def test_multimap(self):
+        headers = MultiMap(org.vertx.java.core.http.CaseInsensitiveMultiMap())
+        headers.add("Accept", "text/html").add("accept", "application/json").set("X-Trace", "abc")
+        tu.azzert(len(headers) == 2)
+        tu.azzert("ACCEPT" in headers and "x-trace" in headers and "Missing" not in headers)
+        tu.azzert(headers["accept"] == "text/html")
+        tu.azzert(headers.get("missing", "default") == "default")
+        tu.azzert(headers.get_all("ACCEPT") == ["text/html", "application/json"])
+        tu.azzert(sorted([name.lower() for name in headers]) == ["accept", "x-trace"])
+        tu.azzert(sorted(headers.values()) == ["abc", "text/html"])
+        tu.azzert(dict([(k.lower(), v) for k, v in headers.items()]) == {"accept": "text/html", "x-trace": "abc"})
+        tu.azzert(headers.to_dict() == {"Accept": "text/html", "X-Trace": "abc"})
+        tu.azzert(headers.to_multidict() == {"Accept": ["text/html", "application/json"], "X-Trace": ["abc"]})
+        del headers["x-trace"]
+        tu.azzert(len(headers) == 1 and headers.keys() == ["Accept"])
+        tu.test_complete()
+
+    def test_put_headers(self):
+        HeaderSet.register("security", [("X-Frame-Options", "DENY"), ("X-Content-Type-Options", "nosniff")])
+        cache_headers = HeaderSet({"Cache-Control": "no-cache", "Vary": ["Accept", "Accept-Encoding"]})
+
+        @server.request_handler
+        def request_handler(req):
+            tu.azzert(req.headers["x-first"] == "1" and req.headers["x-second"] == "2")
+            # Replaced by the registered set
+            req.response.put_header("X-Frame-Options", "SAMEORIGIN")
+            req.response.put_headers("security").put_headers(cache_headers)
+            req.response.put_headers({"X-Count": 3})
+            req.response.end()
+
+        def listen_handler(err, serv):
+            tu.azzert(err is None)
+            client.port = 8080
+
+            def response_handler(resp):
+                tu.azzert(200 == resp.status_code)
+                tu.azzert(resp.headers.get_all("X-Frame-Options") == ["DENY"])
+                tu.azzert(resp.headers["X-Content-Type-Options"] == "nosniff")
+                tu.azzert(resp.headers["Cache-Control"] == "no-cache")
+                tu.azzert(resp.headers.get_all("Vary") == ["Accept", "Accept-Encoding"])
+                tu.azzert(resp.headers["X-Count"] == "3")
+                tu.test_complete()
+
+            req = client.get("/headers", response_handler)
+            req.put_headers({"X-First": "1", "X-Second": "2"})
+            req.end()
+
+        server.listen(8080, "0.0.0.0", listen_handler)
+
+    def test_response_cache(self):
+        cache = ResponseCache(ttl=60000)
+        calls = []
+
+        @server.request_handler
+        @cache
+        def request_handler(req):
+            calls.append(req.uri)
+            req.response.put_header("x-call", str(len(calls)))
+            req.response.end("cached body")
+
+        def listen_handler(err, serv):
+            tu.azzert(err is None)
+            client.port = 8080
+            etag = []
+
+            def first_handler(resp):
+                tu.azzert(200 == resp.status_code)
+                etag.append(resp.headers["ETag"])
+                @resp.body_handler
+                def body_handler(body):
+                    tu.azzert("cached body" == body.to_string())
+                    client.get("/cached", second_handler).end()
+
+            def second_handler(resp):
+                # Served from the cache, the handler isn't called again
+                tu.azzert(200 == resp.status_code)
+                tu.azzert("1" == resp.headers["x-call"])
+                tu.azzert(etag[0] == resp.headers["ETag"])
+                tu.azzert(calls == ["/cached"])
+                @resp.body_handler
+                def body_handler(body):
+                    tu.azzert("cached body" == body.to_string())
+                    req = client.get("/cached", not_modified_handler)
+                    req.put_header("If-None-Match", etag[0])
+                    req.end()
+
+            def not_modified_handler(resp):
+                tu.azzert(304 == resp.status_code)
+                tu.azzert(calls == ["/cached"])
+                tu.azzert(cache.hits == 2 and cache.misses == 1)
+                tu.test_complete()
+
+            client.get("/cached", first_handler).end()
+
+        server.listen(8080, "0.0.0.0", listen_handler)
+
+    def test_response_cache_uncacheable(self):
+        cache = ResponseCache(ttl=60000)
+        calls = []
+
+        @server.request_handler
+        @cache
+        def request_handler(req):
+            calls.append(req.uri)
+            if req.path == "/cookie":
+                req.response.put_header("Set-Cookie", "session=%d" % len(calls))
+            else:
+                req.response.put_header("Cache-Control", "max-age=60, private")
+            req.response.end("not cached")
+
+        def listen_handler(err, serv):
+            tu.azzert(err is None)
+            client.port = 8080
+
+            def get(uri, then):
+                def response_handler(resp):
+                    tu.azzert(200 == resp.status_code)
+                    @resp.body_handler
+                    def body_handler(body):
+                        tu.azzert("not cached" == body.to_string())
+                        then(resp)
+                client.get(uri, response_handler).end()
+
+            def second_cookie(resp):
+                # Each client gets its own cookie from the handler
+                tu.azzert("session=2" == resp.headers["Set-Cookie"])
+                get("/private", lambda resp: get("/private", done))
+
+            def done(resp):
+                tu.azzert(calls == ["/cookie", "/cookie", "/private", "/private"])
+                tu.azzert(len(cache) == 0 and cache.hits == 0)
+                tu.test_complete()
+
+            get("/cookie", lambda resp: get("/cookie", second_cookie))
+
+        server.listen(8080, "0.0.0.0", listen_handler)
+
 
 
 def http_method(ssl, method, chunked):
@@ -15,6 +15,7 @@
 import vertx
 from test_utils import TestUtils
 from core.buffer import Buffer
+from core.event_bus import EventBus
 
 tu = TestUtils()
 
@@ -224,6 +225,46 @@ class NetTest(object):
         server.listen(8080, "0.0.0.0", listen_handler)
 
 
+    def test_write_handler_id(self):
+        global server, client
+        size = EventBus.registry_size()
+        server = vertx.create_net_server()
+
+        @server.connect_handler
+        def connect_handler(socket):
+            tu.check_thread()
+            # Nothing is registered with the event bus until the id is asked for
+            tu.azzert(EventBus.registry_size() == size)
+            id = socket.write_handler_id
+            tu.azzert(socket.write_handler_id == id)
+            tu.azzert(EventBus.registry_size() == size + 1)
+
+            @socket.close_handler
+            def close_handler():
+                tu.check_thread()
+                tu.azzert(EventBus.registry_size() == size)
+                tu.test_complete()
+
+            EventBus.send(id, Buffer.create_from_str('some-string'))
+
+        client = vertx.create_net_client()
+
+        def client_connect_handler(err, socket):
+            tu.azzert(err == None)
+            tu.check_thread()
+
+            @socket.data_handler
+            def data_handler(data):
+                tu.check_thread()
+                tu.azzert('some-string' == data.to_string())
+                socket.close()
+
+        def listen_handler(err, serv):
+            tu.azzert(err == None)
+            client.connect(8080, "localhost", client_connect_handler)
+
+        server.listen(8080, "0.0.0.0", listen_handler)
+
     # Basically we just need to touch all methods, the real testing occurs in the Java tests
     def test_methods(self):
         global server, client
@@ -15,6 +15,7 @@
 import vertx
 from test_utils import TestUtils
 from core.http import RouteMatcher
+from core.router import Router
 
 tu = TestUtils()
 
@@ -25,6 +26,10 @@ server.request_handler(rm)
 client = vertx.create_http_client()
 client.port = 8080;
 
+router_server = vertx.create_http_server()
+router = Router()
+router_server.request_handler(router)
+
 class RouteMatcherTest(object):
     def __init__(self):
         self.params = { "name" : "foo", "version" : "v0.1"}
@@ -124,6 +129,81 @@ class RouteMatcherTest(object):
         server.listen(8080, '0.0.0.0', listen_handler)
 
 
+    def test_router_with_pattern(self):
+        router.get("/users/:id", route_handler("user", {"id": "42"}))
+        router.get("/users/:id/posts/:post", route_handler("post", {"id": "42", "post": "7"}))
+        router.get("/files/:name.json", route_handler("json", {"name": "data"}))
+        router_requests([("/users/42", "user"), ("/users/42/posts/7", "post"), ("/files/data.json", "json")])
+
+    def test_router_with_regex(self):
+        router.get_re(self.regex, route_handler("regex", self.re_params))
+        router.get_re("\\/numbers\\/(\\d+)", route_handler("numbers", {"param0": "12"}))
+        router_requests([("/foo/v0.1", "regex"), ("/numbers/12", "numbers")])
+
+    def test_router_with_unnamed_groups(self):
+        # Groups in a pattern which aren't :name parameters match but aren't added to the parameters
+        router.get("/files/(.*)", route_handler("files", {}))
+        router.get("/a/:id/(x|y)", route_handler("after", {"id": "1"}))
+        router.get("/b/(x|y)/:id", route_handler("before", {"id": "2"}))
+        router_requests([("/files/a/b.txt", "files"), ("/a/1/x", "after"), ("/b/y/2", "before")])
+
+    def test_router_order(self):
+        # The first route added wins, whether it's in the tree or a regular expression
+        router.get_re("\\/items\\/([^\\/]+)", route_handler("regex", {"param0": "all"}))
+        router.get("/items/all", route_handler("all", {}))
+        router.get("/things/all", route_handler("things", {}))
+        router.get("/things/:name", route_handler("thing", {"name": "one"}))
+        router_requests([("/items/all", "regex"), ("/things/all", "things"), ("/things/one", "thing")])
+
+    def test_router_priority(self):
+        router.get("/items/:id", route_handler("item", {"id": "3"}))
+        router.get("/items/all", route_handler("all", {}), priority=1)
+        router_requests([("/items/all", "all"), ("/items/3", "item")])
+
+    def test_router_no_match(self):
+        router.post("/items/:id", route_handler("item", {}))
+        def response_handler(resp):
+            tu.azzert(404 == resp.status_code)
+            tu.test_complete()
+
+        def listen_handler(err, serv):
+            tu.azzert(err == None)
+            client.port = 8081
+            client.get("/items/1", response_handler).end()
+
+        router_server.listen(8081, '0.0.0.0', listen_handler)
+
+
+def route_handler(name, params):
+    def handler(req):
+        tu.azzert(req.params.size == len(params))
+        for k,v in params.iteritems():
+            tu.azzert(v == req.params.get(k))
+        req.response.put_header("route", name)
+        req.response.end()
+    return handler
+
+def router_requests(requests):
+    """Check each of a list of (uri, route name) is routed to the right route, one after another"""
+    def next_request():
+        if not requests:
+            tu.test_complete()
+            return
+        uri, name = requests.pop(0)
+        def response_handler(resp):
+            tu.azzert(200 == resp.status_code)
+            tu.azzert(name == resp.headers["route"], "%s routed to %s" % (uri, resp.headers["route"]))
+            next_request()
+        client.get(uri, response_handler).end()
+
+    def listen_handler(err, serv):
+        tu.azzert(err == None)
+        client.port = 8081
+        next_request()
+
+    router_server.listen(8081, '0.0.0.0', listen_handler)
+
+
 def route(method, regex, pattern, params, uri):
     m = method
     if m == 'all':
@@ -158,7 +238,10 @@ def vertx_stop():
     def close_handler(err, ok):
         tu.app_stopped()
 
-    server.close(close_handler)
+    def router_close_handler(err, ok):
+        server.close(close_handler)
+
+    router_server.close(router_close_handler)
 
 tu.register_all(RouteMatcherTest())
 tu.app_ready()
\ No newline at end of file
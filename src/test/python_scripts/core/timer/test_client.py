@@ -14,6 +14,7 @@
 
 import vertx
 from test_utils import TestUtils
+from core.handlers import TimerHandler, NullDoneHandler, cached
 
 tu = TestUtils()
 tu.check_thread()
@@ -40,7 +41,75 @@ class TimerTest(object):
             elif self.count > fires:
                 tu.azzert(False, 'Fired too many times')
         vertx.set_periodic(10, handler)
-    
+
+    def test_cached_handler(self):
+        def handler(timer_id):
+            pass
+        adapter = cached(TimerHandler, handler)
+        tu.azzert(adapter is cached(TimerHandler, handler))
+        tu.azzert(adapter.handler is handler)
+        tu.azzert(cached(NullDoneHandler, handler) is not adapter)
+        tu.azzert(cached(TimerHandler, None) is cached(TimerHandler, None))
+        # Bound methods are new objects each time, but equal ones share an adapter
+        method_adapter = cached(TimerHandler, self.test_cached_handler)
+        tu.azzert(method_adapter.handler == self.test_cached_handler)
+        tu.azzert(method_adapter is cached(TimerHandler, self.test_cached_handler))
+        # Other callables aren't cached
+        tu.azzert(cached(TimerHandler, len) is not cached(TimerHandler, len))
+
+        # The same handler can be used by several timers at once
+        self.fired = 0
+        def timer_handler(timer_id):
+            tu.check_thread()
+            self.fired += 1
+            if self.fired == 2:
+                tu.test_complete()
+        vertx.set_timer(10, timer_handler)
+        vertx.set_timer(20, timer_handler)
+
+    def test_timer_wheel(self):
+        wheel = vertx.timer_wheel(5)
+        self.fired = []
+        def handler(timer_id):
+            tu.check_thread()
+            self.fired.append(timer_id)
+            if len(self.fired) == 2:
+                tu.azzert(self.fired == [first, third])
+                tu.azzert(wheel.pending == 0)
+                tu.azzert(not wheel.cancel_timer(first))
+                tu.test_complete()
+        first = wheel.set_timer(10, handler)
+        second = wheel.set_timer(20, handler)
+        third = wheel.set_timer(2000, handler)
+        tu.azzert(wheel.pending == 3)
+        tu.azzert(wheel.cancel_timer(second))
+        tu.azzert(not wheel.cancel_timer(second))
+        tu.azzert(wheel.pending == 2)
+
+    def test_coalesced_periodic(self):
+        from core.timers import periodic_scheduler
+        timers = periodic_scheduler.timer_count
+        self.counts = {}
+        def handler(timer_id):
+            tu.check_thread()
+            self.counts[timer_id] = self.counts.get(timer_id, 0) + 1
+            if len(self.counts) == 3 and min(self.counts.values()) >= 3:
+                for id in ids:
+                    tu.azzert(vertx.cancel_timer(id))
+                tu.azzert(periodic_scheduler.timer_count == timers)
+                # End the test in another timer in case a handler fires again
+                fired = dict(self.counts)
+                def complete(timer_id):
+                    tu.azzert(self.counts == fired)
+                    tu.test_complete()
+                vertx.set_timer(100, complete)
+        ids = [vertx.set_periodic(10, handler, coalesce=True),
+               vertx.set_periodic(10, handler, coalesce=True),
+               vertx.set_periodic(11, handler, coalesce=True, jitter=2)]
+        for id in ids:
+            tu.azzert(id < 0)
+        tu.azzert(periodic_scheduler.timer_count == timers + 1)
+
 def vertx_stop():
     tu.check_thread()
     tu.unregister_all()